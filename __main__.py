@@ -26,4 +26,6 @@ from app import *
 
 # Application code
 if __name__ == "__main__":
-    Invaders(width=GAME_WIDTH, height=GAME_HEIGHT).run()
+    Invaders(width=GAME_WIDTH, height=GAME_HEIGHT, tickrate=GAME_TICKRATE,
+             maxsteps=GAME_MAX_STEPS, profile=GAME_PROFILE,
+             metrics=METRICS_FILE, capture=CAPTURE_PATH).run()
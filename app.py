@@ -13,6 +13,8 @@ question on Piazza.
 from consts import *
 from game2d import *
 from wave import *
+from replay import ReplayRecorder
+import time
 
 
 # PRIMARY RULE: Invaders can only access attributes in wave.py via getters/setters
@@ -68,6 +70,18 @@ class Invaders(GameApp):
 
     # Attribute _background: The background image of the game
     # Invariant: _background is a GImage object display. it is always displayed.
+    #
+    # Attribute _stress: the frame time and entity counts shown in stress mode
+    # Invariant: _stress is a GLabel object, or None if not in STRESS_MODE
+    #
+    # Attribute _frameTime: the average time between frames, in seconds
+    # Invariant: _frameTime is a float >= 0
+    #
+    # Attribute _lastFrame: when the last frame was drawn (from time.perf_counter)
+    # Invariant: _lastFrame is a float, or None before the first frame
+    #
+    # Attribute _lastReport: when _stress was last brought up to date
+    # Invariant: _lastReport is a float
 
     # You may have new attributes if you wish (you might want an attribute to
     # store any score across multiple waves). But you must document them.
@@ -97,6 +111,14 @@ class Invaders(GameApp):
         self._wave = None
         self._background = GImage(x=GAME_WIDTH/2, y=GAME_HEIGHT/2, width=800,
                                     height=700, source='background.png')
+        self._stress = None
+        if STRESS_MODE:
+            self._stress = GLabel(text='', font_size=20, x=GAME_WIDTH/2, y=20,
+                                  font_name='Arcade.ttf', fillcolor=None,
+                                  linecolor='yellow')
+        self._frameTime = 0.0
+        self._lastFrame = None
+        self._lastReport = 0.0
 
 
     def update(self,dt):
@@ -159,6 +181,7 @@ class Invaders(GameApp):
             self.StateActive(dt)
 
         if self._state == STATE_PAUSED:
+            self._wave.pause(dt)
             self.StatePaused()
 
         if self._state == STATE_CONTINUE:
@@ -185,39 +208,75 @@ class Invaders(GameApp):
         getters for these attributes or you need to add a draw method to
         class Wave.  We suggest the latter.  See the example subcontroller.py
         from class.
+
+        The game is simulated in fixed time steps (see GAME_TICKRATE). While
+        the wave is active, it is drawn between its last two steps, using
+        how far the clock is into the next step.
         """
         # IMPLEMENT ME
         self._background.draw(self.view)
 
         if self._wave != None:
+            if self._state == STATE_ACTIVE:
+                self._wave.draw(self.view, self.alpha)
+            else:
+                self._wave.draw(self.view)
 
-            self.drawAliens()
-
-            self._wave.getShip().draw(self.view)
-
-            self._wave.getDline().draw(self.view)
-
-            for bolt in self._wave.getBolts():
-                bolt.draw(self.view)
+        if self._text is not None:
+            self._text.draw(self.view)
 
-            self._wave.getScoreBoard().draw(self.view)
+        if self._stress is not None:
+            self.StressReport()
+            self._stress.draw(self.view)
 
-            for i in self._wave.getHearts():
-                i.draw(self.view)
 
-            if self._text != None:
-                self._text.draw(self.view)
+    def cleanup(self):
+        """
+        Finishes the replay file of the current wave, if any, when the window
+        is closed.
+        """
+        if getattr(self, '_wave', None) is not None:
+            self._wave.setRecorder(None)
 
-            if self._wave.bossAlienExists():
-                self._wave.getBossAlien().draw(self.view)
 
-        if self._text != None:
-            self._text.draw(self.view)
-        
+    def StressReport(self):
+        """
+        Measures the time between frames and shows it in stress mode.
 
+        The average frame time is updated every frame, but the text of
+        _stress (with the frame time, the frame rate and the number of aliens
+        and bolts) only four times a second, as a new text costs Kivy a new
+        texture.
+        """
+        now = time.perf_counter()
+        if self._lastFrame is not None:
+            self._frameTime += ((now - self._lastFrame) - self._frameTime) * 0.1
+        self._lastFrame = now
+        if now - self._lastReport < 0.25 or self._frameTime == 0:
+            return
+        self._lastReport = now
+        aliens = bolts = 0
+        if self._wave is not None:
+            aliens = self._wave.getAlienCount()
+            bolts = self._wave.getBoltCount()
+        self._stress.text = '%.1f ms  %d fps  aliens %d  bolts %d' % (
+            self._frameTime * 1000, round(1 / self._frameTime), aliens, bolts)
+
+
+    def sample(self):
+        """
+        Returns the values of this frame to log when METRICS_FILE is set.
 
-        if self._text is not None:
-            self._text.draw(self.view)
+        These are the state of the game, the number of aliens and bolts, the
+        score and the lives left (all 0 if there is no wave). Every frame has
+        the same values, so they can be the columns of a CSV file.
+        """
+        if self._wave is None:
+            return {'state': self._state, 'aliens': 0, 'bolts': 0, 'score': 0,
+                    'lives': 0}
+        return {'state': self._state, 'aliens': self._wave.getAlienCount(),
+                'bolts': self._wave.getBoltCount(),
+                'score': self._wave.getScore(), 'lives': self._wave.getLives()}
 
 
     # HELPER METHODS FOR THE STATES GO HERE
@@ -234,6 +293,11 @@ class Invaders(GameApp):
             self._state = STATE_NEWWAVE
             self._text = None
             self._wave = Wave()
+            if REPLAY_FILE is not None:
+                self._wave.setRecorder(ReplayRecorder(REPLAY_FILE,
+                                                      self._wave.getSeed()))
+            if WAVE_STATS_FILE is not None:
+                self._wave.setStats(WaveStats())
             self._state = STATE_ACTIVE
 
 
@@ -261,7 +325,16 @@ class Invaders(GameApp):
     def StateComplete(self):
         """
         The wave is over, and the player as either won or lost.
+
+        If the wave was being recorded, the replay file is finished. If it
+        was being timed, its stats are added to WAVE_STATS_FILE.
         """
+        self._wave.setRecorder(None)
+        stats = self._wave.getStats()
+        if stats is not None:
+            stats.dump(WAVE_STATS_FILE, seed=self._wave.getSeed(),
+                       score=self._wave.getScore(), lives=self._wave.getLives())
+            self._wave.setStats(None)
         self._state = STATE_COMPLETE
         self._text = GLabel(text="GAME OVER",font_size=40, x = 400, y = 400,
         font_name = 'Arcade.ttf', linecolor = 'white', fillcolor = None)
@@ -291,13 +364,3 @@ class Invaders(GameApp):
 
         elif self._wave.getLives() == 0:
             self.StateComplete()
-
-
-    def drawAliens(self):
-        """
-        Draws the row of aliens.
-        """
-        for row in self._wave.getAliens():
-            for alien in row:
-                if alien != None:
-                    alien.draw(self.view)
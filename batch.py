@@ -0,0 +1,701 @@
+"""
+Batched simulation module for Alien Invaders
+
+This module contains the class WaveBatch, which plays many independent waves
+of Alien Invaders at once. Every piece of state (the formations, the bolts,
+the ships, the lives and scores, the timers and the boss) is a NumPy array
+whose first dimension is the game, so a single call to step advances every
+game with a handful of vectorized operations instead of a Python loop over
+WaveCore objects.
+
+The rules are exactly those of WaveCore.step in core.py. Each game draws its
+random numbers from its own random.Random, in the same order as WaveCore, so
+game i of a batch plays out exactly like a WaveCore built with the same seed
+and fed the same inputs. Like core.py, this module never imports kivy.
+
+Each game has at most one player bolt, and its aliens fire one bolt at a
+time. Stress mode lifts both limits (see PLAYER_BOLTS and ALIEN_VOLLEY in
+consts.py), so WaveBatch refuses to run in stress mode rather than play
+other rules than WaveCore.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+from consts import *
+from core import Formation, sweep
+import numpy as np
+import random
+
+# PRIMARY RULE: This module may only access consts.py and core.py. It must never import
+# kivy, game2d, models, wave or app, or it can no longer run without a window.
+
+# The points for each type of alien, for adding up kills in every game at once
+_SCORES = np.array(ALIEN_SCORES)
+
+
+class WaveBatch(object):
+    """
+    A class to play a batch of independent waves in lock step.
+
+    Every game has the shape of the wave in WaveCore: a formation of
+    ALIEN_ROWS by ALIENS_IN_ROW aliens, a ship, SHIP_LIVES lives and a boss
+    once the formation is destroyed. A game is advanced exactly as
+    WaveCore.advance would advance it: a hit on the ship is acknowledged at
+    once and play carries on.
+
+    When a game is over (won or lost), its result is recorded and it starts
+    again with a new wave straight away. Wave k of game i (counting from 0)
+    is seeded with seed + i + k*games, so every wave in the batch has its
+    own seed, and any of them can be replayed alone with WaveCore.
+
+    The formation of each game only ever moves as a whole, so it is stored
+    as the position of the alien in row 0, column 0 (formX, formY) plus the
+    offsets of the columns and rows from it, which are the same in every
+    game.
+
+    Each game has room for a fixed number of bolts, and a bolt stays in its
+    slot until it is spent. The room doubles for every game if a game runs
+    out of it.
+
+    A batch cannot be made in stress mode (see STRESS_MODE in consts.py).
+    """
+    # ATTRIBUTES:
+    # Attribute formX, formY: the position of the alien in row 0, column 0
+    # Invariant: formX and formY are float arrays of length games
+    #
+    # Attribute alive: which aliens have not been destroyed
+    # Invariant: alive is a bool array of shape (games, rows, cols), and
+    #            alive[g,r,c] is True exactly when hp[g,r,c] > 0
+    #
+    # Attribute hp: the hits each alien can still take
+    # Invariant: hp is an int16 array of shape (games, rows, cols), >= 0
+    #
+    # Attribute shipX: the x-coordinate of the center of each ship
+    # Invariant: shipX is a float array of length games
+    #
+    # Attribute shipOn: which games still have a ship
+    # Invariant: shipOn is a bool array of length games
+    #
+    # Attribute lives: the number of lives left in each game
+    # Invariant: lives is an int array of length games, >= 0
+    #
+    # Attribute score: the score of each game
+    # Invariant: score is an int array of length games, >= 0
+    #
+    # Attribute boltX, boltY: the centers of the bolts
+    # Invariant: boltX and boltY are float arrays of shape (games, capacity)
+    #
+    # Attribute boltV: the velocity of each bolt in the y direction
+    # Invariant: boltV is a float array of shape (games, capacity)
+    #
+    # Attribute boltOwner: who fired each bolt
+    # Invariant: boltOwner is an int8 array of shape (games, capacity) with
+    #            values BOLT_PLAYER or BOLT_ALIEN
+    #
+    # Attribute boltOn: which bolt slots hold a bolt
+    # Invariant: boltOn is a bool array of shape (games, capacity)
+    #
+    # Attribute bossOn: which games have a boss alien
+    # Invariant: bossOn is a bool array of length games
+    #
+    # Attribute bossX, bossY: the center of each boss alien
+    # Invariant: bossX and bossY are float arrays of length games
+    #
+    # Attribute bossHp: the hits each boss alien can still take
+    # Invariant: bossHp is an int array of length games
+    #
+    # HIDDEN ATTRIBUTES:
+    # Attribute _games: the number of games in the batch
+    # Invariant: _games is an int > 0
+    #
+    # Attribute _seed: the seed of wave 0 of game 0
+    # Invariant: _seed is an int
+    #
+    # Attribute _seeds: the seed of the current wave of each game
+    # Invariant: _seeds is an int array of length _games
+    #
+    # Attribute _waves: the number of waves each game has finished
+    # Invariant: _waves is an int array of length _games, >= 0
+    #
+    # Attribute _rngs: the random number generator of each game
+    # Invariant: _rngs is a list of _games random.Random objects
+    #
+    # Attribute _colOff, _rowOff: where each column and row of the formation
+    #            is relative to column 0 and row 0
+    # Invariant: _colOff is a float array of length cols, _rowOff a float
+    #            array of length rows
+    #
+    # Attribute _kind: the type of each alien (the same in every game)
+    # Invariant: _kind is an int8 array of shape (rows, cols)
+    #
+    # Attribute _start: the formation every wave starts with
+    # Invariant: _start is a Formation object
+    #
+    # Attribute _live: the number of live aliens in each game
+    # Invariant: _live is an int array of length _games
+    #
+    # Attribute _rowCount, _colCount: the live aliens in each row and column
+    # Invariant: _rowCount is an int array of shape (_games, rows), and
+    #            _colCount is an int array of shape (_games, cols)
+    #
+    # Attribute _liveCols, _colSlot, _numCols: the columns with a live alien
+    #            of each game, kept exactly as in Formation
+    # Invariant: _liveCols and _colSlot are int arrays of shape (_games,
+    #            cols); _numCols is an int array of length _games
+    #
+    # Attribute _time, _step, _random, _switch, _speed: the timers, the
+    #            firing countdown, the marching direction and the speed of
+    #            each formation, as in WaveCore
+    # Invariant: arrays of length _games
+    #
+    # Attribute _bossSwitch, _bossTime, _bossShootTime, _bossBoltCount: the
+    #            boss timers of each game, as in WaveCore
+    # Invariant: arrays of length _games
+    #
+    # Attribute _frames: the number of steps of the current wave of each game
+    # Invariant: _frames is an int array of length _games, >= 0
+    #
+    # Attribute _lastScore, _lastLives, _lastFrames, _lastWon: the result of
+    #            the last finished wave of each game
+    # Invariant: int, int, int and bool arrays of length _games; 0, 0, 0 and
+    #            False for games that have not finished a wave
+
+    def getGames(self):
+        """Returns the number of games in the batch"""
+        return self._games
+
+
+    def getSeeds(self):
+        """Returns a copy of the seeds of the current wave of every game"""
+        return self._seeds.copy()
+
+
+    def getWaves(self):
+        """Returns a copy of the number of waves every game has finished"""
+        return self._waves.copy()
+
+
+    def getFrames(self):
+        """Returns a copy of the number of steps in the current wave of every game"""
+        return self._frames.copy()
+
+
+    def getLastScores(self):
+        """Returns a copy of the final score of the last finished wave of every game"""
+        return self._lastScore.copy()
+
+
+    def getLastLives(self):
+        """Returns a copy of the lives left at the end of the last finished wave of every game"""
+        return self._lastLives.copy()
+
+
+    def getLastFrames(self):
+        """Returns a copy of the length in steps of the last finished wave of every game"""
+        return self._lastFrames.copy()
+
+
+    def getLastWon(self):
+        """Returns a copy of whether the last finished wave of every game was won"""
+        return self._lastWon.copy()
+
+
+    def getCapacity(self):
+        """Returns the number of bolts each game has room for"""
+        return self.boltOn.shape[1]
+
+
+    def count(self):
+        """Returns a copy of the number of live aliens in every game"""
+        return self._live.copy()
+
+
+    def alienX(self):
+        """Returns the x-coordinates of every alien, an array of shape (games, cols)"""
+        return self.formX[:, None] + self._colOff
+
+
+    def alienY(self):
+        """Returns the y-coordinates of every alien, an array of shape (games, rows)"""
+        return self.formY[:, None] + self._rowOff
+
+
+    def __init__(self, games, seed=0, capacity=16):
+        """
+        Initializes a batch of games, each at the start of its first wave.
+
+        This fails in stress mode, whose rules (several player bolts, alien
+        volleys) WaveBatch does not play.
+
+        Parameter games: the number of games to play at once
+        Precondition: games is an int > 0
+
+        Parameter seed: the seed of the first wave of game 0
+        Precondition: seed is an int
+
+        Parameter capacity: the number of bolts each game has room for at first
+        Precondition: capacity is an int > 0
+        """
+        assert not STRESS_MODE, "WaveBatch does not play the rules of stress mode"
+        assert isinstance(games, int) and games > 0, "%s is not a valid batch size" % repr(games)
+        assert isinstance(seed, int), "%s is not a valid seed" % repr(seed)
+        assert isinstance(capacity, int) and capacity > 0
+        self._games = games
+        self._seed = seed
+        self._start = Formation(ALIEN_ROWS, ALIENS_IN_ROW)
+        rows, cols = self._start.getShape()
+        self._colOff = self._start.x[0] - self._start.x[0, 0]
+        self._rowOff = self._start.y[:, 0] - self._start.y[0, 0]
+        self._kind = self._start.kind
+
+        self.formX = np.zeros(games)
+        self.formY = np.zeros(games)
+        self.alive = np.zeros((games, rows, cols), dtype=bool)
+        self.hp = np.zeros((games, rows, cols), dtype=np.int16)
+        self._live = np.zeros(games, dtype=int)
+        self._rowCount = np.zeros((games, rows), dtype=int)
+        self._colCount = np.zeros((games, cols), dtype=int)
+        self._liveCols = np.zeros((games, cols), dtype=int)
+        self._colSlot = np.zeros((games, cols), dtype=int)
+        self._numCols = np.zeros(games, dtype=int)
+
+        self.shipX = np.zeros(games)
+        self.shipOn = np.zeros(games, dtype=bool)
+        self.lives = np.zeros(games, dtype=int)
+        self.score = np.zeros(games, dtype=int)
+
+        self.boltX = np.zeros((games, capacity))
+        self.boltY = np.zeros((games, capacity))
+        self.boltV = np.zeros((games, capacity))
+        self.boltOwner = np.zeros((games, capacity), dtype=np.int8)
+        self.boltOn = np.zeros((games, capacity), dtype=bool)
+
+        self._time = np.zeros(games)
+        self._step = np.zeros(games, dtype=int)
+        self._random = np.zeros(games, dtype=int)
+        self._switch = np.zeros(games, dtype=bool)
+        self._speed = np.zeros(games)
+
+        self.bossOn = np.zeros(games, dtype=bool)
+        self.bossX = np.zeros(games)
+        self.bossY = np.zeros(games)
+        self.bossHp = np.zeros(games, dtype=int)
+        self._bossSwitch = np.zeros(games, dtype=bool)
+        self._bossTime = np.zeros(games)
+        self._bossShootTime = np.zeros(games)
+        self._bossBoltCount = np.zeros(games, dtype=int)
+
+        self._frames = np.zeros(games, dtype=int)
+        self._seeds = np.zeros(games, dtype=np.int64)
+        self._waves = np.zeros(games, dtype=int)
+        self._rngs = [None] * games
+        self._lastScore = np.zeros(games, dtype=int)
+        self._lastLives = np.zeros(games, dtype=int)
+        self._lastFrames = np.zeros(games, dtype=int)
+        self._lastWon = np.zeros(games, dtype=bool)
+        self.reset(np.arange(games))
+
+
+    def reset(self, games):
+        """
+        Starts a new wave in the given games.
+
+        The new wave of game i is seeded from the number of waves game i has
+        finished (see the class specification).
+
+        Parameter games: the games to restart
+        Precondition: games is an int array of game indices
+        """
+        games = np.asarray(games, dtype=int)
+        if len(games) == 0:
+            return
+        cols = self._colCount.shape[1]
+        self._seeds[games] = self._seed + games + self._waves[games] * self._games
+        self.formX[games] = self._start.x[0, 0]
+        self.formY[games] = self._start.y[0, 0]
+        self.alive[games] = True
+        self.hp[games] = ALIEN_HEALTH
+        self._live[games] = self.alive[0].size
+        self._rowCount[games] = cols
+        self._colCount[games] = self._rowCount.shape[1]
+        self._liveCols[games] = np.arange(cols)
+        self._colSlot[games] = np.arange(cols)
+        self._numCols[games] = cols
+
+        self.shipX[games] = GAME_WIDTH/2
+        self.shipOn[games] = True
+        self.lives[games] = SHIP_LIVES
+        self.score[games] = 0
+        self.boltOn[games] = False
+
+        self._time[games] = 0
+        self._step[games] = 0
+        self._switch[games] = True
+        self._speed[games] = ALIEN_SPEED
+
+        self.bossOn[games] = False
+        self._bossSwitch[games] = True
+        self._bossTime[games] = 0
+        self._bossShootTime[games] = 0
+        self._bossBoltCount[games] = 0
+        self._frames[games] = 0
+        for g in games.tolist():
+            self._rngs[g] = random.Random(int(self._seeds[g]))
+            self._random[g] = self._rngs[g].randint(1,BOLT_RATE)
+
+
+    def step(self, actions, dt):
+        """
+        Advances every game by one animation frame.
+
+        The frame follows WaveCore.step: the ships move and fire, the aliens
+        fire and march, the bolts move, the collisions are resolved and the
+        boss alien moves and shoots. Games that are over afterwards are
+        recorded (see getLastScores) and restarted.
+
+        Returns a bool array saying which games finished a wave this frame.
+
+        Parameter actions: the keys held down in each game
+        Precondition: actions is an int array of length games, each entry a
+        combination of INPUT_LEFT, INPUT_RIGHT and INPUT_FIRE
+
+        Parameter dt: the time step of the frame
+        Precondition: dt is a float > 0
+        """
+        actions = np.asarray(actions)
+        assert actions.shape == (self._games,), "%s is not one action per game" % repr(actions)
+        assert isinstance(dt, float) and dt > 0
+        self._moveShips(actions)
+        self._alienFire()
+        self._alienMovement(dt)
+        self._moveBolts()
+        self._alienCollision()
+        self._shipCollision()
+        spawn = (self._live == 0) & ~self.bossOn
+        if spawn.any():
+            self.bossOn[spawn] = True
+            self.bossX[spawn] = GAME_WIDTH / 2
+            self.bossY[spawn] = GAME_HEIGHT - 100
+            self.bossHp[spawn] = BOSS_HEALTH
+        if self.bossOn.any():
+            boss = self.bossOn.copy()
+            self._bossMovement(boss, dt)
+            self._bossCollision(boss)
+            self._bossShoot(dt)
+        self._frames += 1
+
+        done = self.isComplete()
+        if done.any():
+            over = np.flatnonzero(done)
+            self._lastScore[over] = self.score[over]
+            self._lastLives[over] = self.lives[over]
+            self._lastFrames[over] = self._frames[over]
+            self._lastWon[over] = self.isWon()[over]
+            self._waves[over] += 1
+            self.reset(over)
+        return done
+
+
+    def isComplete(self):
+        """
+        Returns a bool array saying which games are over, won or lost.
+
+        As in WaveCore.isComplete, a game is lost if the ship has no lives
+        left or an alien has reached the defense line, and won once all its
+        aliens and its boss are destroyed.
+        """
+        lowest = self._rowCount.shape[1] - 1 - \
+            np.argmax(self._rowCount[:, ::-1] > 0, axis=1)
+        low = self.formY + self._rowOff[lowest] - ALIEN_HEIGHT/2 <= DEFENSE_LINE
+        reached = np.where(self.bossOn,
+                           self.bossY - ALIEN_HEIGHT/2 <= DEFENSE_LINE,
+                           (self._live > 0) & low)
+        return (self.lives == 0) | reached | self.isWon()
+
+
+    def isWon(self):
+        """
+        Returns a bool array saying which games have destroyed all their
+        aliens and their boss alien.
+        """
+        return (self._live == 0) & ~self.bossOn
+
+
+    # HIDDEN METHODS
+    def _addBolts(self, games, x, y, velocity, owner):
+        """
+        Adds one bolt to each of the given games, in its first free slot.
+
+        Parameter games: the games to add a bolt to
+        Precondition: games is an int array of distinct game indices
+
+        Parameter x, y: the centers of the new bolts
+        Precondition: x and y are float arrays of the same length as games
+
+        Parameter velocity: the velocity of the new bolts
+        Precondition: velocity is BOLT_SPEED or -BOLT_SPEED
+
+        Parameter owner: who fired the new bolts
+        Precondition: owner is BOLT_PLAYER or BOLT_ALIEN
+        """
+        if len(games) == 0:
+            return
+        if self.boltOn[games].all(axis=1).any():
+            self._grow()
+        slot = np.argmin(self.boltOn[games], axis=1)
+        self.boltX[games, slot] = x
+        self.boltY[games, slot] = y
+        self.boltV[games, slot] = velocity
+        self.boltOwner[games, slot] = owner
+        self.boltOn[games, slot] = True
+
+
+    def _grow(self):
+        """
+        Doubles the number of bolts each game has room for.
+        """
+        for name in ('boltX', 'boltY', 'boltV', 'boltOwner', 'boltOn'):
+            old = getattr(self, name)
+            new = np.zeros((old.shape[0], 2 * old.shape[1]), dtype=old.dtype)
+            new[:, :old.shape[1]] = old
+            setattr(self, name, new)
+
+
+    def _playerBolts(self):
+        """
+        Returns a bool array of shape (games, capacity) marking player bolts.
+        """
+        return self.boltOn & (self.boltOwner == BOLT_PLAYER)
+
+
+    def _moveShips(self, actions):
+        """
+        Moves the ships and fires a player bolt in every game that asks for
+        one and has none on the screen.
+
+        Parameter actions: the keys held down in each game
+        Precondition: actions is an int array of length games
+        """
+        right = self.shipOn & (actions & INPUT_RIGHT != 0) & \
+            (self.shipX + SHIP_MOVEMENT + SHIP_WIDTH/2 <= GAME_WIDTH)
+        self.shipX[right] += SHIP_MOVEMENT
+        left = self.shipOn & (actions & INPUT_LEFT != 0) & \
+            (self.shipX - SHIP_MOVEMENT - SHIP_WIDTH/2 >= 0)
+        self.shipX[left] -= SHIP_MOVEMENT
+        fire = np.flatnonzero(self.shipOn & (actions & INPUT_FIRE != 0) &
+                              ~self._playerBolts().any(axis=1))
+        self._addBolts(fire, self.shipX[fire],
+                       np.full(len(fire), SHIP_BOTTOM + SHIP_HEIGHT + BOLT_HEIGHT/2),
+                       BOLT_SPEED, BOLT_PLAYER)
+
+
+    def _alienFire(self):
+        """
+        Fires a bolt from a random column in every game whose countdown is up.
+
+        As in WaveCore.ChooseAlien, the column is drawn from the game's own
+        generator, so only the games that fire are looked at one by one.
+        """
+        due = np.flatnonzero((self._step == self._random) & (self._live > 0))
+        if len(due) == 0:
+            return
+        cols = np.zeros(len(due), dtype=int)
+        for k, g in enumerate(due.tolist()):
+            rng = self._rngs[g]
+            cols[k] = self._liveCols[g, rng.randint(0,int(self._numCols[g])-1)]
+            self._random[g] = rng.randint(1,BOLT_RATE)
+        rows = self.alive.shape[1] - 1 - \
+            np.argmax(self.alive[due, ::-1, cols], axis=1)
+        self._step[due] = 0
+        self._addBolts(due, self.formX[due] + self._colOff[cols],
+                       self.formY[due] + self._rowOff[rows] - ALIEN_HEIGHT/2 - BOLT_HEIGHT/2,
+                       -BOLT_SPEED, BOLT_ALIEN)
+
+
+    def _alienMovement(self, dt):
+        """
+        Marches the formation of every game with aliens left.
+
+        Parameter dt: the time step of the frame
+        Precondition: dt is a float > 0
+        """
+        some = self._live > 0
+        self._time[some] += dt
+        due = some & (self._time > self._speed)
+        if not due.any():
+            return
+        self._step[due] += 1
+        self._time[due] = 0
+        full = self._colCount > 0
+        cols = full.shape[1]
+        right = self.formX + self._colOff[cols - 1 - np.argmax(full[:, ::-1], axis=1)]
+        left = self.formX + self._colOff[np.argmax(full, axis=1)]
+        east = due & self._switch
+        west = due & ~self._switch
+        goRight = east & (right + ALIEN_H_WALK + ALIEN_WIDTH/2 < GAME_WIDTH)
+        goLeft = west & (left - ALIEN_H_WALK - ALIEN_WIDTH/2 > 0)
+        down = (east & ~goRight) | (west & ~goLeft)
+        self.formX[goRight] += ALIEN_H_WALK
+        self.formX[goLeft] -= ALIEN_H_WALK
+        self.formY[down] -= ALIEN_V_WALK
+        self._switch[down] = ~self._switch[down]
+
+
+    def _moveBolts(self):
+        """
+        Moves every bolt by its velocity and frees the slots of the bolts
+        that have left the screen.
+        """
+        self.boltY += self.boltV
+        gone = (self.boltY <= -BOLT_HEIGHT/2) | (self.boltY >= GAME_HEIGHT + BOLT_HEIGHT/2)
+        self.boltOn &= ~gone
+
+
+    def _alienCollision(self):
+        """
+        Resolves the player bolt of every game against its formation.
+
+        A game has at most one player bolt, which is swept along its path
+        this step and hits the first live alien it reaches, in row order if
+        it reaches several at once (see Formation.collide).
+        """
+        player = self._playerBolts()
+        games = np.flatnonzero(player.any(axis=1) & (self._live > 0))
+        if len(games) == 0:
+            return
+        slot = np.argmax(player[games], axis=1)
+        bx = self.boltX[games, slot]
+        by = self.boltY[games, slot]
+        bv = self.boltV[games, slot]
+        inX = np.abs(self.formX[games, None] + self._colOff - bx[:, None]) < \
+            (BOLT_WIDTH + ALIEN_WIDTH)/2
+        whenY = sweep(by[:, None], bv[:, None], self.formY[games, None] + self._rowOff,
+                      (BOLT_HEIGHT + ALIEN_HEIGHT)/2)
+        when = np.where(self.alive[games] & inX[:, None, :], whenY[:, :, None], np.inf)
+        flat = when.reshape(len(games), -1)
+        first = np.argmin(flat, axis=1)
+        hit = flat[np.arange(len(games)), first] < np.inf
+        games, slot = games[hit], slot[hit]
+        if len(games) == 0:
+            return
+        row, col = np.divmod(first[hit], self.alive.shape[2])
+        self.boltOn[games, slot] = False
+        self._speed[games] *= ALIEN_SPEED_ADJUSTMENT_FACTOR
+        self.hp[games, row, col] -= 1
+        dead = self.hp[games, row, col] <= 0
+        games, row, col = games[dead], row[dead], col[dead]
+        self.alive[games, row, col] = False
+        self.score[games] += _SCORES[self._kind[row, col]]
+        self._live[games] -= 1
+        self._rowCount[games, row] -= 1
+        self._colCount[games, col] -= 1
+        empty = self._colCount[games, col] == 0
+        self._dropColumns(games[empty], col[empty])
+
+
+    def _dropColumns(self, games, cols):
+        """
+        Removes an emptied column from the live columns of each given game.
+
+        This is Formation._dropColumn, once per game.
+
+        Parameter games: the games that emptied a column
+        Precondition: games is an int array of distinct game indices
+
+        Parameter cols: the column emptied in each of those games
+        Precondition: cols is an int array of the same length as games
+        """
+        if len(games) == 0:
+            return
+        self._numCols[games] -= 1
+        num = self._numCols[games]
+        slot = self._colSlot[games, cols]
+        last = self._liveCols[games, num]
+        self._liveCols[games, slot] = last
+        self._colSlot[games, last] = slot
+        self._liveCols[games, num] = cols
+        self._colSlot[games, cols] = num
+
+
+    def _shipCollision(self):
+        """
+        Resolves the alien bolts of every game against its ship.
+
+        Every alien bolt whose path this step crosses a ship costs a life. A
+        ship hit by more bolts than it has lives left is destroyed.
+        """
+        overlap = self.boltOn & (self.boltOwner == BOLT_ALIEN) & \
+            self.shipOn[:, None] & \
+            (np.abs(self.boltX - self.shipX[:, None]) < (SHIP_WIDTH + BOLT_WIDTH)/2) & \
+            (sweep(self.boltY, self.boltV, SHIP_BOTTOM + SHIP_HEIGHT/2,
+                   (SHIP_HEIGHT + BOLT_HEIGHT)/2) < np.inf)
+        hits = np.count_nonzero(overlap, axis=1)
+        if not hits.any():
+            return
+        self.boltOn &= ~overlap
+        self.shipOn &= hits <= self.lives
+        self.lives = np.maximum(self.lives - hits, 0)
+
+
+    def _bossMovement(self, games, dt):
+        """
+        Moves the boss alien of the given games, as in WaveCore.BossAlienMovement.
+
+        Parameter games: which games move their boss
+        Precondition: games is a bool array of length games
+
+        Parameter dt: the time step of the frame
+        Precondition: dt is a float > 0
+        """
+        self._bossTime[games] += dt
+        due = games & (self._bossTime > BOSS_ALIEN_SPEED)
+        self._bossTime[due] = 0
+        east = due & self._bossSwitch
+        west = due & ~self._bossSwitch
+        goRight = east & (self.bossX + BOSS_ALIEN_H_WALK + ALIEN_WIDTH/2 < GAME_WIDTH)
+        goLeft = west & (self.bossX - BOSS_ALIEN_H_WALK - ALIEN_WIDTH/2 > 0)
+        down = (east & ~goRight) | (west & ~goLeft)
+        self.bossX[goRight] += BOSS_ALIEN_H_WALK
+        self.bossX[goLeft] -= BOSS_ALIEN_H_WALK
+        self.bossY[down] -= BOSS_ALIEN_V_WALK
+        self._bossSwitch[down] = ~self._bossSwitch[down]
+
+
+    def _bossCollision(self, games):
+        """
+        Resolves the player bolt of the given games against their boss.
+
+        Parameter games: which games check their boss
+        Precondition: games is a bool array of length games
+        """
+        overlap = self._playerBolts() & games[:, None] & \
+            (np.abs(self.boltX - self.bossX[:, None]) < (ALIEN_WIDTH + BOLT_WIDTH)/2) & \
+            (sweep(self.boltY, self.boltV, self.bossY[:, None],
+                   (ALIEN_HEIGHT + BOLT_HEIGHT)/2) < np.inf)
+        hit = overlap.any(axis=1)
+        if not hit.any():
+            return
+        self.boltOn &= ~overlap
+        self.bossHp[hit] -= 1
+        dead = hit & (self.bossHp <= 0)
+        self.bossOn[dead] = False
+        self.score[dead] += BOSS_SCORE
+
+
+    def _bossShoot(self, dt):
+        """
+        Fires the bolts of every boss alien, as in WaveCore.BossAlienShoot.
+
+        Parameter dt: the time step of the frame
+        Precondition: dt is a float > 0
+        """
+        games = self.bossOn
+        self._bossShootTime[games] += dt
+        again = games & (self._bossShootTime >= 4)
+        self._bossShootTime[again] = 0
+        self._bossBoltCount[again] = 0
+        fire = np.flatnonzero(games & (self._bossBoltCount < 3) &
+                              (self._bossShootTime >= self._bossBoltCount * 0.2))
+        self._bossBoltCount[fire] += 1
+        self._addBolts(fire, self.bossX[fire], self.bossY[fire] - ALIEN_HEIGHT/2,
+                       -BOLT_SPEED, BOLT_ALIEN)
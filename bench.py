@@ -0,0 +1,232 @@
+"""
+Micro-benchmarks for Alien Invaders
+
+This module times the hot paths of a wave one at a time, on waves of many
+sizes. Each case is measured on every formation size in the matrix, and the
+cases that touch the bolts also on every number of bolts. Formations may be
+much larger than the command line of the game allows (see consts.py); the
+aliens that do not fit on the screen are simply off it.
+
+The benchmarks run on WaveCore (see core.py), which holds all the rules of a
+wave, so they never open a window. WaveCore.step is everything Wave.update
+does except reading the keyboard, so it stands in for Wave.update, and
+creating a WaveCore stands in for creating a Wave.
+
+Each call is timed on its own with time.perf_counter_ns. Before every call
+the wave is put back in the same state (see WaveCore.restore), outside of
+the timed part, so a call that kills an alien or a bolt does not change what
+the next call sees. The result of a case is a dictionary with the number of
+calls per second, the mean and percentiles of the time per call in
+microseconds, and the bytes allocated per call (the peak of the memory
+traced by tracemalloc during the call, averaged over a few calls).
+
+To run the whole matrix from the command line, use
+
+    python bench.py --sizes 5x12,10x15,40x60 --bolts 1,100,500
+
+which prints one line of JSON per case and size as it is measured.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+from consts import *
+from core import WaveCore, Formation
+import numpy as np
+import gc
+import time
+import tracemalloc
+
+# PRIMARY RULE: This module may only access consts.py and core.py. It must never import
+# kivy, game2d, models, wave or app, or it can no longer run without a window.
+
+# The formation sizes measured by default, as pairs (rows, cols)
+SIZES = [(5, 12), (10, 15), (20, 30), (40, 60)]
+
+# The numbers of bolts on screen measured by default
+BOLTS = [1, 10, 100, 500]
+
+# The time step passed to AlienMovement, long enough that the aliens march on every call
+_MARCH_TIME = float(ALIEN_SPEED) + GAME_FRAME_TIME
+
+
+class BenchWave(WaveCore):
+    """
+    A wave with a formation of any size, for benchmarking.
+    """
+    # HIDDEN ATTRIBUTES (in addition to those of WaveCore):
+    # Attribute _shape: the size of the formation
+    # Invariant: _shape is a pair (rows, cols) of ints > 0
+
+    def __init__(self, rows, cols, seed=0):
+        """
+        Initializes a wave with a full formation of rows by cols aliens.
+
+        Parameter rows, cols: the size of the formation
+        Precondition: rows and cols are ints > 0
+
+        Parameter seed: the seed of the wave
+        Precondition: seed is an int
+        """
+        self._shape = (rows, cols)
+        super().__init__(seed)
+
+
+    def createAlien(self):
+        """
+        Returns a full formation of the size given to the constructor.
+        """
+        return Formation(*self._shape)
+
+
+    def addBolts(self, count, seed=0):
+        """
+        Scatters count bolts over the screen, alternating player and alien bolts.
+
+        Parameter count: the number of bolts to add
+        Precondition: count is an int >= 0
+
+        Parameter seed: the seed for placing the bolts
+        Precondition: seed is an int
+        """
+        rng = np.random.default_rng(seed)
+        xs = rng.uniform(0, GAME_WIDTH, count).tolist()
+        ys = rng.uniform(0, GAME_HEIGHT, count).tolist()
+        bolts = self.getBoltBuffer()
+        for i in range(count):
+            if i % 2 == 0:
+                bolts.add(xs[i], ys[i], BOLT_SPEED, BOLT_PLAYER)
+            else:
+                bolts.add(xs[i], ys[i], -BOLT_SPEED, BOLT_ALIEN)
+
+
+# The cases, each a pair (function, bolts) of the call to time and whether it
+# depends on the number of bolts. The function is called with a BenchWave.
+CASES = {
+    'step': (lambda wave: wave.step(INPUT_FIRE, GAME_FRAME_TIME), True),
+    'AlienMovement': (lambda wave: wave.AlienMovement(_MARCH_TIME), False),
+    'ExtremeX': (lambda wave: wave.ExtremeX(), False),
+    'AlienCollison': (lambda wave: wave.AlienCollison(), True),
+    'ShipCollison': (lambda wave: wave.ShipCollison(), True),
+    'BoltLoop': (lambda wave: wave.BoltLoop(), True),
+    'ChooseAlien': (lambda wave: wave.ChooseAlien(), False),
+    'createAlien': (lambda wave: wave.createAlien(), False),
+    'init': (lambda wave: BenchWave(*wave.getFormation().getShape()), False),
+}
+
+
+def measure(case, rows, cols, bolts=0, repeat=1000, traced=20):
+    """
+    Times one case on a wave of the given size and returns the result.
+
+    The result is a dictionary with the case, rows, cols and bolts, and
+    'calls' (the number of calls timed), 'opsPerSec', 'mean', 'p50', 'p99'
+    and 'max' (in microseconds) and 'allocBytes'.
+
+    Parameter case: the name of the case
+    Precondition: case is a key of CASES
+
+    Parameter rows, cols: the size of the formation
+    Precondition: rows and cols are ints > 0
+
+    Parameter bolts: the number of bolts on screen
+    Precondition: bolts is an int >= 0
+
+    Parameter repeat: the number of calls to time
+    Precondition: repeat is an int > 0
+
+    Parameter traced: the number of calls to trace for allocations
+    Precondition: traced is an int > 0
+    """
+    assert case in CASES, "%s is not a benchmark" % repr(case)
+    assert isinstance(repeat, int) and repeat > 0
+    function = CASES[case][0]
+    wave = BenchWave(rows, cols)
+    wave.addBolts(bolts)
+    start = wave.snapshot()
+    times = np.zeros(repeat, dtype=np.int64)
+    clock = time.perf_counter_ns
+    function(wave)
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(repeat):
+            wave.restore(start)
+            before = clock()
+            function(wave)
+            times[i] = clock() - before
+    finally:
+        if enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    total = 0
+    for i in range(traced):
+        wave.restore(start)
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        function(wave)
+        total += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    micro = times / 1000.0
+    mean = float(micro.mean())
+    return {'case': case, 'rows': rows, 'cols': cols, 'bolts': bolts,
+            'calls': repeat, 'opsPerSec': round(1e6 / mean, 1),
+            'mean': round(mean, 3),
+            'p50': round(float(np.percentile(micro, 50)), 3),
+            'p99': round(float(np.percentile(micro, 99)), 3),
+            'max': round(float(micro.max()), 3),
+            'allocBytes': total // traced}
+
+
+def runMatrix(cases=None, sizes=SIZES, bolts=BOLTS, repeat=1000):
+    """
+    Times every case on every size, yielding each result as it is measured.
+
+    The cases that do not depend on the bolts are measured once per size,
+    with no bolts on screen.
+
+    Parameter cases: the names of the cases
+    Precondition: cases is None (every case) or a list of keys of CASES
+
+    Parameter sizes: the formation sizes
+    Precondition: sizes is a list of pairs (rows, cols) of ints > 0
+
+    Parameter bolts: the numbers of bolts
+    Precondition: bolts is a list of ints >= 0
+
+    Parameter repeat: the number of calls to time in each measurement
+    Precondition: repeat is an int > 0
+    """
+    for case in (list(CASES) if cases is None else cases):
+        for rows, cols in sizes:
+            for count in (bolts if CASES[case][1] else [0]):
+                yield measure(case, rows, cols, count, repeat)
+
+
+# HIDDEN FUNCTIONS
+def _main():
+    """
+    Runs the benchmarks from the command line, printing results as JSON lines.
+    """
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description='Time the hot paths of Alien Invaders')
+    parser.add_argument('--cases', default=','.join(CASES),
+                        help='comma separated, from: ' + ', '.join(CASES))
+    parser.add_argument('--sizes', default=','.join('%dx%d' % size for size in SIZES),
+                        help='comma separated formation sizes, as ROWSxCOLS')
+    parser.add_argument('--bolts', default=','.join(map(str, BOLTS)),
+                        help='comma separated numbers of bolts')
+    parser.add_argument('--repeat', type=int, default=1000, help='calls per measurement')
+    args = parser.parse_args()
+
+    cases = args.cases.split(',')
+    sizes = [tuple(int(n) for n in size.split('x')) for size in args.sizes.split(',')]
+    bolts = [int(n) for n in args.bolts.split(',')]
+    for result in runMatrix(cases, sizes, bolts, args.repeat):
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == '__main__':
+    _main()
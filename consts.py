@@ -8,7 +8,6 @@ we separate the constants into their own module. This allows all modules to acce
 # YOUR NAME(S) AND NETID(S) HERE
 # DATE COMPLETED HERE
 """
-import introcs
 import sys
 
 ### WINDOW CONSTANTS (all coordinates are in pixels) ###
@@ -17,6 +16,12 @@ import sys
 GAME_WIDTH  = 800
 #: the height of the game display
 GAME_HEIGHT = 700
+#: the number of fixed simulation steps per second (independent of the frame rate)
+GAME_TICKRATE = 60
+#: the most simulation steps to catch up on in a single frame
+GAME_MAX_STEPS = 5
+#: True to time the phases of every frame and show them on screen (see game2d/profiler.py)
+GAME_PROFILE = False
 
 
 ### SHIP CONSTANTS ###
@@ -63,6 +68,8 @@ ALIENS_IN_ROW  = 12
 ALIEN_IMAGES   = ('alien1.png','alien2.png','alien3.png','AlienBoss.png')
 # the number of seconds (float <= 1) between alien steps
 ALIEN_SPEED = 1
+# the number of hits it takes to destroy an alien
+ALIEN_HEALTH = 1
 
 
 ### BOLT CONSTANTS ###
@@ -75,6 +82,40 @@ BOLT_HEIGHT = 16
 BOLT_SPEED  = 10
 # the number of ALIEN STEPS (not frames) between bolts
 BOLT_RATE   = 5
+# the color of a laser bolt
+BOLT_COLOR  = 'red'
+# the most unused bolts kept around for reuse (see BoltPool in models.py)
+BOLT_POOL_SIZE = 64
+# the number of bolts the bolt buffer has room for at first (see core.py)
+BOLT_CAPACITY = 64
+# the owner of a bolt fired by the player ship
+BOLT_PLAYER = 0
+# the owner of a bolt fired by an alien (or the boss)
+BOLT_ALIEN  = 1
+
+
+### COLLISION CONSTANTS ###
+
+# the size in pixels of a cell of the collision grid (see spatial.py)
+GRID_CELL_SIZE = 64
+# below this many (player bolt, alien) pairs, every pair is tested directly
+GRID_MIN_PAIRS = 4096
+# below this many bolts, the ship and the boss test every bolt instead of looking in the
+# collision grid, and they only ever use a grid already built for the aliens that step
+GRID_MIN_BOLTS = 32768
+# up to this many bolts, a collision check looks at the bolts one at a time, which is
+# cheaper than setting up NumPy arrays for them
+FEW_BOLTS = 8
+
+
+### HEADLESS CONSTANTS ###
+
+# the most frames a headless game is played before it is called off
+GAME_FRAME_LIMIT = 36000
+# the time step of a headless frame, in seconds
+GAME_FRAME_TIME = 1/60
+# the number of alien bolts an environment observation describes (see env.py)
+ENV_ALIEN_BOLTS = 8
 
 
 ### GAME CONSTANTS ###
@@ -105,6 +146,43 @@ STATE_PREBOSS = 10
 
 BOSS_HEALTH = 6
 
+# the points for killing an alien, indexed by its position in ALIEN_IMAGES
+ALIEN_SCORES = (10, 7, 5, 10)
+
+# the points for killing the boss alien
+BOSS_SCORE = 50
+
+
+### INPUT CONSTANTS ###
+
+# the bit set in an input mask when the ship moves left
+INPUT_LEFT  = 1
+# the bit set in an input mask when the ship moves right
+INPUT_RIGHT = 2
+# the bit set in an input mask when the ship fires
+INPUT_FIRE  = 4
+# the bit set in a recorded input mask when the game was paused (see replay.py)
+INPUT_PAUSE = 8
+
+
+### REPLAY CONSTANTS ###
+
+# the file every wave is recorded to (replacing the last one), or None to not record
+REPLAY_FILE = None
+
+
+### PROFILING CONSTANTS ###
+
+# the file the timing of each phase of every wave is appended to when the wave ends (one
+# line of JSON per wave), or None to not time the waves
+WAVE_STATS_FILE = None
+# the file a record of every frame is streamed to while the game runs (as CSV if the name
+# ends in .csv, and as lines of JSON otherwise), or None to not log the frames
+METRICS_FILE = None
+# where the frames drawn to the window are recorded (a directory of PNG files, or a file of
+# raw RGBA video if the name ends in .rgba), or None to not record them
+CAPTURE_PATH = None
+
 
 ### USE COMMAND LINE ARGUMENTS TO CHANGE NUMBER OF ALIENS IN A ROW"""
 """
@@ -115,26 +193,100 @@ everything after the word python. So if you start the game typing
 
 Python puts ['breakout.py', '3', '4', '0.5'] into sys.argv. Below, we take advantage of
 this fact to change the constants ALIEN_ROWS, ALIENS_IN_ROW, and ALIEN_SPEED.
+
+The word stress anywhere on the command line turns on stress mode (see STRESS_MODE), and
+words of the form name=value set the stress options. For example
+
+    python invaders stress 40 100 0.2 bolts=50 volley=10 rate=1
+
+Kivy reads the options that start with a dash, so these words do not have one. The
+first word that starts with a dash, and every word after it, are left alone here. Those
+are options for Kivy, or for the command line tools such as tournament.py and bench.py,
+so that for example
+
+    python tournament.py --games 3 --frames 200
+
+does not change the number of aliens.
 """
+# the words on the command line before the first option that starts with a dash
+_words = []
+for arg in sys.argv[1:]:
+    if arg.startswith('-'):
+        break
+    _words.append(arg)
+
+# the numbers on the command line, without the stress mode words
+_numbers = [arg for arg in _words if arg != 'stress' and '=' not in arg]
+
+# the stress options on the command line, as a dictionary from name to value
+_options = dict(arg.split('=', 1) for arg in _words if '=' in arg)
+
+#: True if the game lifts its limits to find out how far it scales
+STRESS_MODE = 'stress' in _words
+# the most rows of aliens allowed in stress mode
+STRESS_MAX_ROWS = 500
+# the most aliens per row allowed in stress mode
+STRESS_MAX_PER_ROW = 500
+# the most player bolts on screen at once (only ever more than 1 in stress mode)
+PLAYER_BOLTS = 1
+# the number of aliens that fire each time the formation fires
+ALIEN_VOLLEY = 1
+
 try:
-    rows = int(sys.argv[1])
-    if rows >= 1 and rows <= 10:
+    rows = int(_numbers[0])
+    if rows >= 1 and rows <= (STRESS_MAX_ROWS if STRESS_MODE else 10):
         ALIEN_ROWS = rows
 except:
     pass # Use original value
 
 try:
-    perrow = int(sys.argv[2])
-    if perrow >= 1 and perrow <= 15:
+    perrow = int(_numbers[1])
+    if perrow >= 1 and perrow <= (STRESS_MAX_PER_ROW if STRESS_MODE else 15):
         ALIENS_IN_ROW = perrow
 except:
     pass # Use original value
 
 try:
-    speed = float(sys.argv[3])
+    speed = float(_numbers[2])
     if speed >= 0 and speed <= 3:
         ALIEN_SPEED = speed
 except:
     pass # Use original value
 
+if STRESS_MODE:
+    try:
+        bolts = int(_options['bolts'])
+        if bolts >= 1:
+            PLAYER_BOLTS = bolts
+    except:
+        PLAYER_BOLTS = 64 # Use the default of stress mode
+
+    try:
+        volley = int(_options['volley'])
+        if volley >= 1:
+            ALIEN_VOLLEY = volley
+    except:
+        pass # Use original value
+
+    try:
+        rate = int(_options['rate'])
+        if rate >= 1:
+            BOLT_RATE = rate
+    except:
+        pass # Use original value
+
+    # Shrink the aliens (and the gaps between them) until the formation fits in the
+    # same share of the screen as the normal one: three quarters of the width, and
+    # half the height between the ceiling and the defense line.
+    _fit = min(1.0,
+               GAME_WIDTH*3/4 / (ALIENS_IN_ROW*(ALIEN_WIDTH+ALIEN_H_SEP)+ALIEN_H_SEP),
+               (GAME_HEIGHT-ALIEN_CEILING-DEFENSE_LINE)/2 / (ALIEN_ROWS*(ALIEN_HEIGHT+ALIEN_V_SEP)))
+    ALIEN_WIDTH  = ALIEN_WIDTH*_fit
+    ALIEN_HEIGHT = ALIEN_HEIGHT*_fit
+    ALIEN_H_SEP  = ALIEN_H_SEP*_fit
+    ALIEN_V_SEP  = ALIEN_V_SEP*_fit
+    ALIEN_H_WALK = max(1, ALIEN_WIDTH // 4)
+    ALIEN_V_WALK = max(1, ALIEN_HEIGHT // 2)
+
+
 ### ADD MORE CONSTANTS (PROPERLY COMMENTED) AS NECESSARY ###
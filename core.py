@@ -0,0 +1,2060 @@
+"""
+Headless simulation core for Alien Invaders
+
+This module contains the rules of a single wave of Alien Invaders with none of
+the drawing. The class WaveCore keeps the ship, the aliens, the boss and the
+laser bolts as plain Python data, and advances them from an input bitmask and
+a time step. It never imports kivy (or game2d), so it can be stepped hundreds
+of thousands of times a second for load testing, or driven by a bot.
+
+The alien formation is stored as a struct of NumPy arrays (see Formation), so
+marching it, finding its edges and checking which aliens are alive are single
+vectorized operations, whatever the size of the formation.
+
+The laser bolts are kept the same way, in a growable buffer of arrays (see
+BoltBuffer). Moving every bolt is one vectorized add, and removing a bolt
+takes O(1) time.
+
+Collisions are swept: a bolt is tested along the whole path it travelled in
+the step (see sweep), not only where it ended up. A bolt that hits several
+targets hits the one it reaches first. This way a bolt can never pass
+through a target between two frames, however fast it moves or however long
+the time step is.
+
+The class Wave in wave.py is a subclass of WaveCore. It adds the GImage and
+GRectangle sprites that draw the wave on the screen, and syncs them from the
+data in this module at draw time.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+from consts import *
+from spatial import SpatialHash
+import numpy as np
+import random
+import time
+
+# PRIMARY RULE: This module may only access consts.py and spatial.py. It must never import
+# kivy, game2d, models, wave or app, or it can no longer run without a window.
+
+# The points for each type of alien, for adding up a batch of kills at once
+_SCORES = np.array(ALIEN_SCORES)
+
+
+def sweep(y, vy, targetY, reach):
+    """
+    Returns when bolts moving in the y direction first touch their targets.
+
+    A bolt that ends the step at y has moved there from y - vy. It touches a
+    target while its center is less than reach from targetY, so it hits the
+    target this step if the segment it travelled comes that close. The time
+    of impact is the fraction of the step at which it first does: 0 if the
+    bolt already touched the target at the start of the step, and up to 1
+    if it only touches it at the end. It is inf if the bolt missed.
+
+    Only the y direction is swept, as bolts never move sideways. The caller
+    must still check that the bolt and the target overlap in x.
+
+    Parameter y, vy: the end positions and velocities of the bolts
+    Precondition: y and vy are numbers or float arrays that broadcast with
+    targetY
+
+    Parameter targetY: the centers of the targets
+    Precondition: targetY is a number or float array
+
+    Parameter reach: half the height of a bolt plus half that of a target
+    Precondition: reach is a number > 0
+    """
+    start = y - vy
+    gap = np.abs(targetY - start) - reach
+    touch = (np.minimum(start, y) < targetY + reach) & \
+            (np.maximum(start, y) > targetY - reach)
+    speed = np.abs(vy)
+    time = np.maximum(gap, 0) / np.where(speed > 0, speed, 1)
+    return np.where(touch, time, np.inf)
+
+
+class ShipBody(object):
+    """
+    A class to represent the position of the player ship.
+
+    The ship only moves horizontally, so y never changes once it is set.
+    """
+    # ATTRIBUTES:
+    # Attribute x: the x-coordinate of the ship center
+    # Invariant: x is an int or float
+    #
+    # Attribute y: the y-coordinate of the ship center
+    # Invariant: y is an int or float
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x, y):
+        """
+        Initializes a ship at the given coordinates.
+
+        Precondition: x and y must be numbers (int or float).
+        """
+        self.x = x
+        self.y = y
+
+
+    def MoveRight(self):
+        """
+        Moves the ship right by SHIP_MOVEMENT, keeping it inside the game.
+        """
+        if self.x + SHIP_MOVEMENT + SHIP_WIDTH/2 <= GAME_WIDTH:
+            self.x += SHIP_MOVEMENT
+
+
+    def MoveLeft(self):
+        """
+        Moves the ship left by SHIP_MOVEMENT, keeping it inside the game.
+        """
+        if self.x - SHIP_MOVEMENT - SHIP_WIDTH/2 >= 0:
+            self.x -= SHIP_MOVEMENT
+
+
+class BossBody(object):
+    """
+    A class to represent the boss alien and its remaining health.
+    """
+    # ATTRIBUTES:
+    # Attribute x: the x-coordinate of the boss center
+    # Invariant: x is an int or float
+    #
+    # Attribute y: the y-coordinate of the boss center
+    # Invariant: y is an int or float
+    #
+    # Attribute health: the number of hits the boss can still take
+    # Invariant: health is an int
+    __slots__ = ('x', 'y', 'health')
+
+    def __init__(self, x, y, health):
+        """
+        Initializes a boss alien at the given coordinates.
+
+        Precondition: x and y must be numbers (int or float). health is an
+        int > 0
+        """
+        self.x = x
+        self.y = y
+        self.health = health
+
+
+    def hit(self):
+        """
+        Reduces the health of the boss alien by one.
+
+        Returns True if the boss alien is destroyed by this hit.
+        """
+        self.health -= 1
+        return self.health <= 0
+
+
+class Formation(object):
+    """
+    A class to represent the grid of aliens as a struct of arrays.
+
+    Every alien is a cell (row, col) in five NumPy arrays of the same shape:
+    its position, whether it is alive, its type and its hit points. Row 0 is
+    the top row. Dead aliens keep their cell (and keep moving with the rest
+    of the formation), but are ignored by every query.
+
+    The type of an alien is the index of its image in ALIEN_IMAGES. It decides
+    both the picture drawn for the alien and how many points it is worth.
+
+    The formation only ever moves as a whole, so all aliens in a column share
+    an x-coordinate and all aliens in a row share a y-coordinate. The
+    formation keeps count of the live aliens in every row and column, and
+    with them its left-most and right-most live columns and its lowest live
+    row. It also keeps the bottom-most live alien of every column, and a
+    list of the columns that are not empty. These are only updated when
+    aliens die, which makes the edges of the formation, the existence checks
+    and picking a random column to fire from all O(1). Code that changes
+    alive directly (rather than through hit or collide) must call recount
+    afterwards.
+    """
+    # ATTRIBUTES:
+    # Attribute x: the x-coordinates of the alien centers
+    # Invariant: x is a float array of shape (rows, cols)
+    #
+    # Attribute y: the y-coordinates of the alien centers
+    # Invariant: y is a float array of shape (rows, cols)
+    #
+    # Attribute alive: which aliens have not been destroyed
+    # Invariant: alive is a bool array of shape (rows, cols), and alive[r,c]
+    #            is True exactly when hp[r,c] > 0
+    #
+    # Attribute kind: the type of each alien
+    # Invariant: kind is an int8 array of shape (rows, cols), with values in
+    #            0..len(ALIEN_IMAGES)-1
+    #
+    # Attribute hp: the hits each alien can still take
+    # Invariant: hp is an int16 array of shape (rows, cols), >= 0
+    #
+    # HIDDEN ATTRIBUTES:
+    # Attribute _live: the number of live aliens
+    # Invariant: _live is an int >= 0, the number of True values in alive
+    #
+    # Attribute _rowCount: the number of live aliens in each row
+    # Invariant: _rowCount is an int array of length rows
+    #
+    # Attribute _colCount: the number of live aliens in each column
+    # Invariant: _colCount is an int array of length cols
+    #
+    # Attribute _left: the left-most column with a live alien
+    # Invariant: _left is an int, _colCount[_left] > 0 if _live > 0
+    #
+    # Attribute _right: the right-most column with a live alien
+    # Invariant: _right is an int, _colCount[_right] > 0 if _live > 0
+    #
+    # Attribute _lowest: the lowest (highest index) row with a live alien
+    # Invariant: _lowest is an int, _rowCount[_lowest] > 0 if _live > 0
+    #
+    # Attribute _bottom: the bottom-most live row of each column
+    # Invariant: _bottom is an int array of length cols; alive[_bottom[c],c]
+    #            is True and alive[r,c] is False for r > _bottom[c], for every
+    #            column c with _colCount[c] > 0
+    #
+    # Attribute _liveCols: the columns with a live alien, in no set order
+    # Invariant: _liveCols is an int array of length cols, and its first
+    #            _numCols entries are exactly the columns with _colCount > 0
+    #
+    # Attribute _colSlot: the position of each column in _liveCols
+    # Invariant: _colSlot is an int array of length cols, and
+    #            _liveCols[_colSlot[c]] == c for every column c
+    #
+    # Attribute _numCols: the number of columns with a live alien
+    # Invariant: _numCols is an int >= 0
+
+    # The names of the arrays that make up the state of a formation, hidden or not.
+    # The order of _liveCols decides which column ChooseAlien picks, so it is part
+    # of the state and cannot be rebuilt with recount.
+    ARRAYS = ('x', 'y', 'alive', 'kind', 'hp', '_rowCount', '_colCount', '_bottom',
+              '_liveCols', '_colSlot')
+
+    # The names of the ints that make up the rest of the state of a formation
+    COUNTS = ('_live', '_left', '_right', '_lowest', '_numCols')
+
+    def getLeft(self):
+        """Returns the left-most column with a live alien"""
+        return self._left
+
+
+    def getRight(self):
+        """Returns the right-most column with a live alien"""
+        return self._right
+
+
+    def getLowest(self):
+        """Returns the lowest row with a live alien"""
+        return self._lowest
+
+
+    def __init__(self, rows, cols):
+        """
+        Initializes a full formation of aliens in its starting position.
+
+        The top row sits ALIEN_CEILING below the top of the game, and the
+        left column ALIEN_H_SEP from the left edge. Every two rows share a
+        type, cycling through ALIEN_IMAGES.
+
+        Parameter rows: the number of rows of aliens
+        Precondition: rows is an int > 0
+
+        Parameter cols: the number of aliens in each row
+        Precondition: cols is an int > 0
+        """
+        assert isinstance(rows, int) and rows > 0
+        assert isinstance(cols, int) and cols > 0
+        left = ALIEN_H_SEP + ALIEN_WIDTH/2
+        top = GAME_HEIGHT - ALIEN_CEILING - ALIEN_HEIGHT/2
+        xs = left + np.arange(cols) * (ALIEN_H_SEP + ALIEN_WIDTH)
+        ys = top - np.arange(rows) * (ALIEN_V_SEP + ALIEN_HEIGHT)
+        self.x = np.tile(xs.astype(float), (rows, 1))
+        self.y = np.repeat(ys.astype(float)[:, None], cols, axis=1)
+        kinds = (np.arange(rows) // 2) % len(ALIEN_IMAGES)
+        self.kind = np.repeat(kinds.astype(np.int8)[:, None], cols, axis=1)
+        self.hp = np.full((rows, cols), ALIEN_HEALTH, dtype=np.int16)
+        self.alive = np.ones((rows, cols), dtype=bool)
+        self.recount()
+
+
+    def getShape(self):
+        """Returns the pair (rows, cols) of the formation grid"""
+        return self.alive.shape
+
+
+    def count(self):
+        """Returns the number of aliens still alive"""
+        return self._live
+
+
+    def recount(self):
+        """
+        Recomputes the live counts and the edges of the formation from alive.
+        """
+        self._rowCount = np.count_nonzero(self.alive, axis=1)
+        self._colCount = np.count_nonzero(self.alive, axis=0)
+        self._live = int(self._rowCount.sum())
+        self._left = 0
+        self._right = len(self._colCount) - 1
+        self._lowest = len(self._rowCount) - 1
+        self._shrink()
+        rows = len(self._rowCount)
+        self._bottom = rows - 1 - np.argmax(self.alive[::-1], axis=0)
+        full = self._colCount > 0
+        self._liveCols = np.concatenate((np.flatnonzero(full),
+                                         np.flatnonzero(~full)))
+        self._colSlot = np.empty_like(self._liveCols)
+        self._colSlot[self._liveCols] = np.arange(len(self._liveCols))
+        self._numCols = int(np.count_nonzero(full))
+
+
+    def isAlive(self, row, col):
+        """
+        Returns True if the alien at (row, col) is alive
+
+        Parameter row, col: the cell of the alien
+        Precondition: row and col are valid indices into the formation
+        """
+        return bool(self.alive[row, col])
+
+
+    def move(self, dx, dy):
+        """
+        Moves every alien in the formation by (dx, dy).
+
+        Parameter dx, dy: the distance to move
+        Precondition: dx and dy are numbers (int or float)
+        """
+        if dx:
+            self.x += dx
+        if dy:
+            self.y += dy
+
+
+    def extremeX(self):
+        """
+        Returns the pair (max, min) of the x-coordinates of the live aliens.
+
+        Precondition: at least one alien is alive
+        """
+        return (float(self.x[0, self._right]), float(self.x[0, self._left]))
+
+
+    def lowestY(self):
+        """
+        Returns the smallest y-coordinate of the live aliens.
+
+        Precondition: at least one alien is alive
+        """
+        return float(self.y[self._lowest, 0])
+
+
+    def columns(self):
+        """
+        Returns the sorted list of column indices that still contain a live alien.
+        """
+        return sorted(self._liveCols[:self._numCols].tolist())
+
+
+    def columnCount(self):
+        """Returns the number of columns that still contain a live alien"""
+        return self._numCols
+
+
+    def column(self, i):
+        """
+        Returns the column index of the i-th column with a live alien.
+
+        The live columns are kept in no particular order, but the order only
+        changes when a column is emptied. This is the fast way to pick a
+        random live column.
+
+        Parameter i: the position in the list of live columns
+        Precondition: i is an int in 0..columnCount()-1
+        """
+        return int(self._liveCols[i])
+
+
+    def bottom(self, col):
+        """
+        Returns the row of the bottom-most live alien in col, or None if the
+        whole column is destroyed.
+
+        Parameter col: the column to search
+        Precondition: col is a valid column index
+        """
+        if self._colCount[col] == 0:
+            return None
+        return int(self._bottom[col])
+
+
+    def collide(self, xs, ys, width, height, bolts=None, aliens=None, vys=None):
+        """
+        Resolves a batch of bolts against the formation in a single pass.
+
+        The bolts are tested against the aliens all at once. By default
+        every bolt is tested against every live alien by broadcasting their
+        bounding boxes. If the candidate pairs bolts and aliens are given
+        (typically from a SpatialHash), only those pairs are tested. If vys
+        is given, each bolt is swept along the path it moved this step (see
+        sweep); otherwise only its end position is tested. Either way, only
+        the pairs that overlap in x (a cheap test, as bolts never move
+        sideways) are swept.
+
+        With at most FEW_BOLTS bolts and no candidate pairs, there is no
+        broadcasting at all: each bolt works out from the spacing of the
+        grid which few columns and rows it can reach, and only tests those
+        cells (see _collideFew).
+
+        The hits are then applied in bolt order, as if the bolts had been
+        checked one after the other: every bolt hits at most one alien (the
+        live one it reaches first, and the first in row order if it reaches
+        several at once), and an alien absorbs no more bolts than it has hit
+        points. A bolt that only overlaps aliens destroyed earlier in the
+        pass hits nothing.
+
+        Returns a triple (hits, killed, times). hits is a bool array with one
+        entry per bolt, True if that bolt hit an alien. killed is an array of
+        the flat indices (row*cols + col) of the aliens destroyed by this
+        pass. times holds the time of impact of every bolt that hit, as a
+        fraction of the step (inf for the bolts that hit nothing).
+
+        Parameter xs, ys: the centers of the bolts
+        Precondition: xs and ys are float arrays of the same length
+
+        Parameter width, height: the size of every bolt
+        Precondition: width and height are numbers > 0
+
+        Parameter bolts, aliens: the candidate pairs to test, or None
+        Precondition: bolts and aliens are both None, or int arrays of the
+        same length holding bolt indices and flat alien indices
+
+        Parameter vys: how far each bolt moved in the y direction this step
+        Precondition: vys is None or a float array of the same length as xs
+        """
+        if vys is None:
+            vys = np.zeros(len(xs))
+        if bolts is None and len(xs) <= FEW_BOLTS:
+            return self._collideFew(xs, ys, vys, width, height)
+        hits = np.zeros(len(xs), dtype=bool)
+        times = np.full(len(xs), np.inf)
+        reachx = (width + ALIEN_WIDTH)/2
+        reachy = (height + ALIEN_HEIGHT)/2
+        if bolts is None:
+            live = np.flatnonzero(self.alive)
+            bolts, aliens = np.nonzero(np.abs(self.x.ravel()[live] - xs[:, None]) < reachx)
+            aliens = live[aliens]
+        else:
+            keep = self.alive.ravel()[aliens] & \
+                (np.abs(self.x.ravel()[aliens] - xs[bolts]) < reachx)
+            bolts, aliens = bolts[keep], aliens[keep]
+        # Only the pairs that overlap in x are swept
+        when = sweep(ys[bolts], vys[bolts], self.y.ravel()[aliens], reachy)
+        keep = when < np.inf
+        bolts, aliens, when = bolts[keep], aliens[keep], when[keep]
+        if len(bolts) == 0:
+            return hits, aliens, times
+        order = np.lexsort((aliens, when, bolts))
+        bolts, aliens, when = bolts[order], aliens[order], when[order]
+
+        hp = self.hp.ravel()
+        touched = []
+        for b, a, t in zip(bolts.tolist(), aliens.tolist(), when.tolist()):
+            if not hits[b] and hp[a] > 0:
+                hp[a] -= 1
+                hits[b] = True
+                times[b] = t
+                touched.append(a)
+        touched = np.unique(touched)
+        killed = touched[hp[touched] <= 0]
+        self.alive.ravel()[killed] = False
+        self._died(*np.divmod(killed, self.alive.shape[1]))
+        return hits, killed, times
+
+
+    def hit(self, row, col):
+        """
+        Takes one hit point from the alien at (row, col).
+
+        Returns True if the alien was destroyed by this hit.
+
+        Parameter row, col: the cell of the alien
+        Precondition: the alien at (row, col) is alive
+        """
+        self.hp[row, col] -= 1
+        if self.hp[row, col] <= 0:
+            self.alive[row, col] = False
+            self._died(np.array([row]), np.array([col]))
+            return True
+        return False
+
+
+    def copyFrom(self, other):
+        """
+        Makes this formation an exact copy of other, in place.
+
+        The arrays of this formation are overwritten, not replaced, so this
+        does not allocate any memory.
+
+        Parameter other: the formation to copy
+        Precondition: other is a Formation object of the same shape
+        """
+        self.assign([getattr(other, name) for name in self.ARRAYS],
+                    [getattr(other, name) for name in self.COUNTS])
+
+
+    def assign(self, arrays, counts):
+        """
+        Overwrites the state of this formation, in place.
+
+        Parameter arrays: the new values of the arrays named in ARRAYS
+        Precondition: arrays is a list of arrays in the order of ARRAYS, each
+        the same shape as the array it replaces
+
+        Parameter counts: the new values of the ints named in COUNTS
+        Precondition: counts is a list of ints in the order of COUNTS, that
+        agree with arrays
+        """
+        assert len(arrays) == len(self.ARRAYS) and len(counts) == len(self.COUNTS)
+        for name, values in zip(self.ARRAYS, arrays):
+            target = getattr(self, name)
+            assert target.shape == values.shape, "%s is not the same shape" % name
+            np.copyto(target, values)
+        for name, value in zip(self.COUNTS, counts):
+            setattr(self, name, int(value))
+
+
+    # HIDDEN METHODS
+    def _collideFew(self, xs, ys, vys, width, height):
+        """
+        Does the work of collide for a few bolts, one bolt at a time.
+
+        The formation only moves as a whole, so column c is ALIEN_H_SEP +
+        ALIEN_WIDTH to the right of column c-1, and row r is ALIEN_V_SEP +
+        ALIEN_HEIGHT below row r-1. The cells a bolt can reach are found from
+        that spacing (with one cell to spare on every side against rounding),
+        and are then tested exactly, with the same arithmetic as sweep. A
+        bolt that is not even near the box around the formation (down to its
+        lowest live row) is skipped before any of that. The result is the
+        same as that of the batched pass.
+
+        Parameter xs, ys, vys: the centers and velocities of the bolts
+        Precondition: xs, ys and vys are float arrays of the same length
+
+        Parameter width, height: the size of every bolt
+        Precondition: width and height are numbers > 0
+        """
+        rows, cols = self.alive.shape
+        reachx = (width + ALIEN_WIDTH)/2
+        reachy = (height + ALIEN_HEIGHT)/2
+        pitchx = ALIEN_H_SEP + ALIEN_WIDTH
+        pitchy = ALIEN_V_SEP + ALIEN_HEIGHT
+        left, right = float(self.x[0, 0]), float(self.x[0, -1])
+        top, bottom = float(self.y[0, 0]), float(self.y[self._lowest, 0])
+        hp = self.hp.ravel()
+        hits = []
+        times = []
+        touched = []
+        for x, end, speed in zip(xs.tolist(), ys.tolist(), vys.tolist()):
+            start = end - speed
+            lo, hi = min(start, end), max(start, end)
+            best = None
+            # Bolts that cannot reach the formation at all are the common case
+            if self._live and left - reachx < x < right + reachx and \
+                hi > bottom - reachy and lo < top + reachy:
+                c0 = max(int((x - reachx - left) // pitchx), 0)
+                c1 = min(int((x + reachx - left) // pitchx) + 1, cols - 1)
+                r0 = max(int((top - hi - reachy) // pitchy), 0)
+                r1 = min(int((top - lo + reachy) // pitchy) + 1, rows - 1)
+                colX = self.x[0, c0:c1 + 1].tolist()
+                rowY = self.y[r0:r1 + 1, 0].tolist()
+                for c in range(c0, c1 + 1):
+                    if abs(colX[c - c0] - x) >= reachx:
+                        continue
+                    for r in range(r0, r1 + 1):
+                        y = rowY[r - r0]
+                        a = r * cols + c
+                        if hp[a] > 0 and lo < y + reachy and hi > y - reachy:
+                            when = max(abs(y - start) - reachy, 0) / (abs(speed) if speed else 1)
+                            if best is None or (when, a) < best:
+                                best = (when, a)
+            if best is None:
+                hits.append(False)
+                times.append(np.inf)
+            else:
+                hp[best[1]] -= 1
+                hits.append(True)
+                times.append(best[0])
+                touched.append(best[1])
+        hits = np.array(hits, dtype=bool)
+        times = np.array(times)
+        if not touched:
+            return hits, np.zeros(0, dtype=np.intp), times
+        touched = np.unique(touched)
+        killed = touched[hp[touched] <= 0]
+        self.alive.ravel()[killed] = False
+        self._died(*np.divmod(killed, cols))
+        return hits, killed, times
+
+
+    def _died(self, rows, cols):
+        """
+        Updates the live counts and the edges after aliens were destroyed.
+
+        Parameter rows, cols: the cells of the destroyed aliens
+        Precondition: rows and cols are int arrays of the same length, and
+        every cell was alive before and is dead now
+        """
+        if len(rows):
+            np.subtract.at(self._rowCount, rows, 1)
+            np.subtract.at(self._colCount, cols, 1)
+            self._live -= len(rows)
+            self._shrink()
+            for col in set(cols.tolist()):
+                if self._colCount[col] == 0:
+                    self._dropColumn(col)
+                else:
+                    while not self.alive[self._bottom[col], col]:
+                        self._bottom[col] -= 1
+
+
+    def _dropColumn(self, col):
+        """
+        Removes an emptied column from the list of live columns.
+
+        The last live column takes its slot, so this is O(1).
+
+        Parameter col: the column that was emptied
+        Precondition: col is in the list of live columns
+        """
+        self._numCols -= 1
+        slot = self._colSlot[col]
+        last = self._liveCols[self._numCols]
+        self._liveCols[slot] = last
+        self._colSlot[last] = slot
+        self._liveCols[self._numCols] = col
+        self._colSlot[col] = self._numCols
+
+
+    def _shrink(self):
+        """
+        Moves the edges of the formation inwards past empty rows and columns.
+
+        The edges only ever move inwards, so over a whole wave this costs
+        O(rows + cols) in total.
+        """
+        if self._live == 0:
+            return
+        while self._colCount[self._left] == 0:
+            self._left += 1
+        while self._colCount[self._right] == 0:
+            self._right -= 1
+        while self._rowCount[self._lowest] == 0:
+            self._lowest -= 1
+
+
+class BoltBuffer(object):
+    """
+    A class to hold the laser bolts on screen as a struct of arrays.
+
+    Every bolt is a slot in four NumPy arrays of the same length: the center
+    of the bolt, its velocity in the y direction and its owner (BOLT_PLAYER
+    or BOLT_ALIEN). Only the first count() slots hold bolts; the rest is
+    spare room. When the buffer is full it doubles in size.
+
+    Bolts are removed in two stages. Within a frame, kill only marks a bolt
+    as spent, so the indices of the other bolts stay valid and every
+    collision check can skip it. At the end of the frame, compact removes
+    all the spent bolts, each by moving the last bolt into its slot. This
+    takes O(1) time per bolt, but does not keep the bolts in order.
+
+    The buffer counts how often the positions of its bolts have changed, so
+    that a collision grid built from them knows when it is out of date.
+    It also counts the bolts of each owner that are not spent, so finding out
+    whether the player has a bolt on screen does not look at the arrays.
+    """
+    # ATTRIBUTES:
+    # Attribute x: the x-coordinates of the bolt centers
+    # Invariant: x is a float array of length >= count()
+    #
+    # Attribute y: the y-coordinates of the bolt centers
+    # Invariant: y is a float array of the same length as x
+    #
+    # Attribute vy: the velocity of each bolt in the y direction
+    # Invariant: vy is a float array of the same length as x; vy[i] is
+    #            BOLT_SPEED for player bolts and -BOLT_SPEED for alien bolts
+    #
+    # Attribute owner: who fired each bolt
+    # Invariant: owner is an int8 array of the same length as x, with values
+    #            BOLT_PLAYER or BOLT_ALIEN
+    #
+    # Attribute spent: which bolts have been removed this frame
+    # Invariant: spent is a bool array of the same length as x
+    #
+    # HIDDEN ATTRIBUTES:
+    # Attribute _count: the number of bolts in the buffer, spent or not
+    # Invariant: _count is an int >= 0
+    #
+    # Attribute _spent: the number of spent bolts
+    # Invariant: _spent is an int >= 0, the number of True values in
+    #            spent[:_count]
+    #
+    # Attribute _owned: the number of bolts of each owner that are not spent
+    # Invariant: _owned is a list of two ints >= 0, indexed by BOLT_PLAYER and
+    #            BOLT_ALIEN
+    #
+    # Attribute _version: the number of times the bolts have changed
+    # Invariant: _version is an int >= 0
+
+    # The names of the arrays that make up the state of a buffer, in the order of assign
+    ARRAYS = ('x', 'y', 'vy', 'owner', 'spent')
+
+    def count(self):
+        """Returns the number of bolts in the buffer, including spent ones"""
+        return self._count
+
+
+    def getCapacity(self):
+        """Returns the number of bolts the buffer has room for"""
+        return len(self.x)
+
+
+    def getVersion(self):
+        """Returns the number of times bolts were added, moved or removed"""
+        return self._version
+
+
+    def countOwned(self, owner):
+        """
+        Returns the number of bolts of owner that are not spent.
+
+        Parameter owner: the owner to count the bolts of
+        Precondition: owner is BOLT_PLAYER or BOLT_ALIEN
+        """
+        return self._owned[owner]
+
+
+    def __init__(self, capacity=BOLT_CAPACITY):
+        """
+        Initializes an empty bolt buffer.
+
+        Parameter capacity: the number of bolts to make room for
+        Precondition: capacity is an int > 0
+        """
+        assert isinstance(capacity, int) and capacity > 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.owner = np.zeros(capacity, dtype=np.int8)
+        self.spent = np.zeros(capacity, dtype=bool)
+        self._count = 0
+        self._spent = 0
+        self._owned = [0, 0]
+        self._version = 0
+
+
+    def add(self, x, y, velocity, owner):
+        """
+        Adds a bolt to the end of the buffer.
+
+        Parameter x, y: the center of the bolt
+        Precondition: x and y are numbers (int or float)
+
+        Parameter velocity: the velocity of the bolt in the y direction
+        Precondition: velocity is BOLT_SPEED or -BOLT_SPEED
+
+        Parameter owner: who fired the bolt
+        Precondition: owner is BOLT_PLAYER or BOLT_ALIEN
+        """
+        if self._count == len(self.x):
+            self._grow()
+        i = self._count
+        self.x[i] = x
+        self.y[i] = y
+        self.vy[i] = velocity
+        self.owner[i] = owner
+        self.spent[i] = False
+        self._count += 1
+        self._owned[owner] += 1
+        self._version += 1
+
+
+    def kill(self, indices):
+        """
+        Marks the bolts at the given indices as spent.
+
+        The bolts stay in the buffer until the next call to compact.
+
+        Parameter indices: the bolts to remove
+        Precondition: indices is a list or int array of indices of bolts
+        that are not spent
+        """
+        if len(indices) > 0:
+            self.spent[indices] = True
+            self._spent += len(indices)
+            aliens = int(np.count_nonzero(self.owner[indices] == BOLT_ALIEN))
+            self._owned[BOLT_ALIEN] -= aliens
+            self._owned[BOLT_PLAYER] -= len(indices) - aliens
+
+
+    def move(self):
+        """
+        Moves every bolt by its velocity, and marks the ones that have left
+        the screen as spent.
+
+        Player bolts leave through the top of the game, and alien bolts
+        through the bottom. As every bolt starts on screen and only moves
+        one way, a bolt has left once it is past either edge. With at most
+        FEW_BOLTS bolts, they are first checked one at a time, which is
+        cheaper than the array operations when none has left.
+        """
+        n = self._count
+        if n == 0:
+            return
+        y = self.y[:n]
+        y += self.vy[:n]
+        low, high = -BOLT_HEIGHT/2, GAME_HEIGHT + BOLT_HEIGHT/2
+        if n <= FEW_BOLTS:
+            ys = y.tolist()
+            if low < min(ys) and max(ys) < high:
+                self._version += 1
+                return
+        gone = (y <= low) | (y >= high)
+        if gone.any():
+            gone &= ~self.spent[:n]
+            self.kill(np.flatnonzero(gone))
+        self._version += 1
+
+
+    def compact(self):
+        """
+        Removes every spent bolt from the buffer.
+
+        Each spent bolt is replaced by the last bolt in the buffer. The spent
+        bolts are visited from the back, so the bolt moved into a slot is
+        never itself spent.
+        """
+        if self._spent == 0:
+            return
+        for i in np.flatnonzero(self.spent[:self._count])[::-1].tolist():
+            last = self._count - 1
+            if i != last:
+                self.x[i] = self.x[last]
+                self.y[i] = self.y[last]
+                self.vy[i] = self.vy[last]
+                self.owner[i] = self.owner[last]
+            self.spent[i] = False
+            self.spent[last] = False
+            self._count = last
+        self._spent = 0
+        self._version += 1
+
+
+    def active(self, owner):
+        """
+        Returns a bool array saying which bolts belong to owner and are not
+        spent.
+
+        Parameter owner: the owner to look for
+        Precondition: owner is BOLT_PLAYER or BOLT_ALIEN
+        """
+        n = self._count
+        return (self.owner[:n] == owner) & ~self.spent[:n]
+
+
+    def owned(self, owner):
+        """
+        Returns the indices of the bolts that belong to owner and are not
+        spent, in increasing order.
+
+        With at most FEW_BOLTS bolts in the buffer, they are checked one at
+        a time, which is cheaper than the array operations of active.
+
+        Parameter owner: the owner to look for
+        Precondition: owner is BOLT_PLAYER or BOLT_ALIEN
+        """
+        n = self._count
+        if n > FEW_BOLTS:
+            return np.flatnonzero(self.active(owner))
+        owners = self.owner[:n].tolist()
+        spent = self.spent[:n].tolist()
+        return np.array([i for i in range(n) if owners[i] == owner and not spent[i]],
+                        dtype=np.intp)
+
+
+    def sweep(self, indices, x, y, width, height, owner):
+        """
+        Returns the bolts among indices that hit the box centered at (x, y)
+        this step, with their times of impact.
+
+        Each bolt is swept along the path it moved in the last call to move,
+        from y - vy to y (see the function sweep). Only bolts that belong to
+        owner and are not spent are tested. The result is a list of pairs
+        (time, index), where time is the fraction of the step at which the
+        bolt first touched the box, sorted so that the earliest hit is first
+        (and bolts that hit at the same time in the order of indices).
+
+        As a bolt is smaller than every target in both directions, touching
+        is the same as one of the four corners of the bolt being inside the
+        box (the test GObject.contains performs for the sprites).
+
+        If indices is None, every bolt in the buffer is tested. The bolts are
+        tested one at a time if there are at most FEW_BOLTS of them, and all
+        at once with arrays otherwise.
+
+        Parameter indices: the bolts to test
+        Precondition: indices is None or a list or int array of indices of
+        bolts in the buffer, in increasing order
+
+        Parameter x, y: the center of the box
+        Precondition: x and y are numbers (int or float)
+
+        Parameter width, height: the size of the box
+        Precondition: width and height are numbers > 0
+
+        Parameter owner: the owner of the bolts to look for
+        Precondition: owner is BOLT_PLAYER or BOLT_ALIEN
+        """
+        reachx = (width + BOLT_WIDTH)/2
+        reachy = (height + BOLT_HEIGHT)/2
+        n = self._count
+        if indices is None and n > FEW_BOLTS:
+            close = (self.owner[:n] == owner) & ~self.spent[:n] & \
+                (np.abs(self.x[:n] - x) < reachx)
+            found = np.flatnonzero(close)
+        elif indices is not None and len(indices) > FEW_BOLTS:
+            indices = np.asarray(indices, dtype=np.intp)
+            close = (self.owner[indices] == owner) & ~self.spent[indices] & \
+                (np.abs(self.x[indices] - x) < reachx)
+            found = indices[close]
+        else:
+            result = []
+            for i in (range(n) if indices is None else indices):
+                if self.owner[i] == owner and not self.spent[i] and \
+                    abs(self.x[i] - x) < reachx:
+                    end = float(self.y[i])
+                    speed = float(self.vy[i])
+                    start = end - speed
+                    if min(start, end) < y + reachy and max(start, end) > y - reachy:
+                        gap = max(abs(y - start) - reachy, 0)
+                        result.append((gap / abs(speed) if speed else 0.0, i))
+            result.sort()
+            return result
+        when = sweep(self.y[found], self.vy[found], y, reachy)
+        hit = when < np.inf
+        found, when = found[hit], when[hit]
+        order = np.lexsort((found, when))
+        return list(zip(when[order].tolist(), found[order].tolist()))
+
+
+    def copyFrom(self, other):
+        """
+        Makes this buffer hold exactly the bolts of other, in place.
+
+        Only the slots in use are copied, and this buffer only allocates
+        memory if it has less room than other has bolts. Spent bolts are
+        copied as spent.
+
+        Parameter other: the buffer to copy
+        Precondition: other is a BoltBuffer object
+        """
+        n = other._count
+        self.assign(*[getattr(other, name)[:n] for name in self.ARRAYS])
+
+
+    def assign(self, x, y, vy, owner, spent):
+        """
+        Replaces the bolts in this buffer with the given ones, in place.
+
+        The buffer only allocates memory if it has less room than there are
+        bolts.
+
+        Parameter x, y, vy, owner, spent: the new values of the slots in use
+        Precondition: x, y, vy, owner and spent are arrays of the same length,
+        with the values allowed in the arrays of the same name
+        """
+        n = len(x)
+        while len(self.x) < n:
+            self._grow()
+        for name, values in zip(self.ARRAYS, (x, y, vy, owner, spent)):
+            getattr(self, name)[:n] = values
+        self._count = n
+        self._spent = int(np.count_nonzero(spent))
+        self._owned = [int(np.count_nonzero(self.active(owner)))
+                       for owner in (BOLT_PLAYER, BOLT_ALIEN)]
+        self._version += 1
+
+
+    # HIDDEN METHODS
+    def _grow(self):
+        """
+        Doubles the room in the buffer, keeping the bolts in it.
+        """
+        size = 2 * len(self.x)
+        for name in ('x', 'y', 'vy', 'owner', 'spent'):
+            old = getattr(self, name)
+            new = np.zeros(size, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+
+class Snapshot(object):
+    """
+    A class to hold a saved copy of the complete state of a WaveCore.
+
+    A snapshot owns a Formation and a BoltBuffer of its own, so it can be
+    filled again and again (see WaveCore.snapshot) without allocating new
+    arrays. The rest of the state (the ship, the boss, the timers, the lives
+    and score, and the state of the random number generator) is kept in
+    two tuples.
+    """
+    # ATTRIBUTES:
+    # Attribute aliens: a copy of the formation
+    # Invariant: aliens is a Formation object
+    #
+    # Attribute bolts: a copy of the bolts on screen
+    # Invariant: bolts is a BoltBuffer object
+    #
+    # Attribute values: the other state of the wave
+    # Invariant: values is a tuple with one value per name in FIELDS, or None
+    #            if nothing was saved yet
+    #
+    # Attribute rng: the state of the random number generator
+    # Invariant: rng is a tuple from random.Random.getstate, or None
+
+    # The names of the entries of values, in order
+    FIELDS = ('hasShip', 'shipX', 'hasBoss', 'bossX', 'bossY', 'bossHealth', 'lives',
+              'score', 'time', 'step', 'random', 'switch', 'alienSpeed', 'hit',
+              'bossSwitch', 'bossSpeed', 'bossTime', 'bossShootTime', 'bossBoltCount',
+              'pairs')
+
+    def __init__(self, rows, cols):
+        """
+        Initializes an empty snapshot for waves whose formation is rows by cols.
+
+        Parameter rows, cols: the shape of the formation
+        Precondition: rows and cols are ints > 0
+        """
+        self.aliens = Formation(rows, cols)
+        self.bolts = BoltBuffer()
+        self.values = None
+        self.rng = None
+
+
+class WaveStats(object):
+    """
+    A class to add up how long each phase of WaveCore.step takes.
+
+    For every phase in PHASES the stats keep the number of calls, the total
+    and the longest time of a call (in nanoseconds), and the number of
+    (bolt, target) pairs that the phase tested for collisions. The phases
+    are timed by WaveCore.step only when the wave has stats (see
+    WaveCore.setStats), so a wave without them pays nothing.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _calls: the number of calls of each phase
+    # Invariant: _calls is a list of ints >= 0, one per phase
+    #
+    # Attribute _total: the total time of each phase, in nanoseconds
+    # Invariant: _total is a list of ints >= 0, one per phase
+    #
+    # Attribute _max: the longest call of each phase, in nanoseconds
+    # Invariant: _max is a list of ints >= 0, one per phase
+    #
+    # Attribute _pairs: the pairs tested for collisions by each phase
+    # Invariant: _pairs is a list of ints >= 0, one per phase
+    #
+    # Attribute _steps: the number of steps timed
+    # Invariant: _steps is an int >= 0
+
+    # The phases of a step, in order. The last one, sync, is the time Wave
+    # takes to bring its sprites up to date when it is drawn.
+    PHASES = ('input', 'fire', 'march', 'bolts', 'aliens', 'ship', 'boss', 'compact',
+              'sync')
+
+    def getSteps(self):
+        """Returns the number of steps timed"""
+        return self._steps
+
+
+    def __init__(self):
+        """
+        Initializes stats with nothing timed yet.
+        """
+        self.reset()
+
+
+    def reset(self):
+        """
+        Forgets everything timed so far.
+        """
+        n = len(self.PHASES)
+        self._calls = [0] * n
+        self._total = [0] * n
+        self._max = [0] * n
+        self._pairs = [0] * n
+        self._steps = 0
+
+
+    def add(self, phase, elapsed, pairs=0):
+        """
+        Adds one call of a phase.
+
+        Parameter phase: the position of the phase in PHASES
+        Precondition: phase is an int in 0..len(PHASES)-1
+
+        Parameter elapsed: the time the call took, in nanoseconds
+        Precondition: elapsed is an int >= 0
+
+        Parameter pairs: the pairs the call tested for collisions
+        Precondition: pairs is an int >= 0
+        """
+        self._calls[phase] += 1
+        self._total[phase] += elapsed
+        if elapsed > self._max[phase]:
+            self._max[phase] = elapsed
+        self._pairs[phase] += pairs
+
+
+    def endStep(self):
+        """
+        Counts one more step timed.
+        """
+        self._steps += 1
+
+
+    def report(self):
+        """
+        Returns the stats as a dictionary, ready to be written as JSON.
+
+        The dictionary maps 'steps' to the number of steps timed, and every
+        phase that was called to a dictionary with its 'calls', 'totalMs',
+        'meanUs', 'maxUs' and 'pairs'.
+        """
+        result = {'steps': self._steps}
+        for i in range(len(self.PHASES)):
+            calls = self._calls[i]
+            if calls > 0:
+                result[self.PHASES[i]] = {'calls': calls,
+                    'totalMs': round(self._total[i] / 1e6, 3),
+                    'meanUs': round(self._total[i] / calls / 1e3, 3),
+                    'maxUs': round(self._max[i] / 1e3, 3),
+                    'pairs': self._pairs[i]}
+        return result
+
+
+    def dump(self, path, **extra):
+        """
+        Appends the stats to a file as one line of JSON.
+
+        Parameter path: the file to append to
+        Precondition: path is a string
+
+        Parameter extra: more entries to write in the same line, such as
+        the seed or the score of the wave
+        Precondition: extra maps strings to values that can be written as JSON
+        """
+        import json
+        record = dict(extra)
+        record.update(self.report())
+        with open(path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+
+class WaveCore(object):
+    """
+    The rules of a single wave of Alien Invaders, without any drawing.
+
+    This class marches the aliens back and forth, fires and moves the laser
+    bolts, resolves the collisions and runs the boss alien once the formation
+    is destroyed. It is advanced by calling step with an input mask (a
+    combination of INPUT_LEFT, INPUT_RIGHT and INPUT_FIRE) and a time step.
+
+    All randomness is drawn from a per-wave generator, so two waves built with
+    the same seed and fed the same inputs play out identically.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _ship: the player ship to control
+    # Invariant: _ship is a ShipBody object or None
+    #
+    # Attribute _aliens: the formation of aliens in the wave
+    # Invariant: _aliens is a Formation object
+    #
+    # Attribute _bolts: the laser bolts currently on screen
+    # Invariant: _bolts is a BoltBuffer object; it holds no spent bolts
+    #            between frames
+    #
+    # Attribute _lives: the number of lives left
+    # Invariant: _lives is an int >= 0
+    #
+    # Attribute _time: the amount of time since the last Alien "step"
+    # Invariant: _time is a float >= 0s
+    #
+    # Attribute _hit: True if the ship had been hit
+    # Invariant : _hit is a boolean expression
+    #
+    # Attribute _score: Tracks the player's score
+    # Invariant: _score is an integer greater than or equal to 0
+    #
+    # Attribute _step is number of steps
+    # Invariant : _step is an int >= 0, can be rest to 0
+    #
+    # Attribute _random: Randomly determined interval for alien bolt firing
+    # Invariant: _random is an integer within a specified range (1 to BOLT_RATE)
+    #
+    # Attribute _rng: the random number generator of this wave
+    # Invariant: _rng is a random.Random object
+    #
+    # Attribute _seed: the seed _rng was created with
+    # Invariant: _seed is an int
+    #
+    # Attribute _switch: Controls the direction of alien movement
+    # Invariant: _switch is a boolean that dictates alien horizontal movement;
+    #            it's toggled internally.
+    #
+    # Attribute _alien_speed: the current speed which the aliens go
+    # Invariant: _alien_speed is a float or int > 0
+    #
+    # Attribute _boss_alien: the boss alien in the wave
+    # Invariant: _boss_alien is a BossBody object or None
+    #
+    # Attribute _boss_switch: a flag to control the horizontal movement direction of the boss alien
+    # Invariant: _boss_switch is a boolean
+    #
+    # Attribute _boss_speed: the speed at which the boss alien moves horizontally
+    # Invariant: _boss_speed is a float or int > 0, representing the time between steps
+    #
+    # Attribute _boss_time: the amount of time since the last boss alien "step" or movement
+    # Invariant: _boss_time is a float >= 0
+    #
+    # Attribute _boss_shoot_time: the amount of time since the boss alien last shot a bolt
+    # Invariant: _boss_shoot_time is a float >= 0
+    #
+    # Attribute _boss_bolt_count: the number of bolts shot in the current shooting sequence by the boss alien
+    # Invariant: _boss_bolt_count is an int >= 0, reset after reaching a certain number of shots
+    #
+    # Attribute _grid: the collision grid holding the bolts on screen
+    # Invariant: _grid is a SpatialHash object
+    #
+    # Attribute _gridVersion: the version of _bolts that _grid was built from
+    # Invariant: _gridVersion is an int, or None if _grid was never built
+    #
+    # Attribute _pairs: the (bolt, target) pairs tested for collisions
+    # Invariant: _pairs is an int >= 0
+    #
+    # Attribute _stats: the timing of each phase of step
+    # Invariant: _stats is a WaveStats object, or None if the wave is not timed
+
+
+    def getLives(self):
+        """Returns the current number of lives remaining in the game."""
+        return self._lives
+
+
+    def getScore(self):
+        """Returns the current score of the game"""
+        return self._score
+
+
+    def getTime(self):
+        """Returns the amount of time since the last Alien "step"."""
+        return self._time
+
+
+    def getStep(self):
+        """Returns the amount of steps taken since its last shot"""
+        return self._step
+
+
+    def getSeed(self):
+        """Returns the seed of the wave, which replays it with the same inputs"""
+        return self._seed
+
+
+    def getShipX(self):
+        """Returns the x-coordinate of the ship, or None if it is destroyed"""
+        return None if self._ship is None else self._ship.x
+
+
+    def getFormation(self):
+        """Returns the formation of aliens (a Formation object)"""
+        return self._aliens
+
+
+    def getBoltBuffer(self):
+        """Returns the laser bolts on screen (a BoltBuffer object)"""
+        return self._bolts
+
+
+    def getStats(self):
+        """Returns the timing of the phases of step (a WaveStats object), or None"""
+        return self._stats
+
+
+    def setStats(self, stats):
+        """
+        Starts or stops timing the phases of step.
+
+        Parameter stats: where to add up the timing, or None to stop timing
+        Precondition: stats is a WaveStats object or None
+        """
+        assert stats is None or isinstance(stats, WaveStats)
+        self._stats = stats
+
+
+    def getAlienCount(self):
+        """Returns the number of aliens still alive, not counting the boss"""
+        return self._aliens.count()
+
+
+    def getBoltCount(self):
+        """Returns the number of laser bolts on screen"""
+        return self._bolts.count()
+
+
+    def getBossPosition(self):
+        """Returns the pair (x, y) of the boss alien, or None if there is none"""
+        if self._boss_alien is None:
+            return None
+        return (self._boss_alien.x, self._boss_alien.y)
+
+
+    def getBossHealth(self):
+        """Returns the health of the boss alien, or 0 if there is none"""
+        return 0 if self._boss_alien is None else self._boss_alien.health
+
+
+    def getGrid(self):
+        """
+        Returns the collision grid of the bolts on screen.
+
+        Use getOccupied, getTested and getQueries on the grid to see how many
+        cells and candidate pairs the grid lookups are paying for.
+        """
+        return self._grid
+
+
+    def getPairsTested(self):
+        """
+        Returns the number of (bolt, target) pairs tested for collisions.
+
+        This counts every pair the collision checks looked at since the wave
+        started, whether it came from the grid or from testing all pairs.
+        """
+        return self._pairs
+
+
+    def getHit(self):
+        """Returns whether the ship has been hit"""
+        return self._hit
+
+
+    def setHit(self,value):
+        """
+        Sets whether the ship has been hit
+
+        Parameter value: whether the ship has been hit
+        Precondition: value is a boolean
+        """
+        assert isinstance(value,bool), "value is not a boolean"
+
+        self._hit = value
+
+
+    def __init__(self, seed=None):
+        """
+        Initializes a new wave.
+
+        This method creates the ship and the aliens, and initializes the
+        score, lives and timers.
+
+        Parameter seed: the seed for the random number generator of this wave
+        Precondition: seed is None or an int. If it is None, a seed is drawn
+        from the system (see getSeed).
+        """
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**63)
+        self._seed = seed
+        self._rng = random.Random(seed)
+        self._aliens = self.createAlien()
+        self._ship = ShipBody(GAME_WIDTH/2, SHIP_BOTTOM + SHIP_HEIGHT/2)
+        self._bolts = BoltBuffer()
+        self._time = 0
+        self._step = 0
+        self._switch = True
+        self._hit = False
+        self._lives = SHIP_LIVES
+        self._random = self._rng.randint(1,BOLT_RATE)
+        self._score  = 0
+        self._alien_speed = ALIEN_SPEED
+        self._boss_alien = None
+        self._boss_switch = True
+        self._boss_speed = BOSS_ALIEN_SPEED
+        self._boss_time = 0
+        self._boss_shoot_time = 0
+        self._boss_bolt_count = 0
+        self._grid = SpatialHash()
+        self._gridVersion = None
+        self._pairs = 0
+        self._stats = None
+
+
+    def createAlien(self):
+        """
+        Creates and initializes the formation of aliens for the game.
+
+        The size of the formation is ALIEN_ROWS by ALIENS_IN_ROW.
+
+        Returns:
+            A Formation object with every alien alive.
+        """
+        return Formation(ALIEN_ROWS, ALIENS_IN_ROW)
+
+
+    def step(self,keys,dt):
+        """
+        Advances the wave by one animation frame.
+
+        Moves the ship and fires a player bolt according to keys, then
+        marches the aliens, moves the bolts, resolves the collisions and runs
+        the boss alien once the formation is destroyed. The bolts spent this
+        frame are removed from _bolts all at once at the end.
+
+        Parameter keys: the keys held down this frame
+        Precondition: keys is an int (or NumPy integer) combining INPUT_LEFT,
+        INPUT_RIGHT and INPUT_FIRE with |
+
+        Parameter dt: Elapsed time since last update, for alien movement progression.
+        Precondition: 'dt' is a non-negative float representing time in seconds.
+        """
+        assert isinstance(keys, (int, np.integer)) and \
+            0 <= keys <= INPUT_LEFT | INPUT_RIGHT | INPUT_FIRE, "%s is not valid keys" % repr(keys)
+        assert isinstance(dt, float) and dt > 0
+        keys = int(keys)
+        if self._stats is not None:
+            self._timedStep(keys, dt)
+            return
+        self._moveShip(keys)
+        self._fire()
+        self._march(dt)
+        self.BoltLoop()
+        self.AlienCollison()
+        self.ShipCollison()
+        self._runBoss(dt)
+        self._bolts.compact()
+
+
+    def advance(self,keys,dt,frames):
+        """
+        Advances the wave by several frames with the same input.
+
+        There is no pause screen without a window, so a hit on the ship is
+        acknowledged immediately and play carries on. This method stops
+        early if the wave is complete.
+
+        Returns the number of frames that were actually simulated.
+
+        Parameter keys: the keys held down every frame
+        Precondition: keys is an int combining INPUT_LEFT, INPUT_RIGHT and
+        INPUT_FIRE with |
+
+        Parameter dt: the time step of every frame
+        Precondition: dt is a float > 0
+
+        Parameter frames: the maximum number of frames to simulate
+        Precondition: frames is an int >= 0
+        """
+        assert isinstance(frames, int) and frames >= 0
+        for n in range(frames):
+            if self.isComplete():
+                return n
+            self.step(keys, dt)
+            self._hit = False
+        return frames
+
+
+    def isComplete(self):
+        """
+        Returns True if the wave is over, either won or lost.
+
+        The wave is lost if the ship has no lives left or an alien has reached
+        the defense line. It is won once all aliens and the boss are destroyed.
+        """
+        return self._lives == 0 or bool(self.ExtremeY()) or self.isWon()
+
+
+    def isWon(self):
+        """
+        Returns True if all the aliens and the boss alien have been destroyed.
+        """
+        return not self.AlienExists() and not self.bossAlienExists()
+
+
+    def snapshot(self, into=None):
+        """
+        Saves the complete state of the wave and returns it as a Snapshot.
+
+        A snapshot can be restored any number of times (see restore), which
+        rewinds the wave to this frame. Passing a snapshot from an earlier
+        call as into refills it in place, so saving a wave every frame does
+        not allocate new arrays.
+
+        Parameter into: the snapshot to fill
+        Precondition: into is None or a Snapshot object from a wave with a
+        formation of the same shape
+        """
+        if into is None:
+            into = Snapshot(*self._aliens.getShape())
+        into.aliens.copyFrom(self._aliens)
+        into.bolts.copyFrom(self._bolts)
+        ship = self._ship
+        boss = self._boss_alien
+        into.values = (ship is not None, ship.x if ship else 0,
+            boss is not None, boss.x if boss else 0, boss.y if boss else 0,
+            boss.health if boss else 0, self._lives, self._score, self._time,
+            self._step, self._random, self._switch, self._alien_speed,
+            self._hit, self._boss_switch, self._boss_speed, self._boss_time,
+            self._boss_shoot_time, self._boss_bolt_count, self._pairs)
+        into.rng = self._rng.getstate()
+        return into
+
+
+    def restore(self, snap):
+        """
+        Rewinds the wave to the state saved in snap.
+
+        After a restore the wave plays out exactly as it did after the
+        snapshot was taken, as long as it is given the same inputs. The
+        seed of the wave is not changed.
+
+        Parameter snap: the state to rewind to
+        Precondition: snap is a filled Snapshot object from a wave with a
+        formation of the same shape
+        """
+        assert isinstance(snap, Snapshot) and snap.values is not None
+        (hasShip, shipX, hasBoss, bossX, bossY, bossHealth, self._lives,
+            self._score, self._time, self._step, self._random, self._switch,
+            self._alien_speed, self._hit, self._boss_switch, self._boss_speed,
+            self._boss_time, self._boss_shoot_time, self._boss_bolt_count,
+            self._pairs) = snap.values
+        self._aliens.copyFrom(snap.aliens)
+        self._bolts.copyFrom(snap.bolts)
+        self._rng.setstate(snap.rng)
+        if not hasShip:
+            self._ship = None
+        elif self._ship is None:
+            self._ship = ShipBody(shipX, SHIP_BOTTOM + SHIP_HEIGHT/2)
+        else:
+            self._ship.x = shipX
+        if not hasBoss:
+            self._boss_alien = None
+        elif self._boss_alien is None:
+            self._boss_alien = BossBody(bossX, bossY, bossHealth)
+        else:
+            self._boss_alien.x = bossX
+            self._boss_alien.y = bossY
+            self._boss_alien.health = bossHealth
+
+
+    def AlienMovement(self,dt):
+        """
+        Manages the movement of aliens in the game.
+
+        This function accumulates the elapsed time (dt). Once a full alien
+        step has passed, it determines the direction of the alien wave (left,
+        right, or down) based on the positions of the aliens at the extremes
+        (determined by the ExtremeX function) and moves them accordingly.
+
+        Parameter dt: The time elapsed since the last update
+        Precondition: dt is a non-negative float
+        """
+        assert isinstance(dt,float)
+        assert dt > 0
+
+        self._time += dt
+
+        if self._time > self._alien_speed:
+
+            self._step += 1
+            self._time = 0
+            max, min = self.ExtremeX()
+
+            if self._switch:
+                if max + ALIEN_H_WALK + ALIEN_WIDTH/2 < GAME_WIDTH:
+                    self.ALoopRight()
+                else:
+                    self.ALoopDown()
+                    self._switch = False
+            else:
+                if min - ALIEN_H_WALK - ALIEN_WIDTH/2 > 0:
+                    self.ALoopLeft()
+                else:
+                    self.ALoopDown()
+                    self._switch = True
+
+
+    def ExtremeX(self):
+        """
+        Finds the extreme horizontal positions of the alien wave.
+
+        The formation keeps track of its left-most and right-most columns as
+        aliens die, so this does not look at the aliens at all.
+
+        Returns a tuple where the first element is the maximum x-coordinate
+        and the second element is the minimum x-coordinate of the aliens.
+        """
+        return self._aliens.extremeX()
+
+
+    def ExtremeY(self):
+        """
+        Determines if any alien has reached the defense line.
+
+        Only the lowest live row of the formation (or the boss) is checked.
+
+        Returns:
+        True if any alien has reached the defense line, False otherwise.
+        """
+        if self._boss_alien == None:
+            return self._aliens.count() > 0 and \
+                self._aliens.lowestY() - ALIEN_HEIGHT/2 <= DEFENSE_LINE
+        return self._boss_alien.y - ALIEN_HEIGHT/2 <= DEFENSE_LINE
+
+
+    def ALoopRight(self):
+        """
+        Moves all aliens in the wave to the right by ALIEN_H_WALK.
+        """
+        self._aliens.move(ALIEN_H_WALK, 0)
+
+
+    def ALoopLeft(self):
+        """
+        Moves all aliens in the wave to the left by ALIEN_H_WALK.
+        """
+        self._aliens.move(-ALIEN_H_WALK, 0)
+
+
+    def ALoopDown(self):
+        """
+        Moves all aliens in the wave down by ALIEN_V_WALK.
+        """
+        self._aliens.move(0, -ALIEN_V_WALK)
+
+
+    def AlienFire(self):
+        """
+        Handles the firing action of an alien.
+
+        This function randomly selects an alien to fire a bolt. It updates the
+        bolts list with the new bolt from the selected alien. In stress mode
+        ALIEN_VOLLEY aliens are selected, each on its own.
+
+        Postcondition:
+        Adds ALIEN_VOLLEY new bolts to _bolts if the aliens fire.
+        """
+        alien = self.ChooseAlien()
+        if alien != None:
+            for i in range(ALIEN_VOLLEY):
+                if i > 0:
+                    alien = self.ChooseAlien()
+                x = float(self._aliens.x[alien])
+                y = float(self._aliens.y[alien])
+                self._bolts.add(x, y - ALIEN_HEIGHT/2 - BOLT_HEIGHT/2,
+                                -BOLT_SPEED, BOLT_ALIEN)
+            self._step = 0
+            self._random = self._rng.randint(1,BOLT_RATE)
+
+
+    def ChooseAlien(self):
+        """
+        Randomly selects an alien from the bottom-most row for firing.
+
+        This method picks a random column that still has an alien, and then
+        selects the bottom-most alien in that column. Both come straight from
+        the formation's occupancy index, so this takes O(1) time.
+
+        Returns:
+            The pair (row, col) of the alien that will fire a bolt, or None if
+            no aliens are present.
+        """
+        count = self._aliens.columnCount()
+        if count == 0:
+            return None
+        pick = self._aliens.column(self._rng.randint(0,count-1))
+        return (self._aliens.bottom(pick), pick)
+
+
+    def FindNotNone(self):
+        """
+        Identifies columns in the alien grid that have at least one alien.
+
+        Returns:
+            A list of column indices that contain aliens.
+        """
+        return self._aliens.columns()
+
+
+    def AlienCollison(self):
+        """
+        Checks and handles collisions between aliens and player bolts.
+
+        When there are many pairs of player bolts and aliens, every live
+        alien looks up the bolts in its neighbouring cells of the collision
+        grid, and only those pairs are tested. When there are few (fewer than
+        GRID_MIN_PAIRS), it is cheaper to test every pair at once. Either way
+        the pairs are resolved in one batch (see Formation.collide), sweeping
+        every bolt along its path this step. Every bolt that hit an alien is
+        spent, the score for all destroyed aliens is added at once by
+        ScoreChanger, and if any alien was hit this frame, the aliens speed up.
+        """
+        players = self._bolts.countOwned(BOLT_PLAYER)
+        if players == 0:
+            return
+        n = self._bolts.count()
+        boltX, boltY = self._bolts.x[:n], self._bolts.y[:n]
+        boltV = self._bolts.vy[:n]
+        if players * self._aliens.count() < GRID_MIN_PAIRS:
+            self._pairs += players * self._aliens.count()
+            bolts = self._bolts.owned(BOLT_PLAYER)
+            found, killed, times = self._aliens.collide(boltX[bolts], boltY[bolts],
+                BOLT_WIDTH, BOLT_HEIGHT, vys=boltV[bolts])
+            bolts = bolts[found]
+        else:
+            live = np.flatnonzero(self._aliens.alive)
+            near, bolts = self._boltGrid().query(self._aliens.x.ravel()[live],
+                                                 self._aliens.y.ravel()[live],
+                                                 (ALIEN_WIDTH + BOLT_WIDTH)/2,
+                                                 (ALIEN_HEIGHT + BOLT_HEIGHT)/2 + BOLT_SPEED)
+            self._pairs += len(bolts)
+            keep = self._bolts.active(BOLT_PLAYER)[bolts]
+            hits, killed, times = self._aliens.collide(boltX, boltY,
+                BOLT_WIDTH, BOLT_HEIGHT, bolts[keep], live[near[keep]], boltV)
+            bolts = np.flatnonzero(hits)
+        if len(bolts):
+            self._bolts.kill(bolts)
+            self.ScoreChanger(self._aliens.kind.ravel()[killed])
+            self._alien_speed = self._alien_speed * ALIEN_SPEED_ADJUSTMENT_FACTOR
+
+
+    def ShipCollison(self):
+        """
+        Checks and handles collisions between the player's ship and alien bolts.
+
+        With very many bolts on screen, only those in the cells around the
+        ship are checked (see _nearbyBolts). Each bolt is checked along the
+        path it moved this step (see BoltBuffer.sweep), earliest hit first.
+        Every alien bolt that collides with the ship is spent and costs the
+        player one life. The _hit attribute is set to True. If the player
+        has no remaining lives, the ship is set to None.
+        """
+        if self._ship is None:
+            return
+        near = self._nearbyBolts(self._ship.x, self._ship.y,
+                                 SHIP_WIDTH, SHIP_HEIGHT)
+        spent = []
+        for _, i in self._bolts.sweep(near, self._ship.x, self._ship.y,
+                                      SHIP_WIDTH, SHIP_HEIGHT, BOLT_ALIEN):
+            if self._lives == 0:
+                self._ship = None
+                break
+            self._hit = True
+            self._lives -= 1
+            spent.append(i)
+        self._bolts.kill(spent)
+
+
+    def AlienExists(self):
+        """
+        Determines if any aliens are still present in the game.
+
+        Returns:
+            True if at least one alien exists, False otherwise.
+        """
+        return self._aliens.count() > 0
+
+
+    def BoltLoop(self):
+        """
+        Updates the position of each bolt and removes off-screen bolts.
+
+        All bolts are moved with one vectorized add (see BoltBuffer.move).
+
+        Postcondition:
+            - Updates the position of each bolt based on its velocity.
+            - Marks bolts that have moved off-screen as spent.
+        """
+        self._bolts.move()
+
+
+    def CheckIfPlayer(self):
+        """
+        Returns True if at least one player bolt is on the screen.
+        """
+        return self._bolts.countOwned(BOLT_PLAYER) > 0
+
+
+    def CanFire(self):
+        """
+        Returns True if the player may fire another bolt.
+
+        Outside of stress mode the player may only have one bolt on the
+        screen at a time, and up to PLAYER_BOLTS in stress mode.
+        """
+        if PLAYER_BOLTS == 1:
+            return not self.CheckIfPlayer()
+        return self._bolts.countOwned(BOLT_PLAYER) < PLAYER_BOLTS
+
+
+    def ScoreChanger(self,kinds):
+        """
+        Updates the score when aliens are destroyed.
+
+        This method increases the player's score based on the type of each
+        alien destroyed.
+
+        Parameter kinds: The types of the aliens that were destroyed.
+        Precondition: kinds is an int array with values in
+        0..len(ALIEN_IMAGES)-1
+        """
+        self._score += int(_SCORES[kinds].sum())
+
+
+    def createBossAlien(self):
+        """
+        Creates and initializes the boss alien for the game.
+
+        Returns:
+            A BossBody object representing the boss enemy in the game.
+        """
+        return BossBody(GAME_WIDTH / 2, GAME_HEIGHT - 100, BOSS_HEALTH)
+
+
+    def BossAlienCollision(self):
+        """
+        Checks for and handles collisions between the boss alien and
+        player-fired bolts.
+
+        With very many bolts on screen, only those in the cells around the
+        boss are checked (see _nearbyBolts). Each bolt is checked along the
+        path it moved this step (see BoltBuffer.sweep), earliest hit first.
+        Every player bolt that collides with the boss alien is spent and
+        costs the boss one health. If the boss alien is destroyed, it is
+        removed from the game, and the player's score is increased by
+        BOSS_SCORE.
+        """
+        if self._boss_alien is None:
+            return
+        boss = self._boss_alien
+        near = self._nearbyBolts(boss.x, boss.y, ALIEN_WIDTH, ALIEN_HEIGHT)
+        spent = []
+        for _, i in self._bolts.sweep(near, boss.x, boss.y,
+                                      ALIEN_WIDTH, ALIEN_HEIGHT, BOLT_PLAYER):
+            spent.append(i)
+            if boss.hit():
+                self._boss_alien = None
+                self._score += BOSS_SCORE
+                break
+        self._bolts.kill(spent)
+
+
+    def bossAlienExists(self):
+        """
+        Returns True if the boss alien exists, False otherwise.
+        """
+        return self._boss_alien is not None
+
+
+    def BossAlienMovement(self, dt):
+        """
+        Manages the horizontal movement of the boss alien.
+
+        The boss alien moves left and right across the screen, stepping down
+        when it reaches the edge. The movement speed is determined by the
+        _boss_speed attribute.
+
+        Parameter dt: The time elapsed since the last update
+        Precondition: dt is a non-negative float
+        """
+        assert isinstance(dt, float) and dt > 0
+
+        if self._boss_alien:
+            self._boss_time += dt
+            if self._boss_time > self._boss_speed:
+                self._boss_time = 0
+                boss = self._boss_alien
+                if self._boss_switch:
+                    if boss.x + BOSS_ALIEN_H_WALK + ALIEN_WIDTH/2 < GAME_WIDTH:
+                        boss.x += BOSS_ALIEN_H_WALK
+                    else:
+                        self._boss_switch = False
+                        boss.y -= BOSS_ALIEN_V_WALK
+                else:
+                    if boss.x - BOSS_ALIEN_H_WALK - ALIEN_WIDTH/2 > 0:
+                        boss.x -= BOSS_ALIEN_H_WALK
+                    else:
+                        self._boss_switch = True
+                        boss.y -= BOSS_ALIEN_V_WALK
+
+
+    def BossAlienShoot(self, dt):
+        """
+        Manages the shooting mechanism of the boss alien.
+
+        The boss alien fires three bolts consecutively every four seconds.
+
+        Parameter dt: The time elapsed since the last update
+        Precondition: dt is a non-negative float
+        """
+        if self._boss_alien:
+            self._boss_shoot_time += dt
+
+            if self._boss_shoot_time >= 4:
+                self._boss_shoot_time = 0
+                self._boss_bolt_count = 0
+
+            shot_interval = 0.2
+            if self._boss_bolt_count < 3 and self._boss_shoot_time >= \
+                self._boss_bolt_count * shot_interval:
+                self._boss_bolt_count += 1
+                self._bolts.add(self._boss_alien.x,
+                    self._boss_alien.y - ALIEN_HEIGHT/2, -BOLT_SPEED, BOLT_ALIEN)
+
+
+    # HELPER METHODS
+    def _moveShip(self, keys):
+        """
+        Moves the ship and fires a player bolt according to keys.
+
+        Parameter keys: the keys held down this frame
+        Precondition: keys is an int combining INPUT_LEFT, INPUT_RIGHT and
+        INPUT_FIRE with |
+        """
+        if self._ship is not None:
+            if keys & INPUT_RIGHT:
+                self._ship.MoveRight()
+            if keys & INPUT_LEFT:
+                self._ship.MoveLeft()
+            if keys & INPUT_FIRE:
+                if self.CanFire():
+                    self._bolts.add(self._ship.x,
+                        SHIP_BOTTOM + SHIP_HEIGHT + BOLT_HEIGHT/2, BOLT_SPEED,
+                        BOLT_PLAYER)
+
+
+    def _fire(self):
+        """
+        Lets the aliens fire if enough alien steps have passed.
+        """
+        if self._step == self._random:
+            self.AlienFire()
+
+
+    def _march(self, dt):
+        """
+        Marches the formation, if any alien is left.
+
+        Parameter dt: the time step of the frame
+        Precondition: dt is a float > 0
+        """
+        if self.AlienExists():
+            self.AlienMovement(dt)
+
+
+    def _runBoss(self, dt):
+        """
+        Creates the boss once the formation is destroyed, then moves it,
+        checks it for hits and lets it shoot.
+
+        Parameter dt: the time step of the frame
+        Precondition: dt is a float > 0
+        """
+        if not self.AlienExists() and not self._boss_alien:
+            self._boss_alien = self.createBossAlien()
+        if self._boss_alien:
+            self.BossAlienMovement(dt)
+            self.BossAlienCollision()
+            self.BossAlienShoot(dt)
+
+
+    def _timedStep(self, keys, dt):
+        """
+        Does the work of step, timing each phase into _stats.
+
+        Parameter keys: the keys held down this frame
+        Precondition: keys is an int combining INPUT_LEFT, INPUT_RIGHT and
+        INPUT_FIRE with |
+
+        Parameter dt: the time step of the frame
+        Precondition: dt is a float > 0
+        """
+        stats = self._stats
+        clock = time.perf_counter_ns
+        phases = ((self._moveShip, (keys,)), (self._fire, ()), (self._march, (dt,)),
+                  (self.BoltLoop, ()), (self.AlienCollison, ()),
+                  (self.ShipCollison, ()), (self._runBoss, (dt,)),
+                  (self._bolts.compact, ()))
+        for phase in range(len(phases)):
+            method, args = phases[phase]
+            pairs = self._pairs
+            start = clock()
+            method(*args)
+            stats.add(phase, clock() - start, self._pairs - pairs)
+        stats.endStep()
+
+
+    def _boltGrid(self):
+        """
+        Returns the collision grid of the bolts, rebuilding it if needed.
+
+        The grid is rebuilt whenever bolts have been added, moved or removed
+        since the last build, which is at most once or twice a frame. Spent
+        bolts stay in the grid; the collision checks skip them.
+
+        Only the bolts are put in the grid. The aliens are the queries: they
+        sit on a regular grid of their own, so the cells of a bolt are found
+        from their spacing instead (see Formation.collide). The ship and the
+        boss are a single box each, and a single box costs one lookup, not a
+        grid of its own.
+        """
+        version = self._bolts.getVersion()
+        if self._gridVersion != version:
+            n = self._bolts.count()
+            self._grid.build(self._bolts.x[:n], self._bolts.y[:n])
+            self._gridVersion = version
+        return self._grid
+
+
+    def _nearbyBolts(self, x, y, width, height):
+        """
+        Returns the indices (in _bolts) of the bolts in the cells around a box.
+
+        The indices are in increasing order. They are only candidates; the
+        bolts still need to be tested exactly. The cells reach BOLT_SPEED
+        further up and down, so that they hold every bolt whose path this step
+        crossed the box.
+
+        Testing every bolt against one box is a single pass over their
+        x-coordinates, which costs far less than building the grid. So the
+        grid is only used when AlienCollison has already built it this step
+        and there are at least GRID_MIN_BOLTS bolts; otherwise this returns
+        None, meaning every bolt (see BoltBuffer.sweep).
+
+        Parameter x, y: the center of the box
+        Precondition: x and y are numbers (int or float)
+
+        Parameter width, height: the size of the box
+        Precondition: width and height are numbers > 0
+        """
+        n = self._bolts.count()
+        if n < GRID_MIN_BOLTS or self._gridVersion != self._bolts.getVersion():
+            self._pairs += n
+            return None
+        near = self._grid.near(x, y, (width + BOLT_WIDTH)/2,
+                               (height + BOLT_HEIGHT)/2 + BOLT_SPEED)
+        self._pairs += len(near)
+        return near
+
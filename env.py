@@ -0,0 +1,357 @@
+"""
+Learning environment module for Alien Invaders
+
+This module wraps the rules of the game in the reset/step interface used by
+reinforcement learning libraries. InvadersEnv plays a single WaveCore, and
+VectorInvadersEnv plays many games at once on a WaveBatch (see batch.py).
+Neither opens a window.
+
+An action is an input mask: any combination of INPUT_LEFT, INPUT_RIGHT and
+INPUT_FIRE, so there are 8 actions numbered 0..7. The reward of a step is
+the points scored during it (the same points ScoreChanger adds up), minus a
+penalty for every life lost to an alien bolt. An observation is a float32
+array of OBSERVATION_SIZE numbers, all scaled to about 0..1:
+
+    the ship: its x, whether it exists, the fraction of lives left
+    the formation: the x and y of the alien in row 0, column 0
+    the aliens: 1 or 0 for every alien, alive or not, in row order
+    the boss: whether it exists, its x, its y, the fraction of health left
+    the player bolt: whether it exists, its x, its y
+    the ENV_ALIEN_BOLTS lowest alien bolts: whether each exists, its x, its y
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+from consts import *
+from core import WaveCore
+from batch import WaveBatch
+import numpy as np
+
+# PRIMARY RULE: This module may only access consts.py, core.py and batch.py. It must never
+# import kivy, game2d, models, wave or app, or it can no longer run without a window.
+
+# The number of different actions
+ACTIONS = (INPUT_LEFT | INPUT_RIGHT | INPUT_FIRE) + 1
+
+# The number of values in an observation
+OBSERVATION_SIZE = 3 + 2 + ALIEN_ROWS * ALIENS_IN_ROW + 4 + 3 + 3 * ENV_ALIEN_BOLTS
+
+
+class InvadersEnv(object):
+    """
+    A class to play a single wave as a learning environment.
+
+    Each step holds the action down for frameskip frames of GAME_FRAME_TIME
+    seconds each, and adds up the rewards. A step ends early if the wave is
+    over.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _wave: the wave being played
+    # Invariant: _wave is a WaveCore object, or None before the first reset
+    #
+    # Attribute _frameskip: the number of frames each step lasts
+    # Invariant: _frameskip is an int > 0
+    #
+    # Attribute _penalty: the reward taken away for every life lost
+    # Invariant: _penalty is a number >= 0
+
+    def getWave(self):
+        """Returns the wave being played (a WaveCore object), or None"""
+        return self._wave
+
+
+    def __init__(self, frameskip=1, lifePenalty=0):
+        """
+        Initializes an environment. Call reset to start the first wave.
+
+        Parameter frameskip: the number of frames each step lasts
+        Precondition: frameskip is an int > 0
+
+        Parameter lifePenalty: the reward taken away for every life lost
+        Precondition: lifePenalty is a number (int or float) >= 0
+        """
+        assert isinstance(frameskip, int) and frameskip > 0
+        assert type(lifePenalty) in [int, float] and lifePenalty >= 0
+        self._wave = None
+        self._frameskip = frameskip
+        self._penalty = lifePenalty
+
+
+    def reset(self, seed=None):
+        """
+        Starts a new wave and returns its first observation.
+
+        Parameter seed: the seed of the new wave
+        Precondition: seed is None or an int
+        """
+        self._wave = WaveCore(seed)
+        return self.observe()
+
+
+    def step(self, action):
+        """
+        Plays one step and returns (observation, reward, done, info).
+
+        reward is a float, as are the rewards of VectorInvadersEnv. done is
+        True if the wave is over. info is a dictionary with the
+        'score', 'lives', 'livesLost' (during this step), 'frames' (the
+        frames played in this step) and 'won'.
+
+        Parameter action: the keys to hold down
+        Precondition: action is an int (or NumPy integer) in 0..ACTIONS-1
+        """
+        assert self._wave is not None, "reset must be called before step"
+        assert isinstance(action, (int, np.integer)) and 0 <= action < ACTIONS, \
+            "%s is not a valid action" % repr(action)
+        action = int(action)
+        wave = self._wave
+        score = wave.getScore()
+        lives = wave.getLives()
+        frames = 0
+        done = wave.isComplete()
+        while frames < self._frameskip and not done:
+            wave.step(action, GAME_FRAME_TIME)
+            wave.setHit(False)
+            frames += 1
+            done = wave.isComplete()
+        lost = lives - wave.getLives()
+        reward = float(wave.getScore() - score - self._penalty * lost)
+        info = {'score': wave.getScore(), 'lives': wave.getLives(),
+                'livesLost': lost, 'frames': frames, 'won': wave.isWon()}
+        return self.observe(), reward, done, info
+
+
+    def observe(self):
+        """
+        Returns the observation of the wave as it is now.
+        """
+        wave = self._wave
+        aliens = wave.getFormation()
+        bolts = wave.getBoltBuffer()
+        n = bolts.count()
+        live = ~bolts.spent[:n]
+        ship = wave.getShipX()
+        boss = wave.getBossPosition()
+        return _observe(np.array([0.0 if ship is None else ship]),
+                        np.array([ship is not None]),
+                        np.array([wave.getLives()]),
+                        aliens.x[0, :1], aliens.y[0, :1], aliens.alive[None],
+                        np.array([boss is not None]),
+                        np.array([0.0 if boss is None else boss[0]]),
+                        np.array([0.0 if boss is None else boss[1]]),
+                        np.array([wave.getBossHealth()]),
+                        bolts.x[None, :n], bolts.y[None, :n],
+                        bolts.owner[None, :n], live[None])[0]
+
+
+    def render(self):
+        """
+        Returns a picture of the wave, without opening a window.
+
+        The picture is a uint8 array of shape (GAME_HEIGHT, GAME_WIDTH, 3)
+        with every object drawn as a filled box, top row first.
+        """
+        assert self._wave is not None, "reset must be called before render"
+        wave = self._wave
+        image = np.zeros((GAME_HEIGHT, GAME_WIDTH, 3), dtype=np.uint8)
+        _box(image, GAME_WIDTH/2, DEFENSE_LINE, GAME_WIDTH, 2, (255, 255, 255))
+        aliens = wave.getFormation()
+        for r, c in zip(*np.nonzero(aliens.alive)):
+            _box(image, aliens.x[r, c], aliens.y[r, c], ALIEN_WIDTH, ALIEN_HEIGHT,
+                 (0, 200, 0))
+        boss = wave.getBossPosition()
+        if boss is not None:
+            _box(image, boss[0], boss[1], ALIEN_WIDTH, ALIEN_HEIGHT, (200, 0, 200))
+        if wave.getShipX() is not None:
+            _box(image, wave.getShipX(), SHIP_BOTTOM + SHIP_HEIGHT/2,
+                 SHIP_WIDTH, SHIP_HEIGHT, (255, 255, 255))
+        bolts = wave.getBoltBuffer()
+        for i in range(bolts.count()):
+            if not bolts.spent[i]:
+                _box(image, bolts.x[i], bolts.y[i], BOLT_WIDTH, BOLT_HEIGHT,
+                     (255, 0, 0))
+        return image
+
+
+class VectorInvadersEnv(object):
+    """
+    A class to play many waves at once as a batch of learning environments.
+
+    Every call to step advances all the games together on a WaveBatch. A game
+    whose wave is over starts a new one right away. Its done flag is True for
+    that step, and its observation is the first one of the new wave. If a
+    wave ends partway through a step of several frames, that game plays the
+    remaining frames of the step in its new wave with no keys held, and they
+    do not count towards its reward.
+
+    Like WaveBatch, this cannot be used in stress mode: reset fails there.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _batch: the games being played
+    # Invariant: _batch is a WaveBatch object, or None before the first reset
+    #
+    # Attribute _games: the number of games
+    # Invariant: _games is an int > 0
+    #
+    # Attribute _frameskip: the number of frames each step lasts
+    # Invariant: _frameskip is an int > 0
+    #
+    # Attribute _penalty: the reward taken away for every life lost
+    # Invariant: _penalty is a number >= 0
+
+    def getBatch(self):
+        """Returns the games being played (a WaveBatch object), or None"""
+        return self._batch
+
+
+    def __init__(self, games, frameskip=1, lifePenalty=0):
+        """
+        Initializes a batch of environments. Call reset to start them.
+
+        Parameter games: the number of games to play at once
+        Precondition: games is an int > 0
+
+        Parameter frameskip: the number of frames each step lasts
+        Precondition: frameskip is an int > 0
+
+        Parameter lifePenalty: the reward taken away for every life lost
+        Precondition: lifePenalty is a number (int or float) >= 0
+        """
+        assert isinstance(games, int) and games > 0
+        assert isinstance(frameskip, int) and frameskip > 0
+        assert type(lifePenalty) in [int, float] and lifePenalty >= 0
+        self._batch = None
+        self._games = games
+        self._frameskip = frameskip
+        self._penalty = lifePenalty
+
+
+    def reset(self, seed=0):
+        """
+        Starts a new wave in every game and returns their observations.
+
+        The waves are seeded as described in WaveBatch.
+
+        Parameter seed: the seed of the first wave of game 0
+        Precondition: seed is an int
+        """
+        self._batch = WaveBatch(self._games, seed)
+        return self.observe()
+
+
+    def step(self, actions):
+        """
+        Plays one step in every game and returns (observations, rewards,
+        dones, info).
+
+        observations has one row per game, and rewards and dones one entry
+        per game. info is a dictionary of arrays with one entry per game:
+        'score', 'lives' and 'won' (at the end of the wave for the games
+        that are done), and 'livesLost' (during this step).
+
+        Parameter actions: the keys to hold down in each game
+        Precondition: actions is an int array of length games, with values
+        in 0..ACTIONS-1
+        """
+        assert self._batch is not None, "reset must be called before step"
+        batch = self._batch
+        actions = np.asarray(actions)
+        assert actions.shape == (self._games,), "%s is not one action per game" % repr(actions)
+        assert ((0 <= actions) & (actions < ACTIONS)).all(), "the actions are not valid"
+        rewards = np.zeros(self._games)
+        lost = np.zeros(self._games, dtype=int)
+        dones = np.zeros(self._games, dtype=bool)
+        for frame in range(self._frameskip):
+            score = batch.score.copy()
+            lives = batch.lives.copy()
+            done = batch.step(np.where(dones, 0, actions), GAME_FRAME_TIME)
+            scored = np.where(done, batch.getLastScores(), batch.score) - score
+            died = lives - np.where(done, batch.getLastLives(), batch.lives)
+            rewards += np.where(dones, 0, scored - self._penalty * died)
+            lost += np.where(dones, 0, died)
+            dones |= done
+        info = {'score': np.where(dones, batch.getLastScores(), batch.score),
+                'lives': np.where(dones, batch.getLastLives(), batch.lives),
+                'won': dones & batch.getLastWon(), 'livesLost': lost}
+        return self.observe(), rewards, dones, info
+
+
+    def observe(self):
+        """
+        Returns the observations of all games as they are now, one row per game.
+        """
+        b = self._batch
+        return _observe(b.shipX, b.shipOn, b.lives, b.formX, b.formY, b.alive,
+                        b.bossOn, b.bossX, b.bossY, b.bossHp,
+                        b.boltX, b.boltY, b.boltOwner, b.boltOn)
+
+
+# HIDDEN FUNCTIONS
+def _observe(shipX, shipOn, lives, formX, formY, alive, bossOn, bossX, bossY,
+             bossHp, boltX, boltY, boltOwner, boltOn):
+    """
+    Returns the observations of a batch of games, a float32 array with one
+    row of OBSERVATION_SIZE values per game.
+
+    Every parameter is an array whose first dimension is the game, laid out
+    as the attribute of the same name in WaveBatch.
+    """
+    games = len(shipX)
+    obs = np.zeros((games, OBSERVATION_SIZE), dtype=np.float32)
+    obs[:, 0] = shipX / GAME_WIDTH
+    obs[:, 1] = shipOn
+    obs[:, 2] = lives / SHIP_LIVES
+    obs[:, 3] = formX / GAME_WIDTH
+    obs[:, 4] = formY / GAME_HEIGHT
+    k = 5 + alive[0].size
+    obs[:, 5:k] = alive.reshape(games, -1)
+    obs[:, k] = bossOn
+    obs[:, k+1] = np.where(bossOn, bossX / GAME_WIDTH, 0)
+    obs[:, k+2] = np.where(bossOn, bossY / GAME_HEIGHT, 0)
+    obs[:, k+3] = np.where(bossOn, bossHp / BOSS_HEALTH, 0)
+    k += 4
+    if boltOn.shape[1] == 0:
+        return obs
+
+    player = boltOn & (boltOwner == BOLT_PLAYER)
+    has = player.any(axis=1)
+    slot = np.argmax(player, axis=1)
+    rows = np.arange(games)
+    obs[:, k] = has
+    obs[:, k+1] = np.where(has, boltX[rows, slot] / GAME_WIDTH, 0)
+    obs[:, k+2] = np.where(has, boltY[rows, slot] / GAME_HEIGHT, 0)
+    k += 3
+
+    alien = boltOn & (boltOwner == BOLT_ALIEN)
+    order = np.argsort(np.where(alien, boltY, np.inf), axis=1, kind='stable')
+    order = order[:, :ENV_ALIEN_BOLTS]
+    has = np.take_along_axis(alien, order, axis=1)
+    count = has.shape[1]
+    obs[:, k:k+3*count:3] = has
+    obs[:, k+1:k+3*count:3] = np.where(has, np.take_along_axis(boltX, order, axis=1) / GAME_WIDTH, 0)
+    obs[:, k+2:k+3*count:3] = np.where(has, np.take_along_axis(boltY, order, axis=1) / GAME_HEIGHT, 0)
+    return obs
+
+
+def _box(image, x, y, width, height, color):
+    """
+    Fills the box centered at (x, y) in image, clipped to the image.
+
+    Parameter image: the picture to draw in, top row first
+    Precondition: image is a uint8 array of shape (GAME_HEIGHT, GAME_WIDTH, 3)
+
+    Parameter x, y: the center of the box, in game coordinates
+    Precondition: x and y are numbers
+
+    Parameter width, height: the size of the box
+    Precondition: width and height are numbers > 0
+
+    Parameter color: the color to fill with
+    Precondition: color is a tuple of three ints in 0..255
+    """
+    left = max(int(round(x - width/2)), 0)
+    right = min(int(round(x + width/2)), GAME_WIDTH)
+    top = max(GAME_HEIGHT - int(round(y + height/2)), 0)
+    bottom = min(GAME_HEIGHT - int(round(y - height/2)), GAME_HEIGHT)
+    if left < right and top < bottom:
+        image[top:bottom, left:right] = color
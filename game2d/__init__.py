@@ -4,15 +4,29 @@ A module to support simple 2D game development.
 This module is a simple wrapper around Kivy interfaces to make 2D game development
 simpler for students in CS 1110.
 
+The modules that do not draw to a window (:class:`FrameProfiler`,
+:class:`MetricsWriter`, :class:`SoftView` and :class:`FrameCapture`) can be imported
+where Kivy is not installed.  The rest of the package then does not exist.
+
 Author: Ahmed Abdulla (aaa384)
 Date:   August 1, 2017 (Python 3 version)
 """
 
-from .gobject import GObject, GScene
-from .grectangle import GRectangle, GEllipse, GImage, GLabel
-from .gsprite import GSprite
-from .gtile import GTile
-from .gpath import GPath, GTriangle, GPolygon
-from .gview import GInput, GView
-from .sound import Sound, SoundLibrary
-from .app import GameApp
+from .profiler import FrameProfiler
+from .metrics import MetricsWriter
+from .softview import SoftView
+from .capture import FrameCapture
+
+try:
+    from .gobject import GObject, GScene
+    from .grectangle import GRectangle, GEllipse, GImage, GLabel
+    from .gsprite import GSprite
+    from .gtile import GTile
+    from .gpath import GPath, GTriangle, GPolygon
+    from .gview import GInput, GView
+    from .sound import Sound, SoundLibrary
+    from .app import GameApp
+except ModuleNotFoundError as e:
+    # Without Kivy, only the modules above (which need no window) are available
+    if not e.name.startswith('kivy'):
+        raise
@@ -24,10 +24,15 @@ import traceback
 import os.path
 import json
 import sys
+import time
 
 # Pull off the band aid
 import numpy as np
 
+from .profiler import FrameProfiler
+from .metrics import MetricsWriter
+from .capture import FrameCapture
+
 
 class GameApp(kivy.app.App):
     """
@@ -47,6 +52,30 @@ class GameApp(kivy.app.App):
 
     :meth:`draw`: This method draws all of the objects to the screen.  The only
     thing you should have in this method are calls to ``self.view.draw()``.
+
+    By default, :meth:`update` is called once per animation frame with the time since
+    the last frame.  If ``tickrate`` is set, the game instead runs at a fixed time step
+    of ``1/tickrate`` seconds, whatever the frame rate.  Every frame calls :meth:`update`
+    as many times as needed to catch up with the clock (but at most ``maxsteps`` times),
+    and then calls :meth:`draw` once.  The time left over is less than one step, and
+    ``alpha`` gives it as a fraction of a step, so that :meth:`draw` can interpolate
+    between the last two states of the game.
+
+    To find out where the time of a frame goes, set ``profiler`` to a
+    :class:`FrameProfiler` (or pass ``profile=True`` to the constructor).  Every frame
+    then records how long it spent clearing the view, reading the input, updating and
+    drawing.  If ``overlay`` is True, a summary is drawn on top of the game.
+
+    To log every frame to a file, set ``metrics`` to a :class:`MetricsWriter` (or pass
+    ``metrics=`` a file name to the constructor).  Each frame then writes a record with
+    its number, its ``dt``, its number of updates and the microseconds of each phase,
+    together with whatever :meth:`sample` returns, and the number of records dropped so
+    far because the disk could not keep up.
+
+    To record footage of the game, set ``capture`` to a :class:`FrameCapture` (or pass
+    ``capture=`` a directory or ``.rgba`` file name to the constructor).  Each time the
+    window is drawn, its pixels are read back and copied into the capture, which
+    encodes them on other threads, dropping frames rather than slowing the game.
     """
 
     # Class attribute for tracking textures (to reduce memory footprint)
@@ -74,7 +103,140 @@ class GameApp(kivy.app.App):
         self._fps = value
         Clock.schedule_interval(self._refresh, 1.0 / self._fps)
 
+    @property
+    def tickrate(self):
+        """
+        The number of fixed time steps to simulate per second
+
+        If this value is None, there is no fixed time step, and :meth:`update` is called
+        once per frame with the time since the last frame.  Otherwise :meth:`update` is
+        always called with ``dt`` equal to ``1/tickrate``, independent of the ``fps``.
+
+        **Invariant**: Must be None or an int or float > 0.
+        """
+        return self._tickrate
+
+    @tickrate.setter
+    def tickrate(self, value):
+        assert value is None or type(value) in [int, float], "value %s is not a number" % repr(value)
+        assert value is None or value > 0, "value %s is not positive" % repr(value)
+        self._tickrate = value
+        self._lag = 0.0
+        self._alpha = 1.0
+
+    @property
+    def maxsteps(self):
+        """
+        The most fixed time steps to simulate in a single frame
+
+        If the game falls further behind the clock than this, the extra time is dropped
+        rather than simulated, so that a slow frame cannot make the next one slower.
+        This value is ignored if ``tickrate`` is None.
+
+        **Invariant**: Must be an int > 0.
+        """
+        return self._maxsteps
+
+    @maxsteps.setter
+    def maxsteps(self, value):
+        assert type(value) == int, "value %s is not an int" % repr(value)
+        assert value > 0, "value %s is not positive" % repr(value)
+        self._maxsteps = value
+
+    @property
+    def profiler(self):
+        """
+        The profiler timing the phases of every frame
+
+        If this value is None, frames are not profiled.
+
+        **Invariant**: Must be None or a :class:`FrameProfiler`.
+        """
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, value):
+        assert value is None or isinstance(value, FrameProfiler), "value %s is not a profiler" % repr(value)
+        self._profiler = value
+
+    @property
+    def overlay(self):
+        """
+        Whether to draw the summary of the profiler on top of the game
+
+        The summary is brought up to date twice a second.  This value is ignored if
+        ``profiler`` is None.
+
+        **Invariant**: Must be a bool.
+        """
+        return self._overlay
+
+    @overlay.setter
+    def overlay(self, value):
+        assert type(value) == bool, "value %s is not a bool" % repr(value)
+        self._overlay = value
+        self._overlayLabel = None
+        self._overlayTime = 0
+
+    @property
+    def metrics(self):
+        """
+        The writer logging a record of every frame
+
+        If this value is None, frames are not logged.  A writer that is replaced is
+        closed, and if it failed, its error is logged.
+
+        **Invariant**: Must be None or a :class:`MetricsWriter`.
+        """
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, value):
+        assert value is None or isinstance(value, MetricsWriter), "value %s is not a writer" % repr(value)
+        old = getattr(self, '_metrics', None)
+        if old is not None and old is not value:
+            try:
+                old.close()
+            except Exception as e:
+                Logger.warning("GameApp: Could not log the frames to %s: %s" % (repr(old.path), e))
+        self._metrics = value
+
+    @property
+    def capture(self):
+        """
+        The capture recording every frame drawn to the window
+
+        If this value is None, frames are not recorded.  A capture that is replaced is
+        closed, and if it failed, its error is logged.
+
+        **Invariant**: Must be None or a :class:`FrameCapture`.
+        """
+        return self._capture
+
+    @capture.setter
+    def capture(self, value):
+        assert value is None or isinstance(value, FrameCapture), "value %s is not a capture" % repr(value)
+        old = getattr(self, '_capture', None)
+        if old is not None and old is not value:
+            try:
+                old.close()
+            except Exception as e:
+                Logger.warning("GameApp: Could not record the frames to %s: %s" % (repr(old.path), e))
+        self._capture = value
+
     # IMMUTABLE PROPERTIES
+    @property
+    def alpha(self):
+        """
+        How far the clock is past the last fixed time step, as a fraction of a step
+
+        Use this in :meth:`draw` to interpolate between the previous and the current
+        state of the game.  It is always 1.0 if ``tickrate`` is None.
+
+        **Invariant**: Must be a float in the range 0..1.
+        """
+        return self._alpha
+
     @property
     def width(self):
         """
@@ -296,6 +458,14 @@ class GameApp(kivy.app.App):
         w = keywords.pop("width", 0.0)
         h = keywords.pop("height", 0.0)
         f = keywords.pop("fps", 60.0)
+        t = keywords.pop("tickrate", None)
+        m = keywords.pop("maxsteps", 5)
+        p = keywords.pop("profile", False)
+        assert type(p) == bool, "profile %s is not a bool" % repr(p)
+        l = keywords.pop("metrics", None)
+        assert l is None or type(l) == str, "metrics %s is not a file name" % repr(l)
+        c = keywords.pop("capture", None)
+        assert c is None or type(c) == str, "capture %s is not a file name" % repr(c)
 
         assert type(w) in [int, float], "width %s is not a number" % repr(w)
         assert type(h) in [int, float], "height %s is not a number" % repr(h)
@@ -306,8 +476,16 @@ class GameApp(kivy.app.App):
         self._gheight = h
         Window.size = (self.width, self.height)
         Window.bind(on_request_close=self._exit)
+        Window.bind(on_flip=self._grab)
 
         self._fps = f
+        self.tickrate = t
+        self.maxsteps = m
+        self.profiler = FrameProfiler() if p else None
+        self.overlay = p
+        self.metrics = None if l is None else MetricsWriter(l)
+        self.capture = None if c is None else FrameCapture(c)
+        self._frame = 0
 
         x = keywords.pop("left", None)
         y = keywords.pop("top", None)
@@ -374,6 +552,8 @@ class GameApp(kivy.app.App):
             kivy.app.App.run(self)
         except BaseException as e:
             self.cleanup()
+            self.metrics = None
+            self.capture = None
             raise e
 
     def stop(self):
@@ -435,6 +615,19 @@ class GameApp(kivy.app.App):
         """
         pass
 
+    def sample(self):
+        """
+        Returns the game specific values to log for this frame.
+
+        This method is called once per frame, after :meth:`update` and :meth:`draw`,
+        but only if ``metrics`` is set.  Override it to add values such as the score to
+        the records of the frames.
+
+        :return: the values to log, by name
+        :rtype:  ``dict``
+        """
+        return {}
+
     # HIDDEN METHODS
     def _bootstrap(self, dt):
         """
@@ -454,16 +647,102 @@ class GameApp(kivy.app.App):
         Processes a single animation frame.
 
         This method a callback-proxy for the methods `update` and `draw`.  It handles
-        important issues behind the scenes, particularly with clearing the window.
+        important issues behind the scenes, particularly with clearing the window.  If
+        ``tickrate`` is set, it also runs the fixed time steps owed since the last frame.
 
         :param dt: time in seconds since last update
         :type dt:  ``int`` or ``float``
         """
+        clock = time.perf_counter_ns
+        start = clock()
         self.view.clear()
+        times = [clock() - start, 0, 0, 0, 0]
+        if self._tickrate is None:
+            self._step(dt, times)
+            steps = 1
+        else:
+            step = 1.0 / self._tickrate
+            self._lag += dt
+            steps = 0
+            while self._lag >= step and steps < self._maxsteps:
+                self._step(step, times)
+                self._lag -= step
+                steps += 1
+            if self._lag >= step:
+                self._lag %= step
+            self._alpha = self._lag / step
+        before = clock()
+        self.draw()
+        after = clock()
+        times[4] = after - before
+        if self._profiler is not None:
+            self._profiler.record(dt, steps, times, after - start)
+            if self._overlay:
+                self._drawOverlay(after)
+        if self._metrics is not None:
+            record = {'frame': self._frame, 'dt': dt, 'steps': steps,
+                      'dropped': self._metrics.dropped}
+            for i in range(len(times)):
+                record[FrameProfiler.PHASES[i]] = times[i] // 1000
+            record.update(self.sample())
+            self._metrics.write(record)
+        self._frame += 1
+
+    def _step(self, dt, times):
+        """
+        Runs a single update, adding the time of each of its phases to ``times``.
+
+        :param dt: time in seconds to pass to update
+        :type dt:  ``int`` or ``float``
+
+        :param times: the nanoseconds spent in each phase so far, in the order of
+            ``FrameProfiler.PHASES``
+        :type times:  ``list`` of ``int``
+        """
+        clock = time.perf_counter_ns
+        start = clock()
         self.input._prestep()
+        prestep = clock()
         self.update(dt)
+        update = clock()
         self.input._poststep()
-        self.draw()
+        poststep = clock()
+        times[1] += prestep - start
+        times[2] += update - prestep
+        times[3] += poststep - update
+
+    def _drawOverlay(self, now):
+        """
+        Draws the summary of the profiler on top of the game.
+
+        :param now: the current time, from ``time.perf_counter_ns``
+        :type now:  ``int``
+        """
+        from .grectangle import GLabel
+
+        if self._overlayLabel is None:
+            self._overlayLabel = GLabel(text='', font_size=14, fillcolor=None,
+                                        linecolor='yellow', x=self.width / 2,
+                                        y=self.height - 12)
+        if now - self._overlayTime >= 500000000:
+            self._overlayTime = now
+            self._overlayLabel.text = self._profiler.summary()
+        self._overlayLabel.draw(self.view)
+
+    def _grab(self, *args):
+        """
+        Reads the window back and copies it into the capture.
+
+        Kivy calls this method each time it has drawn the window, just before showing
+        it.  It does nothing if ``capture`` is None.
+        """
+        if self._capture is not None:
+            from kivy.graphics.opengl import glReadPixels, GL_RGBA, GL_UNSIGNED_BYTE
+
+            width, height = Window.size
+            data = glReadPixels(0, 0, width, height, GL_RGBA, GL_UNSIGNED_BYTE)
+            pixels = np.frombuffer(data, np.uint8).reshape(height, width, 4)
+            self._capture.grab(pixels[::-1], max(self._frame - 1, 0))
 
     def _setpaths(self):
         """
@@ -493,4 +772,6 @@ class GameApp(kivy.app.App):
         Prepare this application for shutdown
         """
         self.cleanup()
+        self.metrics = None
+        self.capture = None
         return False
@@ -0,0 +1,314 @@
+"""
+A frame capture pipeline for 2D game support.
+
+This module records the frames of a game, to attach footage to bug reports.  Taking
+a frame only copies its pixels into one of a ring of buffers allocated up front; the
+frames are encoded and written to disk by a pool of threads.  If the pool falls so far
+behind that every buffer is still waiting to be encoded, new frames are dropped and
+counted, so that capturing never slows down the game.
+
+Frames are RGBA NumPy arrays with the top row first, such as the frame of a
+:class:`SoftView` or the pixels read back from the window by :class:`GameApp`.  They
+are written either as a sequence of PNG files, or as a single file of raw RGBA video.
+
+Author: Ahmed Abdulla (aaa384)
+Date:   August 1, 2017 (Python 3 version)
+"""
+import concurrent.futures
+import os
+import queue
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+
+def encode_png(pixels, level=1):
+    """
+    Returns an RGBA image encoded as a PNG file.
+
+    :param pixels: the pixels of the image, top row first
+    :type pixels:  ``numpy.ndarray`` of shape (height, width, 4) and type ``uint8``
+
+    :param level: the zlib compression level, from 0 (none) to 9 (smallest)
+    :type level:  ``int``
+
+    :return: the contents of the PNG file
+    :rtype:  ``bytes``
+    """
+    height, width = pixels.shape[:2]
+    rows = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    rows[:, 1:] = pixels.reshape(height, width * 4)
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b"".join((b"\x89PNG\r\n\x1a\n", _chunk(b"IHDR", header),
+                     _chunk(b"IDAT", zlib.compress(rows.tobytes(), level)),
+                     _chunk(b"IEND", b"")))
+
+
+class FrameCapture(object):
+    """
+    A class to capture frames and encode them in the background.
+
+    If the path ends in ``.rgba``, the frames are written one after the other to that
+    file as raw RGBA pixels, top row first, in the order they were taken (frames that
+    were dropped are left out).  For example, ``ffmpeg`` can turn it into a video with
+
+        ffmpeg -f rawvideo -pix_fmt rgba -s WIDTHxHEIGHT -r 60 -i frames.rgba out.mp4
+
+    Otherwise the path is a directory, created if needed, and each frame is written to
+    it as a PNG file named after its frame number, so dropped frames show up as gaps.
+
+    The buffers are allocated by the first frame taken.  If a later frame has another
+    size (the window was resized), PNG files get a new ring of buffers of that size,
+    while raw video, which can only hold frames of one size, drops the frame.
+
+    If encoding or writing a frame fails, the first exception is kept in :attr:`error`
+    and raised again by :meth:`close`, and capturing goes on.  Call :meth:`close` when
+    done, to finish encoding the frames still waiting and close the files.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _path: the file or directory written to
+    # Invariant: _path is a string
+    #
+    # Attribute _raw: the file of raw video, if the frames are written as one
+    # Invariant: _raw is an open binary file, or None for PNG files
+    #
+    # Attribute _buffers: the ring of frame buffers
+    # Invariant: _buffers is a uint8 array of shape (slots, height, width, 4), or None
+    # before the first frame
+    #
+    # Attribute _free: the buffers that are not waiting to be encoded
+    # Invariant: _free is a queue.Queue of indices of _buffers
+    #
+    # Attribute _error: the first exception raised by an encoding task
+    # Invariant: _error is an Exception, or None if nothing went wrong
+    #
+    # Attribute _pool: the threads encoding the frames
+    # Invariant: _pool is a ThreadPoolExecutor, or None once the capture is closed
+    #
+    # Attribute _lock: the lock guarding the raw file, the count of frames written and
+    # the error
+    # Invariant: _lock is a threading.Lock
+    #
+    # Attribute _captured: the number of frames copied into a buffer
+    # Invariant: _captured is an int >= 0
+    #
+    # Attribute _dropped: the number of frames dropped because every buffer was in use
+    # Invariant: _dropped is an int >= 0
+    #
+    # Attribute _written: the number of frames encoded and written
+    # Invariant: _written is an int >= 0
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def path(self):
+        """
+        The file or directory written to.
+
+        **Invariant**: Must be a string.
+        """
+        return self._path
+
+    @property
+    def slots(self):
+        """
+        The number of frame buffers in the ring.
+
+        **Invariant**: Must be an int > 0.
+        """
+        return self._slots
+
+    @property
+    def captured(self):
+        """
+        The number of frames taken and queued to be encoded.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._captured
+
+    @property
+    def dropped(self):
+        """
+        The number of frames dropped because every buffer was waiting to be encoded.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._dropped
+
+    @property
+    def written(self):
+        """
+        The number of frames encoded and written so far.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._written
+
+    @property
+    def error(self):
+        """
+        The first exception raised while encoding or writing a frame, if any.
+
+        It is set as soon as the task encoding the frame has finished.
+
+        **Invariant**: Must be an Exception, or None if nothing went wrong.
+        """
+        return self._error
+
+    # BUILT-IN METHODS
+    def __init__(self, path, slots=8, workers=2):
+        """
+        Creates a capture and starts its threads.
+
+        :param path: a file name ending in ``.rgba`` for raw video, or a directory for
+            PNG files (files already there are replaced)
+        :type path:  ``str``
+
+        :param slots: the number of frames that can wait to be encoded
+        :type slots:  ``int`` > 0
+
+        :param workers: the number of threads encoding frames
+        :type workers:  ``int`` > 0
+        """
+        assert type(path) == str, "path %s is not a string" % repr(path)
+        assert type(slots) == int and slots > 0, "slots %s is not valid" % repr(slots)
+        assert type(workers) == int and workers > 0, "workers %s is not valid" % repr(workers)
+        self._path = path
+        if path.endswith('.rgba'):
+            self._raw = open(path, 'wb')
+        else:
+            self._raw = None
+            os.makedirs(path, exist_ok=True)
+        self._slots = slots
+        self._buffers = None
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self._error = None
+        self._pool = concurrent.futures.ThreadPoolExecutor(workers, 'FrameCapture')
+        self._lock = threading.Lock()
+        self._captured = 0
+        self._dropped = 0
+        self._written = 0
+
+    # PUBLIC METHODS
+    def grab(self, pixels, number=None):
+        """
+        Copies a frame into a free buffer and queues it to be encoded.
+
+        If no buffer is free, or the frame does not have the size of a raw video, the
+        frame is dropped.  This method never blocks, and the array may be changed as soon
+        as it returns.
+
+        :param pixels: the pixels of the frame, top row first
+        :type pixels:  ``numpy.ndarray`` of shape (height, width, 4) and type ``uint8``
+
+        :param number: the number of the frame, used to name PNG files (the number of
+            frames taken so far by default)
+        :type number:  ``int`` >= 0 or ``None``
+
+        :return: True if the frame was queued, False if it was dropped
+        :rtype:  ``bool``
+        """
+        assert self._pool is not None, "the capture is closed"
+        if self._buffers is None or pixels.shape != self._buffers.shape[1:]:
+            if self._buffers is not None and self._raw is not None:
+                self._dropped += 1
+                return False
+            # Frames still waiting keep the old buffers (see _encode)
+            self._buffers = np.empty((self._slots,) + pixels.shape, dtype=np.uint8)
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            self._dropped += 1
+            return False
+        np.copyto(self._buffers[slot], pixels)
+        if number is None:
+            number = self._captured + self._dropped
+        future = self._pool.submit(self._encode, self._buffers[slot], self._captured, number)
+        future.add_done_callback(lambda done: self._finish(done, slot))
+        self._captured += 1
+        return True
+
+    def close(self):
+        """
+        Encodes the frames still waiting, then closes the files.
+
+        This waits for the encoding threads to finish.  If encoding or writing a frame
+        failed, the first exception is raised here.  Closing a capture twice does nothing.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+            if self._raw is not None:
+                self._raw.close()
+            if self._error is not None:
+                raise self._error
+
+    # HIDDEN METHODS
+    def _finish(self, future, slot):
+        """
+        Keeps the exception of a finished encoding task, if it failed, then frees its
+        buffer.
+
+        This is called by the thread that ran the task, once the task is done, so looking
+        at its exception never blocks.  Only the first exception is kept.
+
+        :param future: the finished task
+        :type future:  ``concurrent.futures.Future``
+
+        :param slot: the index of the buffer of the task in the ring
+        :type slot:  ``int``
+        """
+        error = future.exception()
+        if error is not None:
+            with self._lock:
+                if self._error is None:
+                    self._error = error
+        self._free.put(slot)
+
+    def _encode(self, frame, index, number):
+        """
+        Writes a frame to disk.
+
+        This is run by the encoding threads.  Raw frames are written at the place given
+        by their index, so they end up in order whichever thread finishes first.  The
+        frame is passed in rather than looked up, as grab may have replaced the ring of
+        buffers since.
+
+        :param frame: the buffer holding the frame
+        :type frame:  ``numpy.ndarray``
+
+        :param index: the position of the frame among the frames taken
+        :type index:  ``int``
+
+        :param number: the number of the frame
+        :type number:  ``int``
+        """
+        if self._raw is None:
+            data = encode_png(frame)
+            with open(os.path.join(self._path, 'frame%06d.png' % number), 'wb') as f:
+                f.write(data)
+            with self._lock:
+                self._written += 1
+        else:
+            with self._lock:
+                self._raw.seek(index * frame.nbytes)
+                self._raw.write(frame.data)
+                self._written += 1
+
+
+# HIDDEN FUNCTIONS
+def _chunk(kind, body):
+    """
+    Returns a chunk of a PNG file, with its length and checksum.
+
+    :param kind: the type of the chunk
+    :type kind:  ``bytes`` of length 4
+
+    :param body: the data of the chunk
+    :type body:  ``bytes``
+    """
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
@@ -13,6 +13,7 @@ from kivy.graphics import *
 from kivy.graphics.instructions import *
 from introcs.geom import Point2, Matrix
 import introcs
+from .softview import SoftView
 
 
 def is_color(c):
@@ -663,11 +664,15 @@ class GObject(object):
         """
         Draws this shape in the provide view.
 
-        Ideally, the view should be the one provided by :class:`GameApp`.
+        Ideally, the view should be the one provided by :class:`GameApp`.  The view may
+        also be a :class:`SoftView`, which renders the shape without Kivy.
 
         :param view: view to draw to
-        :type view:  :class:`GView`
+        :type view:  :class:`GView` or :class:`SoftView`
         """
+        if isinstance(view, SoftView):
+            view.draw(self)
+            return
         try:
             view.draw(self._cache)
         except:
@@ -828,6 +833,22 @@ class GScene(GObject):
 
         return None
 
+    def remove(self, child):
+        """
+        Removes a single child from this scene.
+
+        Unlike assigning to the attribute ``children``, this does not rebuild the
+        drawing cache.  Only the instructions of ``child`` are taken out of it, and the
+        other children keep theirs.  Finding ``child`` in the list of children and in
+        the drawing cache still takes time linear in the number of children.
+
+        :param child: the child to remove
+        :type child:  :class:`GObject` in this scene
+        """
+        assert child in self._children, "%s is not in this scene" % repr(child)
+        self._children.remove(child)
+        self._cache.remove(child._cache)
+
     # HIDDEN METHODS
     def _reset(self):
         """
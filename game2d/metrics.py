@@ -0,0 +1,207 @@
+"""
+A per-frame metrics log for 2D game support.
+
+This module writes one record per animation frame to a file, as lines of JSON or as
+CSV.  The game loop never waits for the disk: records are handed to a background
+thread through a bounded queue, and if the queue is full the record is dropped and
+counted instead.
+
+The writer only uses the standard library, so it can also log a game loop that runs
+without a window.
+
+Author: Ahmed Abdulla (aaa384)
+Date:   August 1, 2017 (Python 3 version)
+"""
+import csv
+import json
+import queue
+import threading
+
+
+class MetricsWriter(object):
+    """
+    A class to stream records to a file from a background thread.
+
+    Each record is a dictionary.  If the file name ends in ``.csv``, the records are
+    written as CSV, with the keys of the first record as the columns (later records
+    leave out the columns they do not have, and their other keys are ignored).
+    Otherwise each record is written as a line of JSON.  NumPy scalars in a record
+    are written as the plain Python numbers they hold.
+
+    If the thread fails (the file cannot be opened, or a record cannot be written), it
+    stops writing but keeps emptying the queue, so :meth:`write` still never blocks.
+    The exception is kept in :attr:`error`, and raised again by :meth:`close`.
+
+    Call :meth:`close` when done, to write the records still queued and close the file.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _queue: the records waiting to be written
+    # Invariant: _queue is a queue.Queue with a maximum size
+    #
+    # Attribute _thread: the thread writing the records
+    # Invariant: _thread is a threading.Thread, or None once the writer is closed
+    #
+    # Attribute _path: the file written to
+    # Invariant: _path is a string
+    #
+    # Attribute _dropped: the number of records dropped because the queue was full
+    # Invariant: _dropped is an int >= 0
+    #
+    # Attribute _written: the number of records written to the file
+    # Invariant: _written is an int >= 0
+    #
+    # Attribute _error: the exception that stopped the writer thread
+    # Invariant: _error is an Exception, or None if the thread has not failed
+
+    # The object put in the queue to stop the writer thread
+    _STOP = object()
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def path(self):
+        """
+        The file written to.
+
+        **Invariant**: Must be a string.
+        """
+        return self._path
+
+    @property
+    def dropped(self):
+        """
+        The number of records dropped because the queue was full.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._dropped
+
+    @property
+    def written(self):
+        """
+        The number of records written to the file so far.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._written
+
+    @property
+    def error(self):
+        """
+        The exception that stopped the writer thread, if any.
+
+        Once the thread has failed, the records still sent to :meth:`write` are thrown
+        away.
+
+        **Invariant**: Must be an Exception, or None if nothing went wrong.
+        """
+        return self._error
+
+    # BUILT-IN METHODS
+    def __init__(self, path, capacity=1024):
+        """
+        Creates a writer and starts its thread.  The file is replaced if it exists.
+
+        :param path: the file to write to
+        :type path:  ``str``
+
+        :param capacity: the most records that can wait to be written
+        :type capacity:  ``int`` > 0
+        """
+        assert type(path) == str, "path %s is not a string" % repr(path)
+        assert type(capacity) == int and capacity > 0, "capacity %s is not valid" % repr(capacity)
+        self._path = path
+        self._queue = queue.Queue(capacity)
+        self._dropped = 0
+        self._written = 0
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='MetricsWriter',
+                                        daemon=True)
+        self._thread.start()
+
+    # PUBLIC METHODS
+    def write(self, record):
+        """
+        Queues a record to be written, or drops it if the queue is full.
+
+        This method never blocks.
+
+        :param record: the record to write
+        :type record:  ``dict`` of values that can be written as JSON
+
+        :return: True if the record was queued, False if it was dropped
+        :rtype:  ``bool``
+        """
+        assert self._thread is not None, "the writer is closed"
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self._dropped += 1
+            return False
+
+    def close(self):
+        """
+        Writes the records still queued, then closes the file.
+
+        This waits for the writer thread to finish.  If the thread failed, the exception
+        that stopped it is raised here.  Closing a writer twice does nothing.
+        """
+        if self._thread is not None:
+            # A thread that died would never take STOP out of a full queue
+            while self._thread.is_alive():
+                try:
+                    self._queue.put(self._STOP, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            self._thread.join()
+            self._thread = None
+            if self._error is not None:
+                raise self._error
+
+    # HIDDEN METHODS
+    def _run(self):
+        """
+        Writes records to the file until the writer is closed.
+
+        This is the body of the writer thread.  If writing fails, the exception is kept
+        in _error and the rest of the queue is thrown away, up to the STOP.
+        """
+        try:
+            with open(self._path, 'w', newline='') as f:
+                table = None
+                while True:
+                    record = self._queue.get()
+                    if record is self._STOP:
+                        return
+                    if not self._path.endswith('.csv'):
+                        f.write(json.dumps(record, default=_plain) + '\n')
+                    else:
+                        if table is None:
+                            table = csv.DictWriter(f, fieldnames=list(record),
+                                                   extrasaction='ignore')
+                            table.writeheader()
+                        table.writerow(record)
+                    self._written += 1
+                    if self._queue.empty():
+                        f.flush()
+        except Exception as e:
+            self._error = e
+        while self._queue.get() is not self._STOP:
+            pass
+
+
+# HIDDEN FUNCTIONS
+def _plain(value):
+    """
+    Returns a value that JSON cannot write as one it can.
+
+    This is the ``default`` of :func:`json.dumps`, and turns NumPy scalars (or anything
+    else with an ``item`` method) into Python numbers.
+
+    :param value: the value to convert
+    :type value:  any
+    """
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError("%s cannot be written as JSON" % repr(value))
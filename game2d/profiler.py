@@ -0,0 +1,178 @@
+"""
+A frame profiler for 2D game support.
+
+This module times the phases of every animation frame of a :class:`GameApp`: clearing
+the view, reading the input, updating the game and drawing it.  The times are kept in
+preallocated arrays, so recording a frame never allocates memory, and only the most
+recent frames are kept.
+
+The profiler only uses the standard library and numpy, so it can also be used to time
+a game loop that runs without a window.
+
+Author: Ahmed Abdulla (aaa384)
+Date:   August 1, 2017 (Python 3 version)
+"""
+import numpy as np
+
+
+class FrameProfiler(object):
+    """
+    A class to record how long each phase of a frame takes.
+
+    The profiler is a ring buffer of the last ``capacity`` frames.  For each frame it
+    keeps the time spent in each phase of :data:`PHASES` and in the whole frame (all in
+    nanoseconds, as measured by ``time.perf_counter_ns``), the ``dt`` that Kivy passed
+    to the frame, and the number of fixed time steps the frame ran.
+
+    Use :meth:`stats` or :meth:`summary` to get percentiles over the frames kept.  To
+    turn on profiling in a game, set the attribute ``profiler`` of :class:`GameApp`.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _times: the time of each phase of each frame, and of the whole frame
+    # Invariant: _times is an int64 array of shape (capacity, len(PHASES)+1)
+    #
+    # Attribute _dts: the dt of each frame
+    # Invariant: _dts is a float array of length capacity
+    #
+    # Attribute _steps: the number of times each frame called update
+    # Invariant: _steps is an int array of length capacity
+    #
+    # Attribute _frames: the number of frames recorded since the last reset
+    # Invariant: _frames is an int >= 0; frame i is in row i % capacity
+
+    # The phases of a frame, in the order they happen
+    PHASES = ('clear', 'prestep', 'update', 'poststep', 'draw')
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def capacity(self):
+        """
+        The number of frames kept.
+
+        **Invariant**: Must be an int > 0.
+        """
+        return len(self._dts)
+
+    @property
+    def frames(self):
+        """
+        The number of frames recorded since the last reset, including those dropped.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._frames
+
+    # BUILT-IN METHODS
+    def __init__(self, capacity=600):
+        """
+        Creates a new, empty profiler.
+
+        :param capacity: the number of frames to keep
+        :type capacity:  ``int`` > 0
+        """
+        assert type(capacity) == int and capacity > 0, "capacity %s is not valid" % repr(capacity)
+        self._times = np.zeros((capacity, len(self.PHASES) + 1), dtype=np.int64)
+        self._dts = np.zeros(capacity)
+        self._steps = np.zeros(capacity, dtype=np.int32)
+        self._frames = 0
+
+    # PUBLIC METHODS
+    def record(self, dt, steps, times, total):
+        """
+        Records one frame, replacing the oldest one if the profiler is full.
+
+        :param dt: the time in seconds that Kivy passed to the frame
+        :type dt:  ``int`` or ``float``
+
+        :param steps: the number of times the frame called update
+        :type steps:  ``int`` >= 0
+
+        :param times: the nanoseconds spent in each phase, in the order of :data:`PHASES`
+        :type times:  ``list`` of ``int``
+
+        :param total: the nanoseconds spent in the whole frame
+        :type total:  ``int``
+        """
+        row = self._frames % len(self._dts)
+        line = self._times[row]
+        for i in range(len(times)):
+            line[i] = times[i]
+        line[-1] = total
+        self._dts[row] = dt
+        self._steps[row] = steps
+        self._frames += 1
+
+    def reset(self):
+        """
+        Forgets every frame recorded so far.
+        """
+        self._frames = 0
+
+    def count(self):
+        """
+        :return: the number of frames kept (at most ``capacity``)
+        :rtype:  ``int``
+        """
+        return min(self._frames, len(self._dts))
+
+    def times(self, phase):
+        """
+        :return: a copy of the times of ``phase`` in the frames kept, in nanoseconds
+        :rtype:  ``numpy.ndarray``
+
+        :param phase: a name in :data:`PHASES`, or 'frame' for the whole frame
+        :type phase:  ``str``
+        """
+        column = len(self.PHASES) if phase == 'frame' else self.PHASES.index(phase)
+        return self._times[:self.count(), column].copy()
+
+    def dts(self):
+        """
+        :return: a copy of the dt that Kivy passed to each frame kept, in seconds
+        :rtype:  ``numpy.ndarray``
+        """
+        return self._dts[:self.count()].copy()
+
+    def stats(self):
+        """
+        Computes percentiles over the frames kept.
+
+        The result maps each phase (and 'frame' for the whole frame, and 'dt' for the
+        time Kivy passed to the frame) to a dictionary with the keys 'p50', 'p95', 'p99'
+        and 'max', all in milliseconds.  It also maps 'frames' to the number of frames
+        kept, and 'steps' to the average number of updates per frame.  It is empty if
+        no frame was recorded.
+
+        :return: the percentiles of every phase
+        :rtype:  ``dict``
+        """
+        n = self.count()
+        if n == 0:
+            return {}
+        result = {'frames': n, 'steps': float(self._steps[:n].mean())}
+        names = self.PHASES + ('frame',)
+        millis = self._times[:n] / 1e6
+        cuts = np.percentile(millis, (50, 95, 99), axis=0)
+        peaks = millis.max(axis=0)
+        for i in range(len(names)):
+            result[names[i]] = {'p50': float(cuts[0, i]), 'p95': float(cuts[1, i]),
+                                'p99': float(cuts[2, i]), 'max': float(peaks[i])}
+        dts = self._dts[:n] * 1000
+        cuts = np.percentile(dts, (50, 95, 99))
+        result['dt'] = {'p50': float(cuts[0]), 'p95': float(cuts[1]),
+                        'p99': float(cuts[2]), 'max': float(dts.max())}
+        return result
+
+    def summary(self):
+        """
+        :return: a one line summary of :meth:`stats`, fit for an on-screen overlay
+        :rtype:  ``str``
+        """
+        stats = self.stats()
+        if not stats:
+            return 'no frames'
+        parts = []
+        for name in ('update', 'draw', 'frame', 'dt'):
+            parts.append('%s %.1f/%.1f/%.1f' % (name, stats[name]['p50'],
+                         stats[name]['p99'], stats[name]['max']))
+        return '  '.join(parts) + ' ms (p50/p99/max)'
@@ -0,0 +1,733 @@
+"""
+A software renderer for 2D game support.
+
+This module contains :class:`SoftView`, a view that draws :class:`GObject` instances
+into an RGBA NumPy array instead of a Kivy window.  It needs no GPU and no display,
+so it can render frames for screenshot tests, or for agents that play from pixels,
+on machines without either.
+
+Images are read from the **Images** directory by a small PNG decoder in this module
+(8-bit PNG files that are not interlaced, which is what the game ships), and are kept
+decoded and scaled, so blitting a sprite is a single array operation.
+
+The renderer draws the shapes the game uses: rectangles, ellipses, images, sprite
+strips, tiles, paths, polygons and scenes.  It has no font engine, so a label only
+draws its background and border, not its text.  Rotation is ignored, and scaling is
+applied to the size of a shape only.
+
+Only :meth:`SoftView.draw` needs the :class:`GObject` classes, and so Kivy.  The
+drawing methods such as :meth:`SoftView.rect` and :meth:`SoftView.blit`, and
+:func:`decode_png`, only need NumPy, and this module can be imported where Kivy is
+not installed.
+
+Author: Ahmed Abdulla (aaa384)
+Date:   August 1, 2017 (Python 3 version)
+"""
+import collections
+import os
+import struct
+import zlib
+
+import numpy as np
+
+
+def decode_png(path):
+    """
+    Reads a PNG file into an RGBA array.
+
+    The result has one row per row of the image, top row first.  Only 8-bit images
+    that are not interlaced are supported (grayscale, RGB, palette, grayscale with
+    alpha and RGBA).
+
+    :param path: the PNG file to read
+    :type path:  ``str``
+
+    :return: the pixels of the image
+    :rtype:  ``numpy.ndarray`` of shape (height, width, 4) and type ``uint8``
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data[:8] == b"\x89PNG\r\n\x1a\n", "%s is not a PNG file" % repr(path)
+    pos = 8
+    chunks = []
+    palette = None
+    alpha = None
+    while pos < len(data):
+        size, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + size]
+        if kind == b"IHDR":
+            width, height, depth, color, _, _, interlace = struct.unpack(">IIBBBBB", body)
+        elif kind == b"PLTE":
+            palette = np.frombuffer(body, np.uint8).reshape(-1, 3)
+        elif kind == b"tRNS":
+            alpha = np.frombuffer(body, np.uint8)
+        elif kind == b"IDAT":
+            chunks.append(body)
+        elif kind == b"IEND":
+            break
+        pos += 12 + size
+    assert depth == 8 and interlace == 0, "%s is not an 8-bit, non-interlaced PNG" % repr(path)
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[color]
+    raw = zlib.decompress(b"".join(chunks))
+    pixels = _unfilter(raw, width, height, channels)
+
+    if color == 0:
+        pixels = np.repeat(pixels, 3, axis=2)
+    elif color == 3:
+        index = pixels[:, :, 0]
+        table = np.full((256, 4), 255, dtype=np.uint8)
+        table[:len(palette), :3] = palette
+        if alpha is not None:
+            table[:len(alpha), 3] = alpha
+        return table[index]
+    elif color == 4:
+        pixels = np.concatenate((np.repeat(pixels[:, :, :1], 3, axis=2), pixels[:, :, 1:]),
+                                axis=2)
+    if pixels.shape[2] == 3:
+        opaque = np.full(pixels.shape[:2] + (1,), 255, dtype=np.uint8)
+        pixels = np.concatenate((pixels, opaque), axis=2)
+    return pixels
+
+
+class SoftView(object):
+    """
+    A view that renders into an RGBA NumPy array.
+
+    Use this view in place of :class:`GView`: clear it, then call the ``draw`` method
+    of each :class:`GObject` with this view.  The finished frame is the attribute
+    ``frame``, with the top row of the window in row 0.  The array is reused from frame
+    to frame, so call :meth:`snapshot` to keep a frame.
+
+    Coordinates are those of :class:`GameApp`: the origin is the bottom left corner,
+    and ``y`` grows upwards.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _frame: the pixels of the view
+    # Invariant: _frame is a uint8 array of shape (height, width, 4)
+    #
+    # Attribute _images: the directory the images are read from
+    # Invariant: _images is a string
+    #
+    # Attribute _origin: where the origin of the scene being drawn is in the view
+    # Invariant: _origin is a pair of floats
+
+    # The decoded images, by file name (shared by every view)
+    DECODED = {}
+
+    # The scaled images ready to blit, by (file name, frame, width, height, tint), with
+    # the least recently used first (shared by every view)
+    SCALED = collections.OrderedDict()
+
+    # The most scaled images kept; the least recently used one is dropped beyond that
+    SCALED_LIMIT = 256
+
+    # IMMUTABLE PROPERTIES
+    @property
+    def width(self):
+        """
+        The width of the view in pixels.
+
+        **Invariant**: Must be an int > 0.
+        """
+        return self._frame.shape[1]
+
+    @property
+    def height(self):
+        """
+        The height of the view in pixels.
+
+        **Invariant**: Must be an int > 0.
+        """
+        return self._frame.shape[0]
+
+    @property
+    def frame(self):
+        """
+        The pixels drawn so far, top row first.
+
+        **Invariant**: Must be a ``uint8`` array of shape (height, width, 4).
+        """
+        return self._frame
+
+    # BUILT-IN METHODS
+    def __init__(self, width, height, images=None):
+        """
+        Creates a new view, cleared to black.
+
+        :param width: the width of the view in pixels
+        :type width:  ``int`` > 0
+
+        :param height: the height of the view in pixels
+        :type height:  ``int`` > 0
+
+        :param images: the directory to read images from (the **Images** directory of
+            the game by default)
+        :type images:  ``str`` or ``None``
+        """
+        assert type(width) == int and width > 0, "width %s is not valid" % repr(width)
+        assert type(height) == int and height > 0, "height %s is not valid" % repr(height)
+        if images is None:
+            try:
+                from .app import GameApp
+
+                images = getattr(GameApp, "images", "Images")
+            except ImportError:  # No Kivy, so no game to take the directory from
+                images = "Images"
+        self._images = images
+        self._frame = np.zeros((height, width, 4), dtype=np.uint8)
+        self._origin = (0.0, 0.0)
+        self.clear()
+
+    # PUBLIC METHODS
+    def clear(self, color=(0, 0, 0, 255)):
+        """
+        Fills the whole view with a color.
+
+        :param color: the color as RGBA values in 0..255
+        :type color:  ``tuple`` of 4 ``int``
+        """
+        self._frame[:, :] = color
+
+    def snapshot(self):
+        """
+        :return: a copy of the current frame
+        :rtype:  ``numpy.ndarray``
+        """
+        return self._frame.copy()
+
+    def draw(self, obj):
+        """
+        Renders a :class:`GObject` into this view.
+
+        You do not need to call this method.  Calling ``obj.draw(view)`` does it for you.
+
+        :param obj: the object to draw
+        :type obj:  :class:`GObject`
+        """
+        from .gobject import GScene
+        from .grectangle import GEllipse, GImage, GLabel, GRectangle
+        from .gsprite import GSprite
+        from .gtile import GTile
+        from .gpath import GPath
+
+        x, y = self._origin[0] + obj.x, self._origin[1] + obj.y
+        if isinstance(obj, GScene):
+            origin = self._origin
+            self._origin = (x, y)
+            try:
+                for child in obj.children:
+                    child.draw(self)
+            finally:
+                self._origin = origin
+            return
+        if isinstance(obj, GPath):
+            self._drawPath(obj, x, y, type(obj) != GPath)
+            return
+
+        scale = obj.scale
+        width, height = obj.width * scale[0], obj.height * scale[1]
+        if isinstance(obj, GTile):
+            self.tile(obj.source, x, y, width, height)
+        elif isinstance(obj, GSprite):
+            self.blit(obj.source, x, y, width, height, obj.fillcolor, obj.frame, obj.format)
+        elif isinstance(obj, GImage):
+            self.blit(obj.source, x, y, width, height, obj.fillcolor)
+        elif isinstance(obj, GEllipse):
+            if obj.fillcolor is not None:
+                self.ellipse(x, y, width, height, obj.fillcolor)
+        elif obj.fillcolor is not None:
+            self.rect(x, y, width, height, obj.fillcolor)
+        if isinstance(obj, GRectangle) and not isinstance(obj, (GEllipse, GLabel)) and \
+                obj.linecolor is not None and obj.linewidth > 0:
+            self.border(x, y, width, height, obj.linewidth, obj.linecolor)
+
+    def rect(self, x, y, width, height, color):
+        """
+        Fills a rectangle.
+
+        :param x: the x-coordinate of the center
+        :type x:  ``int`` or ``float``
+
+        :param y: the y-coordinate of the center
+        :type y:  ``int`` or ``float``
+
+        :param width: the width of the rectangle
+        :type width:  ``int`` or ``float``
+
+        :param height: the height of the rectangle
+        :type height:  ``int`` or ``float``
+
+        :param color: the color, as RGBA values in 0..1
+        :type color:  ``list`` of 4 ``float``
+        """
+        box = self._box(x, y, width, height)
+        if box is not None:
+            r0, r1, c0, c1 = box
+            self._fill(self._frame[r0:r1, c0:c1], color)
+
+    def border(self, x, y, width, height, linewidth, color):
+        """
+        Draws the outline of a rectangle, centered on its edges.
+
+        :param x: the x-coordinate of the center
+        :type x:  ``int`` or ``float``
+
+        :param y: the y-coordinate of the center
+        :type y:  ``int`` or ``float``
+
+        :param width: the width of the rectangle
+        :type width:  ``int`` or ``float``
+
+        :param height: the height of the rectangle
+        :type height:  ``int`` or ``float``
+
+        :param linewidth: the width of the outline
+        :type linewidth:  ``int`` or ``float`` > 0
+
+        :param color: the color, as RGBA values in 0..1
+        :type color:  ``list`` of 4 ``float``
+        """
+        left, right = x - width / 2.0, x + width / 2.0
+        bottom, top = y - height / 2.0, y + height / 2.0
+        self.rect(x, top, width + linewidth, linewidth, color)
+        self.rect(x, bottom, width + linewidth, linewidth, color)
+        self.rect(left, y, linewidth, height - linewidth, color)
+        self.rect(right, y, linewidth, height - linewidth, color)
+
+    def ellipse(self, x, y, width, height, color):
+        """
+        Fills an ellipse.
+
+        :param x: the x-coordinate of the center
+        :type x:  ``int`` or ``float``
+
+        :param y: the y-coordinate of the center
+        :type y:  ``int`` or ``float``
+
+        :param width: the width of the ellipse
+        :type width:  ``int`` or ``float``
+
+        :param height: the height of the ellipse
+        :type height:  ``int`` or ``float``
+
+        :param color: the color, as RGBA values in 0..1
+        :type color:  ``list`` of 4 ``float``
+        """
+        box = self._box(x, y, width, height)
+        if box is None:
+            return
+        r0, r1, c0, c1 = box
+        px, py = self._centers(r0, r1, c0, c1)
+        mask = ((px - x) / (width / 2.0)) ** 2 + ((py - y) / (height / 2.0)) ** 2 <= 1
+        self._fill(self._frame[r0:r1, c0:c1], color, mask)
+
+    def line(self, x0, y0, x1, y1, linewidth, color):
+        """
+        Draws a straight line with square ends.
+
+        :param x0: the x-coordinate of the start
+        :type x0:  ``int`` or ``float``
+
+        :param y0: the y-coordinate of the start
+        :type y0:  ``int`` or ``float``
+
+        :param x1: the x-coordinate of the end
+        :type x1:  ``int`` or ``float``
+
+        :param y1: the y-coordinate of the end
+        :type y1:  ``int`` or ``float``
+
+        :param linewidth: the width of the line
+        :type linewidth:  ``int`` or ``float`` > 0
+
+        :param color: the color, as RGBA values in 0..1
+        :type color:  ``list`` of 4 ``float``
+        """
+        half = max(linewidth, 1) / 2.0
+        box = self._box((x0 + x1) / 2.0, (y0 + y1) / 2.0,
+                        abs(x1 - x0) + 2 * half, abs(y1 - y0) + 2 * half)
+        if box is None:
+            return
+        r0, r1, c0, c1 = box
+        px, py = self._centers(r0, r1, c0, c1)
+        dx, dy = x1 - x0, y1 - y0
+        length = (dx * dx + dy * dy) ** 0.5
+        if length == 0:
+            mask = (abs(px - x0) <= half) & (abs(py - y0) <= half)
+        else:
+            along = ((px - x0) * dx + (py - y0) * dy) / length
+            across = ((px - x0) * dy - (py - y0) * dx) / length
+            mask = (along >= -half) & (along <= length + half) & (abs(across) <= half)
+        self._fill(self._frame[r0:r1, c0:c1], color, mask)
+
+    def polygon(self, points, color):
+        """
+        Fills a polygon, using the even-odd rule.
+
+        :param points: the corners of the polygon
+        :type points:  ``list`` of (x, y) pairs, at least 3
+
+        :param color: the color, as RGBA values in 0..1
+        :type color:  ``list`` of 4 ``float``
+        """
+        xs = np.array([p[0] for p in points], dtype=float)
+        ys = np.array([p[1] for p in points], dtype=float)
+        left, right, bottom, top = xs.min(), xs.max(), ys.min(), ys.max()
+        box = self._box((left + right) / 2.0, (bottom + top) / 2.0, right - left, top - bottom)
+        if box is None:
+            return
+        r0, r1, c0, c1 = box
+        px, py = self._centers(r0, r1, c0, c1)
+        inside = np.zeros((r1 - r0, c1 - c0), dtype=bool)
+        for i in range(len(xs)):
+            ax, ay, bx, by = xs[i - 1], ys[i - 1], xs[i], ys[i]
+            if ay == by:
+                continue
+            crosses = (ay > py) != (by > py)
+            cut = ax + (py - ay) * (bx - ax) / (by - ay)
+            inside ^= crosses & (px < cut)
+        self._fill(self._frame[r0:r1, c0:c1], color, inside)
+
+    def blit(self, source, x, y, width, height, tint=None, frame=0, format=(1, 1)):
+        """
+        Draws an image (or one frame of a sprite strip) scaled to a rectangle.
+
+        The image is blended over what is already drawn, using its alpha channel.
+
+        :param source: the file name of the image, in the images directory
+        :type source:  ``str``
+
+        :param x: the x-coordinate of the center
+        :type x:  ``int`` or ``float``
+
+        :param y: the y-coordinate of the center
+        :type y:  ``int`` or ``float``
+
+        :param width: the width to draw the image at
+        :type width:  ``int`` or ``float``
+
+        :param height: the height to draw the image at
+        :type height:  ``int`` or ``float``
+
+        :param tint: a color to multiply the image by, as RGBA values in 0..1
+        :type tint:  ``list`` of 4 ``float`` or ``None``
+
+        :param frame: the frame of the strip to draw
+        :type frame:  ``int`` >= 0
+
+        :param format: the grid of frames in the strip, as (rows, columns)
+        :type format:  ``tuple`` of 2 ``int``
+        """
+        box = self._box(x, y, width, height)
+        if box is None or source is None:
+            return
+        r0, r1, c0, c1 = box
+        full = self._box(x, y, width, height, clip=False)
+        tint = None if tint is None else tuple(tint)
+        key = (source, frame, full[1] - full[0], full[3] - full[2], tint)
+        image = self._lookup(key)
+        if image is None:
+            image = self._scale(source, frame, format, full[3] - full[2],
+                                full[1] - full[0], tint)
+            self._remember(key, image)
+        rows = slice(r0 - full[0], r1 - full[0])
+        cols = slice(c0 - full[2], c1 - full[2])
+        self._blend(self._frame[r0:r1, c0:c1], image, rows, cols)
+
+    def tile(self, source, x, y, width, height):
+        """
+        Fills a rectangle by repeating an image at its own size.
+
+        The first copy of the image is at the bottom left corner of the rectangle, as
+        in :class:`GTile`.
+
+        :param source: the file name of the image, in the images directory
+        :type source:  ``str``
+
+        :param x: the x-coordinate of the center
+        :type x:  ``int`` or ``float``
+
+        :param y: the y-coordinate of the center
+        :type y:  ``int`` or ``float``
+
+        :param width: the width of the rectangle
+        :type width:  ``int`` or ``float``
+
+        :param height: the height of the rectangle
+        :type height:  ``int`` or ``float``
+        """
+        box = self._box(x, y, width, height)
+        if box is None or source is None:
+            return
+        r0, r1, c0, c1 = box
+        full = self._box(x, y, width, height, clip=False)
+        key = (source, 'tile', full[1] - full[0], full[3] - full[2], None)
+        image = self._lookup(key)
+        if image is None:
+            pixels = self._decode(source)
+            reps = (-(-(full[1] - full[0]) // pixels.shape[0]),
+                    -(-(full[3] - full[2]) // pixels.shape[1]), 1)
+            pixels = np.tile(pixels, reps)[-(full[1] - full[0]):, :full[3] - full[2]]
+            image = self._prepare(pixels)
+            self._remember(key, image)
+        rows = slice(r0 - full[0], r1 - full[0])
+        cols = slice(c0 - full[2], c1 - full[2])
+        self._blend(self._frame[r0:r1, c0:c1], image, rows, cols)
+
+    # HIDDEN METHODS
+    def _drawPath(self, path, x, y, filled):
+        """
+        Draws the lines of a path, and fills it if it is a closed shape.
+
+        :param path: the shape to draw
+        :type path:  :class:`GPath`
+
+        :param x: the x-coordinate of the origin of the shape in the view
+        :type x:  ``int`` or ``float``
+
+        :param y: the y-coordinate of the origin of the shape in the view
+        :type y:  ``int`` or ``float``
+
+        :param filled: whether the shape is closed (a triangle or polygon)
+        :type filled:  ``bool``
+        """
+        values = path.points
+        points = [(values[i] + x, values[i + 1] + y) for i in range(0, len(values) - 1, 2)]
+        if filled and path.fillcolor is not None:
+            self.polygon(points, path.fillcolor)
+        if path.linecolor is not None and path.linewidth > 0:
+            ends = points + points[:1] if filled else points
+            for i in range(len(ends) - 1):
+                self.line(ends[i][0], ends[i][1], ends[i + 1][0], ends[i + 1][1],
+                          path.linewidth, path.linecolor)
+
+    def _box(self, x, y, width, height, clip=True):
+        """
+        Returns the pixel rows and columns covered by a rectangle.
+
+        The result is (r0, r1, c0, c1), where rows r0..r1-1 and columns c0..c1-1 are
+        covered.  If ``clip`` is True, it only covers pixels of the view, and is None
+        if the rectangle is entirely outside of it.
+        """
+        left = int(round(x - width / 2.0))
+        right = int(round(x + width / 2.0))
+        top = self.height - int(round(y + height / 2.0))
+        bottom = self.height - int(round(y - height / 2.0))
+        if not clip:
+            return (top, bottom, left, right)
+        r0, r1 = max(top, 0), min(bottom, self.height)
+        c0, c1 = max(left, 0), min(right, self.width)
+        if r0 >= r1 or c0 >= c1:
+            return None
+        return (r0, r1, c0, c1)
+
+    def _centers(self, r0, r1, c0, c1):
+        """
+        Returns the coordinates of the pixel centers in a block of the view.
+
+        The result is a pair (xs, ys) of arrays that broadcast to the block.
+        """
+        xs = np.arange(c0, c1) + 0.5
+        ys = self.height - (np.arange(r0, r1) + 0.5)
+        return xs[None, :], ys[:, None]
+
+    def _fill(self, block, color, mask=None):
+        """
+        Blends a color over a block of the view, where mask is True.
+
+        :param block: the block of the view
+        :type block:  ``numpy.ndarray``
+
+        :param color: the color, as RGBA values in 0..1
+        :type color:  ``list`` of 4 ``float``
+
+        :param mask: the pixels to fill, or None for all of them
+        :type mask:  ``numpy.ndarray`` of ``bool``
+        """
+        rgba = np.array([int(round(c * 255)) for c in color], dtype=np.uint16)
+        if mask is None:
+            mask = np.ones(block.shape[:2], dtype=bool)
+        if rgba[3] == 255:
+            block[mask] = rgba
+            return
+        pixels = block[mask].astype(np.uint16)
+        pixels[:, :3] = (rgba[:3] * rgba[3] + pixels[:, :3] * (255 - rgba[3]) + 127) // 255
+        pixels[:, 3] = rgba[3] + pixels[:, 3] * (255 - rgba[3]) // 255
+        block[mask] = pixels
+
+    def _blend(self, block, image, rows, cols):
+        """
+        Blends part of a prepared image over a block of the view.
+
+        :param block: the block of the view
+        :type block:  ``numpy.ndarray``
+
+        :param image: the image, as returned by :meth:`_prepare`
+        :type image:  ``tuple``
+
+        :param rows: the rows of the image to draw
+        :type rows:  ``slice``
+
+        :param cols: the columns of the image to draw
+        :type cols:  ``slice``
+        """
+        pixels, premultiplied, inverse, opaque = image
+        if opaque:
+            block[:] = pixels[rows, cols]
+            return
+        inverse = inverse[rows, cols]
+        mixed = premultiplied[rows, cols] + block * inverse
+        mixed += 127
+        mixed //= 255
+        block[:] = mixed
+
+    def _decode(self, source):
+        """
+        Returns the pixels of an image file, decoding it the first time.
+
+        :param source: the file name of the image, in the images directory
+        :type source:  ``str``
+        """
+        pixels = self.DECODED.get(source)
+        if pixels is None:
+            pixels = decode_png(os.path.join(self._images, source))
+            self.DECODED[source] = pixels
+        return pixels
+
+    def _lookup(self, key):
+        """
+        Returns the scaled image stored under key, or None if there is none.
+
+        :param key: the key of the image in ``SCALED``
+        :type key:  ``tuple``
+        """
+        image = self.SCALED.get(key)
+        if image is not None:
+            self.SCALED.move_to_end(key)
+        return image
+
+    def _remember(self, key, image):
+        """
+        Stores a scaled image, dropping the least recently used one if there are too many.
+
+        :param key: the key of the image in ``SCALED``
+        :type key:  ``tuple``
+
+        :param image: the image, as returned by :meth:`_prepare`
+        :type image:  ``tuple``
+        """
+        self.SCALED[key] = image
+        if len(self.SCALED) > self.SCALED_LIMIT:
+            self.SCALED.popitem(last=False)
+
+    def _scale(self, source, frame, format, width, height, tint):
+        """
+        Returns one frame of an image, scaled and tinted, ready to blit.
+
+        The image is scaled with the nearest pixel.
+
+        :param source: the file name of the image, in the images directory
+        :type source:  ``str``
+
+        :param frame: the frame of the strip
+        :type frame:  ``int`` >= 0
+
+        :param format: the grid of frames in the strip, as (rows, columns)
+        :type format:  ``tuple`` of 2 ``int``
+
+        :param width: the width to scale to
+        :type width:  ``int`` >= 0
+
+        :param height: the height to scale to
+        :type height:  ``int`` >= 0
+
+        :param tint: a color to multiply the image by, as RGBA values in 0..1
+        :type tint:  ``tuple`` of 4 ``float`` or ``None``
+        """
+        pixels = self._decode(source)
+        rows, cols = format
+        h, w = pixels.shape[0] // rows, pixels.shape[1] // cols
+        r, c = divmod(frame, cols)
+        pixels = pixels[r * h:(r + 1) * h, c * w:(c + 1) * w]
+        ys = (np.arange(max(height, 0)) + 0.5) * h / max(height, 1)
+        xs = (np.arange(max(width, 0)) + 0.5) * w / max(width, 1)
+        pixels = pixels[ys.astype(int)][:, xs.astype(int)]
+        if tint is not None:
+            pixels = (pixels * np.array(tint)).round().astype(np.uint8)
+        return self._prepare(pixels)
+
+    def _prepare(self, pixels):
+        """
+        Returns an image in the form that :meth:`_blend` draws.
+
+        The form is a tuple (pixels, premultiplied, inverse, opaque): the pixels, the
+        pixels multiplied by their alpha, 255 minus the alpha, and whether every pixel
+        is opaque.
+
+        :param pixels: the pixels of the image
+        :type pixels:  ``numpy.ndarray`` of shape (height, width, 4) and type ``uint8``
+        """
+        alpha = pixels[:, :, 3:4].astype(np.uint16)
+        premultiplied = pixels.astype(np.uint16) * alpha
+        premultiplied[:, :, 3:4] = alpha * 255
+        inverse = 255 - alpha
+        return (pixels, premultiplied, inverse, bool((alpha == 255).all()))
+
+
+# HIDDEN FUNCTIONS
+def _unfilter(raw, width, height, channels):
+    """
+    Undoes the PNG filters of the decompressed rows of an image.
+
+    :param raw: the decompressed image data
+    :type raw:  ``bytes``
+
+    :param width: the width of the image
+    :type width:  ``int``
+
+    :param height: the height of the image
+    :type height:  ``int``
+
+    :param channels: the number of bytes per pixel
+    :type channels:  ``int``
+
+    :return: the pixels of the image
+    :rtype:  ``numpy.ndarray`` of shape (height, width, channels)
+    """
+    stride = width * channels
+    data = np.frombuffer(raw, np.uint8).reshape(height, stride + 1)
+    out = np.zeros((height, stride), dtype=np.uint8)
+    prior = np.zeros(stride, dtype=np.uint8)
+    for row in range(height):
+        kind = data[row, 0]
+        line = data[row, 1:]
+        if kind == 0:
+            current = line
+        elif kind == 1:
+            current = np.cumsum(line.reshape(width, channels), axis=0,
+                                dtype=np.uint8).ravel()
+        elif kind == 2:
+            current = line + prior
+        else:
+            current = bytearray(line.tobytes())
+            above = prior.tobytes()
+            for i in range(stride):
+                left = current[i - channels] if i >= channels else 0
+                up = above[i]
+                if kind == 3:
+                    current[i] = (current[i] + ((left + up) >> 1)) & 0xFF
+                else:
+                    corner = above[i - channels] if i >= channels else 0
+                    guess = left + up - corner
+                    pa, pb, pc = abs(guess - left), abs(guess - up), abs(guess - corner)
+                    if pa <= pb and pa <= pc:
+                        predict = left
+                    elif pb <= pc:
+                        predict = up
+                    else:
+                        predict = corner
+                    current[i] = (current[i] + predict) & 0xFF
+            current = np.frombuffer(bytes(current), np.uint8)
+        out[row] = current
+        prior = out[row]
+    return out.reshape(height, width, channels)
@@ -34,7 +34,65 @@ from game2d import *
 # calls the method.
 
 
-class Ship(GImage):
+class Target(GImage):
+    """
+    A class to represent an image that laser bolts can hit.
+
+    Ship and Alien are both targets. A target remembers how far a bolt may be
+    from its center, in each direction, and still touch it. As long as the
+    target is not rotated or scaled, testing a bolt is then two comparisons,
+    with no list of corners to build and no call to contains.
+
+    The game itself never calls these tests. Wave runs the rules of WaveCore,
+    which tests the bolts against the ship and the aliens as arrays, with the
+    same reach (see Formation.collide and BoltBuffer.sweep in core.py). The
+    sprites only draw the result. These methods are for code that works with
+    the sprites directly.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _reachX: half the width of the target plus half that of a bolt
+    # Invariant: _reachX is a float > 0, set from the width at construction
+    #
+    # Attribute _reachY: half the height of the target plus half that of a bolt
+    # Invariant: _reachY is a float > 0, set from the height at construction
+
+
+    def __init__(self, **keywords):
+        """
+        Initializes a target, taking the same keywords as GImage.
+
+        The width and height must be given, as targets never change size.
+        """
+        super().__init__(**keywords)
+        self._reachX = (self.width + BOLT_WIDTH)/2
+        self._reachY = (self.height + BOLT_HEIGHT)/2
+
+
+    def overlaps(self, bolt):
+        """
+        Returns True if bolt touches this target, whoever fired it.
+
+        As a bolt is smaller than every target in both directions, this is
+        the same as one of the four corners of the bolt being inside the
+        target. A rotated or scaled target is tested corner by corner with
+        contains, as its reach no longer holds. The precondition is only
+        checked on that slow path, to keep the common test to two
+        comparisons.
+
+        Parameter bolt: The laser bolt to check
+        Precondition: bolt is of class Bolt
+        """
+        if self._rotate.angle != 0.0 or self._scale.x != 1.0 or self._scale.y != 1.0:
+            assert isinstance(bolt,Bolt)
+            for xy in bolt.getFourCorners():
+                if self.contains(xy):
+                    return True
+            return False
+        return abs(bolt.x - self.x) < self._reachX and \
+            abs(bolt.y - self.y) < self._reachY
+
+
+class Ship(Target):
     """
     A class to represent the game ship.
 
@@ -54,7 +112,7 @@ class Ship(GImage):
     keep this straight is for this class to have its own collision method.
 
     However, there is no need for any more attributes other than those
-    inherited by GImage. You would only add attributes if you needed them
+    inherited by Target. You would only add attributes if you needed them
     for extra gameplay features (like animation).
     """
     # ATTRIBUTES:
@@ -142,17 +200,10 @@ class Ship(GImage):
         Parameter bolt: The laser bolt to check
         Precondition: bolt is of class Bolt
         """
-        assert isinstance(bolt,Bolt)
-
-        if not bolt.isPlayerBolt():
-            for xy in bolt.getFourCorners():
-                if self.contains(xy):
-                    return True
-        else:
-            return False
+        return not bolt.isPlayerBolt() and self.overlaps(bolt)
 
 
-class Alien(GImage):
+class Alien(Target):
     """
     A class to represent a single alien.
 
@@ -167,14 +218,19 @@ class Alien(GImage):
     keep this straight is for this class to have its own collision method.
 
     However, there is no need for any more attributes other than those
-    inherited by GImage. You would only add attributes if you needed them
+    inherited by Target. You would only add attributes if you needed them
     for extra gameplay features (like giving each alien a score value).
+
+    In a Wave, the alien sprites are the children of a GScene that moves
+    with the formation (see Wave._alienGroup). Their x and y are therefore
+    offsets from the alien in row 0, column 0 of the formation, and not
+    positions in the window.
     """
     # ATTRIBUTES:
-    # Attribute x: the x-coordinate of the Alien
+    # Attribute x: the x-coordinate of the Alien, relative to its group
     # Invariant : x is an int
 
-    # Attribute y: the y-coordinate of the Alien
+    # Attribute y: the y-coordinate of the Alien, relative to its group
     # Invariant : y is an int
 
     # Attribute width: the width of the Alien
@@ -239,17 +295,15 @@ class Alien(GImage):
 
         This method returns False if bolt was not fired by the player.
 
+        The bolt and the alien must be in the same coordinates. The sprites
+        of a Wave are placed relative to their group (see the class
+        docstring), so a bolt in window coordinates must first be moved by
+        the position of the group.
+
         Parameter bolt: The laser bolt to check
         Precondition: bolt is of class Bolt
         """
-        assert isinstance(bolt,Bolt)
-
-        if bolt.isPlayerBolt():
-            for xy in bolt.getFourCorners():
-                if self.contains(xy):
-                    return True
-        else:
-            return False
+        return bolt.isPlayerBolt() and self.overlaps(bolt)
 
 
     def AlienRight(self):
@@ -350,6 +404,9 @@ class Bolt(GRectangle):
     # Attribute fillcolor: the color of the Bolt
     # Invariant : color is a string that represents a color
 
+    # Attribute _color: the color name the Bolt was last given
+    # Invariant : _color is a string that represents a color
+
 
     def getVelocity(self):
         """
@@ -391,7 +448,32 @@ class Bolt(GRectangle):
         assert velocity == BOLT_SPEED or -BOLT_SPEED
 
         self._velocity = velocity
-        super().__init__(x = x, y = y, width = BOLT_WIDTH, height = BOLT_HEIGHT, fillcolor = 'red')
+        self._color = BOLT_COLOR
+        super().__init__(x = x, y = y, width = BOLT_WIDTH, height = BOLT_HEIGHT, fillcolor = BOLT_COLOR)
+
+
+    def reset(self, x, y, velocity, color=BOLT_COLOR):
+        """
+        Reuses this Bolt for a new shot.
+
+        The Bolt is moved to the given coordinates and given the new velocity
+        and color. The drawing cache is only rebuilt if the color changes, so
+        this is much cheaper than making a new Bolt.
+
+        Precondition:
+            x and y must be numbers (int or float). velocity must be
+            BOLT_SPEED or -BOLT_SPEED. color is a string that represents a
+            color.
+        """
+        assert isinstance(x, (int, float)), "x must be an integer or float"
+        assert isinstance(y, (int, float)), "y must be an integer or float"
+
+        self._velocity = velocity
+        self.x = x
+        self.y = y
+        if color != self._color:
+            self._color = color
+            self.fillcolor = color
 
 
     def BoltMove(self):
@@ -440,3 +522,130 @@ class Bolt(GRectangle):
         list.append((self.x + w/2, self.y - h/2)) # bottom right
         list.append((self.x - w/2, self.y - h/2)) # bottom left
         return list
+
+
+class BoltPool(object):
+    """
+    A class to recycle Bolt objects instead of making new ones.
+
+    Making a Bolt builds a whole set of Kivy instructions, and dropping it
+    leaves them for the garbage collector. A pool keeps bolts that are no
+    longer on screen and hands them out again, moved and recolored, the
+    next time a bolt is needed.
+
+    Call acquire to get a bolt and release when it leaves the screen. The
+    pool keeps at most capacity idle bolts; any released beyond that are
+    dropped. It counts how often acquire was served from the pool (a hit)
+    or had to make a new Bolt (a miss), and the most bolts ever out at once.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _free: the idle bolts waiting to be reused
+    # Invariant: _free is a list of Bolt objects, at most _capacity long
+    #
+    # Attribute _capacity: the most idle bolts the pool will keep
+    # Invariant: _capacity is an int >= 0
+    #
+    # Attribute _inUse: the number of bolts acquired and not yet released
+    # Invariant: _inUse is an int >= 0
+    #
+    # Attribute _hits: the number of acquires served from _free
+    # Invariant: _hits is an int >= 0
+    #
+    # Attribute _misses: the number of acquires that made a new Bolt
+    # Invariant: _misses is an int >= 0
+    #
+    # Attribute _highWater: the largest value _inUse has ever had
+    # Invariant: _highWater is an int >= 0
+
+
+    def getCapacity(self):
+        """Returns the most idle bolts the pool will keep"""
+        return self._capacity
+
+
+    def getFree(self):
+        """Returns the number of idle bolts in the pool"""
+        return len(self._free)
+
+
+    def getInUse(self):
+        """Returns the number of bolts acquired and not yet released"""
+        return self._inUse
+
+
+    def getHits(self):
+        """Returns the number of bolts that were reused"""
+        return self._hits
+
+
+    def getMisses(self):
+        """Returns the number of bolts that had to be made new"""
+        return self._misses
+
+
+    def getHighWater(self):
+        """Returns the most bolts that were ever acquired at once"""
+        return self._highWater
+
+
+    def __init__(self, capacity=BOLT_POOL_SIZE, prefill=0):
+        """
+        Initializes a bolt pool.
+
+        Parameter capacity: the most idle bolts the pool will keep
+        Precondition: capacity is an int >= 0
+
+        Parameter prefill: the number of bolts to make up front
+        Precondition: prefill is an int in 0..capacity
+        """
+        assert isinstance(capacity, int) and capacity >= 0
+        assert isinstance(prefill, int) and 0 <= prefill <= capacity
+
+        self._capacity = capacity
+        self._free = [Bolt(0.0, 0.0, BOLT_SPEED) for i in range(prefill)]
+        self._inUse = 0
+        self._hits = 0
+        self._misses = 0
+        self._highWater = 0
+
+
+    def acquire(self, x, y, velocity, color=BOLT_COLOR):
+        """
+        Returns a bolt at the given coordinates with the given velocity.
+
+        The bolt is reused from the pool if there is one, and made new
+        otherwise.
+
+        Precondition:
+            x and y must be numbers (int or float). velocity must be
+            BOLT_SPEED or -BOLT_SPEED. color is a string that represents a
+            color.
+        """
+        if self._free:
+            bolt = self._free.pop()
+            bolt.reset(x, y, velocity, color)
+            self._hits += 1
+        else:
+            bolt = Bolt(x, y, velocity)
+            if color != BOLT_COLOR:
+                bolt.reset(x, y, velocity, color)
+            self._misses += 1
+        self._inUse += 1
+        if self._inUse > self._highWater:
+            self._highWater = self._inUse
+        return bolt
+
+
+    def release(self, bolt):
+        """
+        Gives a bolt that has left the screen back to the pool.
+
+        Parameter bolt: the bolt to give back
+        Precondition: bolt is a Bolt acquired from this pool, and not
+        released since
+        """
+        assert isinstance(bolt, Bolt)
+
+        self._inUse -= 1
+        if len(self._free) < self._capacity:
+            self._free.append(bolt)
@@ -0,0 +1,312 @@
+"""
+Replay module for Alien Invaders
+
+This module records a wave as its seed plus the input of every frame, and
+plays such a recording back. As every random number in a wave comes from a
+generator seeded with the seed of the wave (see WaveCore), feeding the same
+inputs and time steps to a wave with the same seed plays it out exactly as
+before.
+
+A replay file starts with a header: the 4 bytes MAGIC, a one byte version
+number, the seed as a little-endian signed 8 byte int, and the values of the
+settings that the command line can change (SETTINGS, packed as _SETTINGS).
+A wave only plays out the same with the same settings, so a replay is only
+played back if they match those of the running game. Then comes one record
+per frame. A record is the input mask of the frame in a single byte
+(INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE and INPUT_PAUSE). If the time step
+differs from that of the previous record, the byte also has the bit _NEW_DT
+set, and is followed by the new time step as a little-endian 8 byte float.
+With a fixed time step a frame therefore costs one byte.
+
+Frames with INPUT_PAUSE are frames where the game was on screen but the wave
+did not move (the game was paused). They are kept so that the frame numbers
+of a replay match the original session, and are skipped on playback.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+from consts import *
+from core import WaveCore
+import consts
+import numpy as np
+import struct
+
+# PRIMARY RULE: This module may only access consts.py and core.py at import time. Only
+# replayWave imports wave (and with it kivy), when it is called.
+
+# The first bytes of every replay file
+MAGIC = b'AIRP'
+
+# The version of the replay format written by this module. Version 1 replays were
+# recorded before collisions were swept (see core.sweep), and do not play out the same.
+# Version 2 replays did not record the settings.
+VERSION = 3
+
+# The names of the constants from the command line (see consts.py) stored in a replay
+SETTINGS = ('ALIEN_ROWS', 'ALIENS_IN_ROW', 'ALIEN_SPEED', 'STRESS_MODE',
+            'PLAYER_BOLTS', 'ALIEN_VOLLEY', 'BOLT_RATE')
+
+# The layout of the header after MAGIC: the version and the seed
+_HEADER = struct.Struct('<Bq')
+
+# The layout of the settings after the header, in the order of SETTINGS
+_SETTINGS = struct.Struct('<HHd?III')
+
+# The layout of a new time step
+_DT = struct.Struct('<d')
+
+# The bit in a record that says a new time step follows
+_NEW_DT = 0x80
+
+
+class ReplayRecorder(object):
+    """
+    A class to write the frames of a wave to a replay file.
+
+    The file is written through a buffer, so recording a frame does not touch
+    the disk. Call close when the wave is over.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _file: the file being written
+    # Invariant: _file is a binary file object open for writing, or None once
+    #            the recorder is closed
+    #
+    # Attribute _dt: the time step of the last frame recorded
+    # Invariant: _dt is a float, or None before the first frame
+    #
+    # Attribute _frames: the number of frames recorded
+    # Invariant: _frames is an int >= 0
+
+    def getFrames(self):
+        """Returns the number of frames recorded"""
+        return self._frames
+
+
+    def __init__(self, path, seed):
+        """
+        Creates a replay file and writes its header.
+
+        Parameter path: the file to write, which is replaced if it exists
+        Precondition: path is a string
+
+        Parameter seed: the seed of the wave being recorded
+        Precondition: seed is an int in the range of a signed 8 byte int
+        """
+        assert isinstance(path, str), "%s is not a valid path" % repr(path)
+        assert isinstance(seed, int), "%s is not a valid seed" % repr(seed)
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + _HEADER.pack(VERSION, seed) +
+                         _SETTINGS.pack(*_currentSettings()))
+        self._dt = None
+        self._frames = 0
+
+
+    def record(self, keys, dt):
+        """
+        Records one frame.
+
+        Parameter keys: the input mask of the frame
+        Precondition: keys is an int combining INPUT_LEFT, INPUT_RIGHT,
+        INPUT_FIRE and INPUT_PAUSE with |
+
+        Parameter dt: the time step of the frame
+        Precondition: dt is a number (int or float)
+        """
+        assert self._file is not None, "the recorder is closed"
+        assert isinstance(keys, int) and 0 <= keys < _NEW_DT
+        dt = float(dt)
+        if dt != self._dt:
+            self._dt = dt
+            self._file.write(bytes((keys | _NEW_DT,)) + _DT.pack(dt))
+        else:
+            self._file.write(bytes((keys,)))
+        self._frames += 1
+
+
+    def close(self):
+        """
+        Finishes the replay file. Closing a recorder twice does nothing.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Replay(object):
+    """
+    A class to represent a replay loaded from a file.
+
+    The frames are kept as two arrays: the input mask of every frame and its
+    time step.
+    """
+    # ATTRIBUTES:
+    # Attribute seed: the seed of the recorded wave
+    # Invariant: seed is an int
+    #
+    # Attribute settings: the settings the wave was recorded with
+    # Invariant: settings is a dictionary from the names in SETTINGS to their values
+    #
+    # Attribute keys: the input mask of every frame
+    # Invariant: keys is a uint8 array
+    #
+    # Attribute dts: the time step of every frame
+    # Invariant: dts is a float array of the same length as keys
+
+    def __init__(self, path):
+        """
+        Loads a replay file.
+
+        Parameter path: the file to read
+        Precondition: path is a string naming a file written by ReplayRecorder
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        assert data[:len(MAGIC)] == MAGIC, "%s is not a replay file" % repr(path)
+        start = len(MAGIC)
+        version, self.seed = _HEADER.unpack_from(data, start)
+        assert version == VERSION, "replay version %d is not supported (expected %d)" % \
+            (version, VERSION)
+        pos = start + _HEADER.size
+        self.settings = dict(zip(SETTINGS, _SETTINGS.unpack_from(data, pos)))
+        pos += _SETTINGS.size
+        keys = []
+        dts = []
+        dt = None
+        while pos < len(data):
+            code = data[pos]
+            pos += 1
+            if code & _NEW_DT:
+                dt = _DT.unpack_from(data, pos)[0]
+                pos += _DT.size
+            keys.append(code & ~_NEW_DT)
+            dts.append(dt)
+        self.keys = np.array(keys, dtype=np.uint8)
+        self.dts = np.array(dts, dtype=float)
+
+
+    def __len__(self):
+        """Returns the number of frames in the replay"""
+        return len(self.keys)
+
+
+    def check(self):
+        """
+        Raises a ValueError if the replay was recorded with other settings than
+        those of this game.
+
+        The settings come from the command line (see consts.py), and cannot be
+        changed once the game has started. The error says which ones differ.
+        """
+        current = dict(zip(SETTINGS, _currentSettings()))
+        wrong = [name for name in SETTINGS if self.settings[name] != current[name]]
+        if wrong:
+            raise ValueError('the replay was recorded with ' +
+                ', '.join('%s=%r (not %r)' % (name, self.settings[name], current[name])
+                          for name in wrong))
+
+
+class ReplayInput(object):
+    """
+    A stand-in for GInput that answers from the frames of a replay.
+
+    Wave.update only asks whether keys are held down, so this class only
+    supports is_key_down. Call next before each frame to move to it.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _replay: the replay being played
+    # Invariant: _replay is a Replay object
+    #
+    # Attribute _frame: the current frame
+    # Invariant: _frame is an int in -1..len(_replay)-1
+
+    # The input bit of every key that Wave.update reads
+    KEYS = {'left': INPUT_LEFT, 'right': INPUT_RIGHT, 'up': INPUT_FIRE}
+
+    def __init__(self, replay):
+        """
+        Initializes an input positioned before the first frame of replay.
+
+        Parameter replay: the replay to answer from
+        Precondition: replay is a Replay object
+        """
+        self._replay = replay
+        self._frame = -1
+
+
+    def next(self):
+        """
+        Moves to the next frame. Returns the pair (keys, dt) of that frame.
+
+        Precondition: there is a next frame
+        """
+        self._frame += 1
+        return (int(self._replay.keys[self._frame]),
+                float(self._replay.dts[self._frame]))
+
+
+    def is_key_down(self, key):
+        """
+        Returns True if key was held down in the current frame.
+
+        Parameter key: the name of the key
+        Precondition: key is a string
+        """
+        bit = self.KEYS.get(key, 0)
+        return bool(self._replay.keys[self._frame] & bit)
+
+
+def replayCore(path):
+    """
+    Plays a replay file on a WaveCore and returns the wave after the last frame.
+
+    It raises a ValueError if the replay was recorded with other settings (see
+    Replay.check).
+
+    Parameter path: the file to play
+    Precondition: path is a string naming a file written by ReplayRecorder
+    """
+    replay = Replay(path)
+    replay.check()
+    wave = WaveCore(replay.seed)
+    keys = replay.keys.tolist()
+    dts = replay.dts.tolist()
+    for i in range(len(keys)):
+        if not keys[i] & INPUT_PAUSE:
+            wave.step(keys[i], dts[i])
+            wave.setHit(False)
+    return wave
+
+
+def replayWave(path):
+    """
+    Plays a replay file through Wave.update and returns the wave after the
+    last frame.
+
+    The inputs are fed through a ReplayInput, exactly as the keyboard would
+    feed them. This needs kivy, as Wave owns the sprites of the wave.
+
+    It raises a ValueError if the replay was recorded with other settings (see
+    Replay.check).
+
+    Parameter path: the file to play
+    Precondition: path is a string naming a file written by ReplayRecorder
+    """
+    from wave import Wave
+    replay = Replay(path)
+    replay.check()
+    wave = Wave(replay.seed)
+    player = ReplayInput(replay)
+    for i in range(len(replay)):
+        keys, dt = player.next()
+        if not keys & INPUT_PAUSE:
+            wave.update(player, dt)
+            wave.setHit(False)
+    return wave
+
+
+# HIDDEN FUNCTIONS
+def _currentSettings():
+    """
+    Returns the values of SETTINGS in this game, as a tuple in that order.
+    """
+    return tuple(getattr(consts, name) for name in SETTINGS)
@@ -0,0 +1,348 @@
+"""
+Save-state module for Alien Invaders
+
+This module writes the complete state of a wave (see WaveCore.snapshot) to a
+binary file, and loads it back. Unlike a replay (see replay.py), a save state
+does not have to be played from the start of the wave, so loading it costs
+the same at the first frame as deep into the boss fight.
+
+A save state file has a fixed layout, so nothing in it needs to be parsed.
+It starts with a 64 byte header: the 4 bytes MAGIC, the version number of the
+format, the seed of the wave, the shape of the formation, the number of
+bolts and the size and spacing of the aliens (GEOMETRY). A state can only be
+loaded into a wave with the same formation, so loading checks the shape and
+the geometry first (see SaveState.check). Everything after the header is at
+an offset that only depends on the shape and the number of bolts (see
+_layout), each section starting on an 8 byte boundary:
+
+    the values of the wave (one record of _VALUES)
+    the state of the random number generator (RNG_WORDS uint32 words)
+    the arrays of the formation (Formation.ARRAYS), rows by cols each
+    the arrays of the bolts (BoltBuffer.ARRAYS), one entry per bolt
+
+All numbers are little-endian. A file is loaded by mapping it into memory
+with mmap, and every section is a NumPy view of the mapping. The data is
+only copied when it is restored into a wave, and no object is created per
+alien or bolt.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+from consts import *
+from core import WaveCore, Formation, BoltBuffer, Snapshot
+import consts
+import numpy as np
+import math
+import mmap
+import os
+import struct
+
+# PRIMARY RULE: This module may only access consts.py and core.py at import time. Only
+# loadWave imports wave (and with it kivy), when it is called.
+
+# The first bytes of every save state file
+MAGIC = b'AISV'
+
+# The version of the save state format written by this module. Version 1 files did
+# not record the geometry of the formation.
+VERSION = 2
+
+# The names of the constants that decide the size and spacing of the aliens, which
+# change in stress mode (see consts.py)
+GEOMETRY = ('ALIEN_WIDTH', 'ALIEN_HEIGHT', 'ALIEN_H_SEP', 'ALIEN_V_SEP')
+
+# The layout of the header: magic, version, seed, rows, cols, bolts, the values of
+# GEOMETRY and padding to 64 bytes
+_HEADER = struct.Struct('<4sHxxqiiidddd4x')
+
+# The layout of the values of the wave: one field per name in Snapshot.FIELDS, then the
+# counts of the formation and the cached normal variate of the random number generator
+_VALUES = np.dtype([('hasShip', '?'), ('shipX', '<f8'), ('hasBoss', '?'),
+    ('bossX', '<f8'), ('bossY', '<f8'), ('bossHealth', '<i8'), ('lives', '<i8'),
+    ('score', '<i8'), ('time', '<f8'), ('step', '<i8'), ('random', '<i8'),
+    ('switch', '?'), ('alienSpeed', '<f8'), ('hit', '?'), ('bossSwitch', '?'),
+    ('bossSpeed', '<f8'), ('bossTime', '<f8'), ('bossShootTime', '<f8'),
+    ('bossBoltCount', '<i8'), ('pairs', '<i8'), ('live', '<i8'), ('left', '<i8'),
+    ('right', '<i8'), ('lowest', '<i8'), ('numCols', '<i8'), ('gauss', '<f8'),
+    ('hasGauss', '?')])
+
+# The fields of _VALUES that hold the ints named in Formation.COUNTS, in order
+_COUNTS = ('live', 'left', 'right', 'lowest', 'numCols')
+
+# The number of words in the state of a random.Random (the Mersenne Twister plus its position)
+RNG_WORDS = 625
+
+# The version of the state returned by random.Random.getstate
+_RNG_VERSION = 3
+
+# The type on disk and the shape of each array of a formation, in the order of
+# Formation.ARRAYS. The shape is either the whole grid, one entry per row or one per column.
+_ALIEN_TYPES = (('<f8', 'grid'), ('<f8', 'grid'), ('?', 'grid'), ('i1', 'grid'),
+                ('<i2', 'grid'), ('<i8', 'rows'), ('<i8', 'cols'), ('<i8', 'cols'),
+                ('<i8', 'cols'), ('<i8', 'cols'))
+
+# The type on disk of each array of the bolts, in the order of BoltBuffer.ARRAYS
+_BOLT_TYPES = ('<f8', '<f8', '<f8', 'i1', '?')
+
+assert _VALUES.names[:len(Snapshot.FIELDS)] == Snapshot.FIELDS
+assert len(_ALIEN_TYPES) == len(Formation.ARRAYS) and len(_COUNTS) == len(Formation.COUNTS)
+assert len(_BOLT_TYPES) == len(BoltBuffer.ARRAYS)
+
+
+def saveState(wave, path, snap=None):
+    """
+    Writes the complete state of wave to a save state file.
+
+    The file is written under a temporary name and then renamed, so a crash
+    while saving never leaves a broken file at path.
+
+    Parameter wave: the wave to save
+    Precondition: wave is a WaveCore object, between two frames
+
+    Parameter path: the file to write, which is replaced if it exists
+    Precondition: path is a string
+
+    Parameter snap: a snapshot to reuse (see WaveCore.snapshot)
+    Precondition: snap is None or a Snapshot object
+    """
+    assert isinstance(path, str), "%s is not a valid path" % repr(path)
+    snap = wave.snapshot(snap)
+    rows, cols = snap.aliens.getShape()
+    bolts = snap.bolts.count()
+    version, words, gauss = snap.rng
+    assert version == _RNG_VERSION and len(words) == RNG_WORDS
+
+    values = np.zeros(1, dtype=_VALUES)
+    for name, value in zip(Snapshot.FIELDS, snap.values):
+        values[name] = value
+    for name, field in zip(Formation.COUNTS, _COUNTS):
+        values[field] = getattr(snap.aliens, name)
+    values['hasGauss'] = gauss is not None
+    values['gauss'] = 0.0 if gauss is None else gauss
+
+    sections = [values, np.array(words, dtype='<u4')]
+    for name, (kind, shape) in zip(Formation.ARRAYS, _ALIEN_TYPES):
+        sections.append(getattr(snap.aliens, name).astype(kind, copy=False))
+    for name, kind in zip(BoltBuffer.ARRAYS, _BOLT_TYPES):
+        sections.append(getattr(snap.bolts, name)[:bolts].astype(kind, copy=False))
+
+    temp = path + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, wave.getSeed(), rows, cols, bolts,
+                             *_geometry()))
+        for data, (start, kind, shape) in zip(sections, _layout(rows, cols, bolts)):
+            f.write(bytes(start - f.tell()))
+            f.write(np.ascontiguousarray(data).tobytes())
+    os.replace(temp, path)
+
+
+class SaveState(object):
+    """
+    A class to represent a save state file mapped into memory.
+
+    The sections of the file are read-only NumPy views of the mapping, so
+    opening a file only reads its header. The file stays mapped until close
+    is called, and after that until the last view taken from values, rng,
+    aliens or bolts is gone (see close). Use snapshot to get a copy of the
+    state that does not depend on the file.
+    """
+    # ATTRIBUTES:
+    # Attribute seed: the seed of the saved wave
+    # Invariant: seed is an int
+    #
+    # Attribute values: the values of the wave
+    # Invariant: values is a 0-dimensional array of type _VALUES
+    #
+    # Attribute rng: the state of the random number generator
+    # Invariant: rng is a uint32 array of length RNG_WORDS
+    #
+    # Attribute aliens: the arrays of the formation, in the order of Formation.ARRAYS
+    # Invariant: aliens is a list of arrays
+    #
+    # Attribute bolts: the arrays of the bolts, in the order of BoltBuffer.ARRAYS
+    # Invariant: bolts is a list of arrays, all of the same length
+    #
+    # HIDDEN ATTRIBUTES:
+    # Attribute _map: the file mapped into memory
+    # Invariant: _map is an mmap object, or None once the file is closed
+    #
+    # Attribute _shape: the shape of the formation
+    # Invariant: _shape is a pair (rows, cols) of ints > 0
+    #
+    # Attribute _geometry: the values of GEOMETRY the state was saved with
+    # Invariant: _geometry is a tuple of floats, in the order of GEOMETRY
+
+    def getShape(self):
+        """Returns the pair (rows, cols) of the saved formation"""
+        return self._shape
+
+
+    def __init__(self, path):
+        """
+        Maps a save state file into memory.
+
+        Parameter path: the file to load
+        Precondition: path is a string naming a file written by saveState
+        """
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _HEADER.unpack_from(self._map)
+        magic, version, self.seed, rows, cols, bolts = header[:6]
+        assert magic == MAGIC, "%s is not a save state file" % repr(path)
+        assert version == VERSION, "save state version %d is not supported (expected %d)" % \
+            (version, VERSION)
+        self._shape = (rows, cols)
+        self._geometry = header[6:]
+        views = [np.frombuffer(self._map, kind, math.prod(shape), start).reshape(shape)
+                 for start, kind, shape in _layout(rows, cols, bolts)]
+        self.values = views[0][0]
+        self.rng = views[1]
+        self.aliens = views[2:2 + len(Formation.ARRAYS)]
+        self.bolts = views[2 + len(Formation.ARRAYS):]
+
+
+    def check(self, wave):
+        """
+        Raises a ValueError if the saved state cannot be loaded into wave.
+
+        The formation of wave must have the saved shape, and the aliens the
+        saved size and spacing. These come from the command line (see
+        consts.py), so the error says what they were when the state was saved.
+
+        Parameter wave: the wave to load the state into
+        Precondition: wave is a WaveCore object
+        """
+        shape = tuple(wave.getFormation().getShape())
+        if shape != self._shape:
+            raise ValueError('the state was saved with %d rows of %d aliens, not %d of %d' %
+                             (self._shape + shape))
+        wrong = [name for name, saved, now in zip(GEOMETRY, self._geometry, _geometry())
+                 if saved != now]
+        if wrong:
+            raise ValueError('the state was saved with ' +
+                ', '.join('%s=%r (not %r)' % (name, self._geometry[GEOMETRY.index(name)],
+                                                float(getattr(consts, name)))
+                          for name in wrong))
+
+
+    def snapshot(self, into=None):
+        """
+        Copies the saved state into a snapshot and returns it.
+
+        Pass the snapshot to WaveCore.restore to load the state into a wave.
+
+        Parameter into: the snapshot to fill
+        Precondition: into is None or a Snapshot object of the same shape as
+        the saved formation
+        """
+        assert self._map is not None, "the save state is closed"
+        if into is None:
+            into = Snapshot(*self._shape)
+        into.aliens.assign(self.aliens, [self.values[field] for field in _COUNTS])
+        into.bolts.assign(*self.bolts)
+        values = self.values.tolist()
+        into.values = values[:len(Snapshot.FIELDS)]
+        gauss = self.values['gauss'] if self.values['hasGauss'] else None
+        into.rng = (_RNG_VERSION, tuple(self.rng.tolist()), gauss)
+        return into
+
+
+    def close(self):
+        """
+        Unmaps the file. Closing a save state twice does nothing.
+
+        The attributes values, rng, aliens and bolts are set to None. Views
+        of them that the caller still holds stay valid, and keep the file
+        mapped until they are gone too, as a mapping cannot be closed while
+        NumPy arrays point into it.
+        """
+        if self._map is not None:
+            self.values = self.rng = self.aliens = self.bolts = None
+            try:
+                self._map.close()
+            except BufferError:
+                pass # Unmapped when the last view is freed
+            self._map = None
+
+
+def loadCore(path):
+    """
+    Returns a new WaveCore in the state saved in a save state file.
+
+    It raises a ValueError if the state was saved with another formation
+    (see SaveState.check).
+
+    Parameter path: the file to load
+    Precondition: path is a string naming a file written by saveState
+    """
+    return _load(WaveCore, path)
+
+
+def loadWave(path):
+    """
+    Returns a new Wave in the state saved in a save state file.
+
+    The sprites are only brought up to date with the saved state when the
+    wave is first drawn. This needs kivy, as Wave owns the sprites of the
+    wave. It raises a ValueError if the state was saved with another
+    formation (see SaveState.check).
+
+    Parameter path: the file to load
+    Precondition: path is a string naming a file written by saveState
+    """
+    from wave import Wave
+    return _load(Wave, path)
+
+
+# HIDDEN FUNCTIONS
+def _geometry():
+    """
+    Returns the values of GEOMETRY in this game, as a tuple of floats in that order.
+    """
+    return tuple(float(getattr(consts, name)) for name in GEOMETRY)
+
+
+def _layout(rows, cols, bolts):
+    """
+    Returns the sections of a save state file after the header.
+
+    Each section is a triple (offset, type, shape), in the order they appear
+    in the file.
+
+    Parameter rows, cols: the shape of the formation
+    Precondition: rows and cols are ints > 0
+
+    Parameter bolts: the number of bolts
+    Precondition: bolts is an int >= 0
+    """
+    shapes = {'grid': (rows, cols), 'rows': (rows,), 'cols': (cols,)}
+    sections = [(_VALUES, (1,)), (np.dtype('<u4'), (RNG_WORDS,))]
+    sections += [(np.dtype(kind), shapes[shape]) for kind, shape in _ALIEN_TYPES]
+    sections += [(np.dtype(kind), (bolts,)) for kind in _BOLT_TYPES]
+    result = []
+    start = _HEADER.size
+    for kind, shape in sections:
+        result.append((start, kind, shape))
+        start += kind.itemsize * math.prod(shape)
+        start += -start % 8
+    return result
+
+
+def _load(cls, path):
+    """
+    Returns a new wave of class cls in the state saved in the file path.
+
+    Parameter cls: the class of the wave
+    Precondition: cls is WaveCore or a subclass of it
+
+    Parameter path: the file to load
+    Precondition: path is a string naming a file written by saveState
+    """
+    state = SaveState(path)
+    try:
+        wave = cls(state.seed)
+        state.check(wave)
+        wave.restore(state.snapshot())
+    finally:
+        state.close()
+    return wave
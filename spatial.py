@@ -0,0 +1,251 @@
+"""
+Spatial hashing module for Alien Invaders
+
+This module contains a uniform grid that buckets objects by position, so that
+collision checks only look at objects in neighbouring cells instead of at
+every pair of objects. The grid covers the game window (GAME_WIDTH by
+GAME_HEIGHT) by default. Objects off the edge of the grid are kept in the
+nearest edge cell, so nothing is ever lost.
+
+Both building the grid and querying it are vectorized with NumPy. Like
+core.py, this module never imports kivy.
+
+WaveCore only puts its bolts in a grid; the aliens, the ship and the boss
+query it (see WaveCore._boltGrid).
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+from consts import *
+import numpy as np
+
+
+class SpatialHash(object):
+    """
+    A class representing a uniform grid of square cells.
+
+    The grid is filled all at once with build, from the centers of a batch of
+    objects. The objects are known by their index in that batch. A query
+    passes the centers of a second batch of objects, and how far from its
+    center each of them reaches. It returns every (query, object) pair where
+    the object lies in a cell that the query touches. These are only
+    candidates: the caller still has to test the pairs exactly.
+
+    A query box must reach at least as far as the objects it is looking for,
+    which is the case when the reach is the sum of the half-sizes of the two
+    objects.
+
+    The grid counts how many cells were occupied at the last build, and how
+    many candidate pairs and queries it has handed out since the last call to
+    resetStats.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _cell: the size of a cell in pixels
+    # Invariant: _cell is a number > 0
+    #
+    # Attribute _cols: the number of columns of cells
+    # Invariant: _cols is an int > 0
+    #
+    # Attribute _rows: the number of rows of cells
+    # Invariant: _rows is an int > 0
+    #
+    # Attribute _items: the object indices, sorted by cell
+    # Invariant: _items is an int array; objects in the same cell are in
+    #            increasing order
+    #
+    # Attribute _start: where each cell starts in _items
+    # Invariant: _start is an int array of length _rows*_cols+1; the objects
+    #            in cell k are _items[_start[k]:_start[k+1]]
+    #
+    # Attribute _size: the number of objects in the grid
+    # Invariant: _size is an int >= 0
+    #
+    # Attribute _occupied: the number of cells holding at least one object
+    # Invariant: _occupied is an int >= 0
+    #
+    # Attribute _tested: the candidate pairs returned since the last reset
+    # Invariant: _tested is an int >= 0
+    #
+    # Attribute _queries: the query boxes processed since the last reset
+    # Invariant: _queries is an int >= 0
+
+    def getCellSize(self):
+        """Returns the size of a cell in pixels"""
+        return self._cell
+
+
+    def getSize(self):
+        """Returns the number of objects in the grid"""
+        return self._size
+
+
+    def getOccupied(self):
+        """Returns the number of cells holding an object at the last build"""
+        return self._occupied
+
+
+    def getTested(self):
+        """Returns the number of candidate pairs returned since the last reset"""
+        return self._tested
+
+
+    def getQueries(self):
+        """Returns the number of query boxes processed since the last reset"""
+        return self._queries
+
+
+    def __init__(self, cell=GRID_CELL_SIZE, width=GAME_WIDTH, height=GAME_HEIGHT):
+        """
+        Initializes an empty grid.
+
+        Parameter cell: the size of a cell in pixels
+        Precondition: cell is a number > 0
+
+        Parameter width: the width of the area covered by the grid
+        Precondition: width is a number > 0
+
+        Parameter height: the height of the area covered by the grid
+        Precondition: height is a number > 0
+        """
+        assert type(cell) in [int, float] and cell > 0, "%s is not a valid cell size" % repr(cell)
+        assert type(width) in [int, float] and width > 0
+        assert type(height) in [int, float] and height > 0
+        self._cell = cell
+        self._cols = max(1, int(np.ceil(width / cell)))
+        self._rows = max(1, int(np.ceil(height / cell)))
+        self._items = np.zeros(0, dtype=np.intp)
+        self._start = np.zeros(self._rows * self._cols + 1, dtype=np.intp)
+        self._size = 0
+        self._occupied = 0
+        self.resetStats()
+
+
+    def resetStats(self):
+        """
+        Sets the counts of candidate pairs and queries back to 0.
+        """
+        self._tested = 0
+        self._queries = 0
+
+
+    def build(self, xs, ys):
+        """
+        Fills the grid with a new batch of objects, replacing the old ones.
+
+        Every object goes in the cell holding its center.
+
+        Parameter xs, ys: the centers of the objects
+        Precondition: xs and ys are float arrays of the same length
+        """
+        cells = self._cellOf(xs, self._cols) + \
+                self._cellOf(ys, self._rows) * self._cols
+        counts = np.bincount(cells, minlength=self._rows * self._cols)
+        self._items = np.argsort(cells, kind='stable')
+        np.cumsum(counts, out=self._start[1:])
+        self._size = len(cells)
+        self._occupied = int(np.count_nonzero(counts))
+
+
+    def query(self, xs, ys, reachx, reachy):
+        """
+        Returns the candidate pairs for a batch of query boxes.
+
+        Query box i is centered at (xs[i], ys[i]) and reaches reachx to the
+        left and right and reachy up and down. Only the cells it touches are
+        looked at.
+
+        The result is a pair of int arrays (queries, objects) of the same
+        length: queries[k] is the index of a query box and objects[k] the
+        index of an object in one of its cells. The pairs are grouped by
+        query box, in increasing order.
+
+        Parameter xs, ys: the centers of the query boxes
+        Precondition: xs and ys are float arrays of the same length
+
+        Parameter reachx, reachy: how far each box reaches from its center
+        Precondition: reachx and reachy are numbers >= 0
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        self._queries += len(xs)
+        if len(xs) == 0 or self._size == 0:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty
+
+        x0 = self._cellOf(xs - reachx, self._cols)
+        x1 = self._cellOf(xs + reachx, self._cols)
+        y0 = self._cellOf(ys - reachy, self._rows)
+        y1 = self._cellOf(ys + reachy, self._rows)
+
+        # Every box touches at most a kx by ky block of cells
+        kx = int((x1 - x0).max()) + 1
+        ky = int((y1 - y0).max()) + 1
+        cx = x0[:, None, None] + np.arange(kx)[None, None, :]
+        cy = y0[:, None, None] + np.arange(ky)[None, :, None]
+        inside = (cx <= x1[:, None, None]) & (cy <= y1[:, None, None])
+        owner = np.broadcast_to(np.arange(len(xs))[:, None, None], inside.shape)
+        cells = (cy * self._cols + cx)[inside]
+        owner = owner[inside]
+
+        # Gather the contents of every touched cell, skipping empty ones
+        first = self._start[cells]
+        counts = self._start[cells + 1] - first
+        full = counts > 0
+        first, counts, owner = first[full], counts[full], owner[full]
+        total = int(counts.sum())
+        self._tested += total
+        skip = np.repeat(first - (np.cumsum(counts) - counts), counts)
+        objects = self._items[np.arange(total) + skip]
+        return np.repeat(owner, counts), objects
+
+
+    def near(self, x, y, reachx, reachy):
+        """
+        Returns the objects in the cells touched by a single query box.
+
+        This is query for one box, without the cost of setting up arrays.
+        The result is a list of object indices in increasing order.
+
+        Parameter x, y: the center of the query box
+        Precondition: x and y are numbers (int or float)
+
+        Parameter reachx, reachy: how far the box reaches from its center
+        Precondition: reachx and reachy are numbers >= 0
+        """
+        self._queries += 1
+        if self._size == 0:
+            return []
+        top = self._cols - 1
+        x0 = min(max(int((x - reachx) // self._cell), 0), top)
+        x1 = min(max(int((x + reachx) // self._cell), 0), top)
+        top = self._rows - 1
+        y0 = min(max(int((y - reachy) // self._cell), 0), top)
+        y1 = min(max(int((y + reachy) // self._cell), 0), top)
+        result = []
+        for row in range(y0, y1 + 1):
+            first = row * self._cols
+            start = self._start[first + x0]
+            stop = self._start[first + x1 + 1]
+            if start < stop:
+                result.extend(self._items[start:stop].tolist())
+        self._tested += len(result)
+        result.sort()
+        return result
+
+
+    # HIDDEN METHODS
+    def _cellOf(self, values, limit):
+        """
+        Returns the cell coordinates of an array of positions.
+
+        Positions off the grid are clamped to the nearest edge cell.
+
+        Parameter values: the positions along one axis
+        Precondition: values is a float array
+
+        Parameter limit: the number of cells along that axis
+        Precondition: limit is an int > 0
+        """
+        cells = np.floor_divide(values, self._cell).astype(np.intp)
+        np.maximum(cells, 0, out=cells)
+        return np.minimum(cells, limit - 1, out=cells)
@@ -0,0 +1,13 @@
+"""
+Test configuration for Alien Invaders
+
+The modules of the game live at the top of the repository and import each other
+by name (from consts import *), so the tests put that directory on the path.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
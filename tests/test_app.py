@@ -0,0 +1,94 @@
+"""
+Tests for the fixed time step of GameApp._refresh in game2d/app.py
+
+GameApp needs Kivy to be imported, but _refresh is tested on a stand-in object, so
+no window is opened.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import pytest
+
+pytest.importorskip('kivy')
+
+from game2d.app import GameApp
+
+
+class View(object):
+    """
+    A view that is only ever cleared.
+    """
+    def clear(self):
+        pass
+
+
+class Stub(object):
+    """
+    Stands in for a GameApp, recording the time step of every update it runs.
+    """
+    def __init__(self, tickrate, maxsteps=5):
+        self._tickrate = tickrate
+        self._maxsteps = maxsteps
+        self._lag = 0.0
+        self._alpha = 1.0
+        self._profiler = None
+        self._metrics = None
+        self._frame = 0
+        self.view = View()
+        self.updates = []
+        self.draws = 0
+
+    def _step(self, dt, times):
+        self.updates.append(dt)
+
+    def draw(self):
+        self.draws += 1
+
+
+def refresh(stub, dt):
+    """
+    Runs one frame of dt seconds on stub, and returns the number of updates it ran.
+    """
+    before = len(stub.updates)
+    GameApp._refresh(stub, dt)
+    return len(stub.updates) - before
+
+
+def test_lag_carries_over():
+    """
+    Time left over from a frame carries over to the next, and alpha is the fraction
+    of a step it makes up.
+    """
+    stub = Stub(10)
+    expected = [(0.04, 0, 0.04), (0.09, 1, 0.03), (0.25, 2, 0.08), (0.03, 1, 0.01),
+                (0.13, 1, 0.04)]
+    for dt, steps, lag in expected:
+        assert refresh(stub, dt) == steps
+        assert stub._lag == pytest.approx(lag, abs=1e-9)
+        assert stub._alpha == pytest.approx(lag * 10, abs=1e-8)
+    assert stub.updates == [0.1] * 5
+    assert stub.draws == len(expected) and stub._frame == len(expected)
+
+
+def test_maxsteps():
+    """
+    A long frame runs at most maxsteps updates, and drops the whole steps it still
+    owes, keeping only the fraction of a step.
+    """
+    stub = Stub(10, maxsteps=3)
+    assert refresh(stub, 1.05) == 3
+    assert stub._lag == pytest.approx(0.05)
+    assert stub._alpha == pytest.approx(0.5)
+    assert refresh(stub, 0.06) == 1
+    assert stub._lag == pytest.approx(0.01)
+
+
+def test_no_tickrate():
+    """
+    Without a tick rate, every frame runs one update with the time of the frame.
+    """
+    stub = Stub(None)
+    for dt in [0.01, 0.5, 0.02]:
+        assert refresh(stub, dt) == 1
+    assert stub.updates == [0.01, 0.5, 0.02]
+    assert stub._alpha == 1.0
@@ -0,0 +1,76 @@
+"""
+Tests that WaveBatch (batch.py) plays exactly the games WaveCore (core.py) plays.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import random
+
+import numpy as np
+import pytest
+
+import batch
+import env
+from consts import *
+from core import WaveCore
+from batch import WaveBatch
+
+
+def compare(batch, i, wave):
+    """
+    Asserts that game i of batch is in the same state as wave.
+    """
+    assert batch.score[i] == wave.getScore()
+    assert batch.lives[i] == wave.getLives()
+    assert batch.formX[i] == wave._aliens.x[0, 0]
+    assert batch.formY[i] == wave._aliens.y[0, 0]
+    assert (batch.alive[i] == wave._aliens.alive).all()
+    if wave._ship is not None:
+        assert batch.shipX[i] == wave._ship.x
+    assert batch.bossOn[i] == (wave._boss_alien is not None)
+    n = wave._bolts.count()
+    on = batch.boltOn[i]
+    assert sorted(zip(batch.boltX[i][on].tolist(), batch.boltY[i][on].tolist())) == \
+        sorted(zip(wave._bolts.x[:n].tolist(), wave._bolts.y[:n].tolist()))
+
+
+def test_batch_matches_core():
+    """
+    Every game of a batch matches a WaveCore with the same seed and inputs, frame for
+    frame, through the end of the wave and into the next one.
+    """
+    games, seed = 16, 100
+    batch = WaveBatch(games, seed=seed)
+    waves = [WaveCore(seed + i) for i in range(games)]
+    rng = random.Random(5)
+    choices = [0, INPUT_LEFT, INPUT_RIGHT, INPUT_FIRE, INPUT_LEFT | INPUT_FIRE,
+               INPUT_RIGHT | INPUT_FIRE]
+    finished = 0
+    for frame in range(3000):
+        actions = np.array([rng.choice(choices) for _ in range(games)])
+        for i, wave in enumerate(waves):
+            wave.step(int(actions[i]), 1/60)
+            wave.setHit(False)
+        done = batch.step(actions, 1/60)
+        for i, wave in enumerate(waves):
+            assert done[i] == wave.isComplete(), (frame, i)
+            if done[i]:
+                assert batch.getLastScores()[i] == wave.getScore()
+                assert batch.getLastWon()[i] == wave.isWon()
+                finished += 1
+                waves[i] = WaveCore(int(batch.getSeeds()[i]))
+            else:
+                compare(batch, i, wave)
+    assert finished > 0
+
+
+def test_batch_refuses_stress_mode(monkeypatch):
+    """
+    Neither WaveBatch nor VectorInvadersEnv plays in stress mode, whose rules (several
+    player bolts, alien volleys) are not those of the batch.
+    """
+    monkeypatch.setattr(batch, 'STRESS_MODE', True)
+    with pytest.raises(AssertionError, match='stress mode'):
+        WaveBatch(4)
+    with pytest.raises(AssertionError, match='stress mode'):
+        env.VectorInvadersEnv(4).reset()
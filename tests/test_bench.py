@@ -0,0 +1,49 @@
+"""
+Tests for the micro-benchmarks (bench.py).
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import pytest
+
+from consts import *
+from bench import CASES, BenchWave, measure, runMatrix
+
+
+def test_bench_wave():
+    """
+    A bench wave has a full formation of the size asked for, even one too large for
+    the game, and addBolts alternates player and alien bolts.
+    """
+    wave = BenchWave(3, 40)
+    assert wave.getFormation().getShape() == (3, 40)
+    assert wave.getFormation().count() == 120
+    wave.addBolts(7, seed=1)
+    bolts = wave.getBoltBuffer()
+    assert bolts.count() == 7
+    assert bolts.countOwned(BOLT_PLAYER) == 4 and bolts.countOwned(BOLT_ALIEN) == 3
+
+
+@pytest.mark.parametrize('case', list(CASES))
+def test_measure(case):
+    """
+    Every case can be measured, and gives positive times in order.
+    """
+    result = measure(case, 2, 3, bolts=5, repeat=5, traced=2)
+    assert (result['case'], result['rows'], result['cols'], result['bolts']) == \
+        (case, 2, 3, 5)
+    assert result['calls'] == 5 and result['opsPerSec'] > 0
+    assert 0 <= result['p50'] <= result['max'] and result['p99'] <= result['max']
+    assert result['mean'] <= result['max'] and result['allocBytes'] >= 0
+
+
+def test_run_matrix():
+    """
+    The matrix measures the cases that do not touch the bolts once per size, and the
+    others once per size and number of bolts.
+    """
+    results = list(runMatrix(['ExtremeX', 'BoltLoop'], sizes=[(1, 2), (2, 2)],
+                             bolts=[0, 3], repeat=2))
+    assert [(r['case'], r['rows'], r['bolts']) for r in results] == \
+        [('ExtremeX', 1, 0), ('ExtremeX', 2, 0), ('BoltLoop', 1, 0), ('BoltLoop', 1, 3),
+         ('BoltLoop', 2, 0), ('BoltLoop', 2, 3)]
@@ -0,0 +1,97 @@
+"""
+Tests for the frame capture pipeline in game2d/capture.py
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import threading
+
+import numpy as np
+import pytest
+
+import game2d.capture as capture
+from game2d.capture import FrameCapture
+from game2d.softview import decode_png
+
+
+def frame(value, height=4, width=6):
+    """
+    Returns a frame of the given size with every byte set to value.
+    """
+    return np.full((height, width, 4), value, dtype=np.uint8)
+
+
+def test_ring_overflow(tmp_path, monkeypatch):
+    """
+    Once every buffer waits to be encoded, new frames are dropped and counted, and
+    the frames kept are written under their own numbers.
+    """
+    release = threading.Event()
+    encode = capture.encode_png
+    monkeypatch.setattr(capture, 'encode_png',
+                        lambda pixels: release.wait(10) and encode(pixels))
+    cap = FrameCapture(str(tmp_path), slots=2, workers=1)
+    taken = [cap.grab(frame(i)) for i in range(5)]
+    assert taken == [True, True, False, False, False]
+    assert cap.captured == 2 and cap.dropped == 3
+    release.set()
+    cap.close()
+    assert cap.written == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['frame000000.png', 'frame000001.png']
+    assert (decode_png(str(tmp_path / 'frame000001.png')) == frame(1)).all()
+
+
+def test_raw_order(tmp_path):
+    """
+    Raw frames end up in the file in the order they were taken, whichever thread
+    wrote them.
+    """
+    path = tmp_path / 'frames.rgba'
+    cap = FrameCapture(str(path), slots=4, workers=4)
+    kept = [i for i in range(50) if cap.grab(frame(i))]
+    cap.close()
+    assert cap.written == len(kept) == cap.captured
+    assert cap.captured + cap.dropped == 50
+    data = np.frombuffer(path.read_bytes(), dtype=np.uint8).reshape(-1, 4, 6, 4)
+    assert data[:, 0, 0, 0].tolist() == kept
+
+
+def test_resize(tmp_path):
+    """
+    A frame of another size is dropped from raw video, but written to a PNG file.
+    """
+    path = tmp_path / 'frames.rgba'
+    cap = FrameCapture(str(path), slots=2, workers=1)
+    assert cap.grab(frame(1))
+    assert not cap.grab(frame(2, 8, 10))
+    assert cap.grab(frame(3))
+    cap.close()
+    assert cap.dropped == 1 and cap.written == 2
+    assert path.read_bytes() == frame(1).tobytes() + frame(3).tobytes()
+
+    folder = tmp_path / 'png'
+    cap = FrameCapture(str(folder), slots=2, workers=1)
+    cap.grab(frame(1))
+    cap.grab(frame(2, 8, 10))
+    cap.close()
+    assert decode_png(str(folder / 'frame000000.png')).shape == (4, 6, 4)
+    assert decode_png(str(folder / 'frame000001.png')).shape == (8, 10, 4)
+
+
+def test_error_from_close(tmp_path, monkeypatch):
+    """
+    A frame that cannot be encoded does not stop the capture, and close raises the
+    first error once.
+    """
+    def fail(pixels):
+        raise ValueError('cannot encode')
+
+    monkeypatch.setattr(capture, 'encode_png', fail)
+    cap = FrameCapture(str(tmp_path), slots=2, workers=1)
+    for i in range(10):
+        cap.grab(frame(i))
+    with pytest.raises(ValueError, match='cannot encode'):
+        cap.close()
+    assert isinstance(cap.error, ValueError)
+    assert cap.written == 0
+    cap.close()
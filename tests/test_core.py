@@ -0,0 +1,425 @@
+"""
+Tests for the headless rules of the game (core.py).
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import numpy as np
+import pytest
+
+from consts import *
+from core import BoltBuffer, Formation, WaveCore, WaveStats
+from tournament import RandomBot
+
+
+def test_formation_layout():
+    """
+    A new formation is full, with its rows ALIEN_V_SEP apart from the ceiling down
+    and its columns ALIEN_H_SEP apart from the left edge.
+    """
+    aliens = Formation(4, 6)
+    assert aliens.getShape() == (4, 6) and aliens.count() == 24
+    assert aliens.alive.all() and (aliens.hp == ALIEN_HEALTH).all()
+    assert aliens.x[0, 0] == ALIEN_H_SEP + ALIEN_WIDTH/2
+    assert aliens.y[0, 0] == GAME_HEIGHT - ALIEN_CEILING - ALIEN_HEIGHT/2
+    assert (np.diff(aliens.x, axis=1) == ALIEN_H_SEP + ALIEN_WIDTH).all()
+    assert (np.diff(aliens.y, axis=0) == -(ALIEN_V_SEP + ALIEN_HEIGHT)).all()
+    assert (aliens.x == aliens.x[0]).all() and (aliens.y.T == aliens.y[:, 0]).all()
+    assert aliens.kind[:, 0].tolist() == [0, 0, 1, 1]
+
+
+def test_formation_move_and_extremes():
+    """
+    Moving a formation moves every alien, and its extremes follow.
+    """
+    aliens = Formation(3, 5)
+    x, y = aliens.x.copy(), aliens.y.copy()
+    aliens.move(7, 0)
+    aliens.move(0, -3.5)
+    assert (aliens.x == x + 7).all() and (aliens.y == y - 3.5).all()
+    assert aliens.extremeX() == (x[0, 4] + 7, x[0, 0] + 7)
+    assert aliens.lowestY() == y[2, 0] - 3.5
+    assert aliens.isAlive(2, 4)
+
+
+def scatter(seed, bolts):
+    """
+    Returns a damaged formation and the centers of bolts in and around it.
+
+    Some aliens are dead and some have two hit points, and the bolts are spread over
+    the box around the formation.
+    """
+    rng = np.random.default_rng(seed)
+    aliens = Formation(5, 11)
+    aliens.move(float(rng.uniform(0, 100)), float(-rng.uniform(0, 100)))
+    dead = rng.random(aliens.alive.shape) < 0.3
+    aliens.alive[dead] = False
+    aliens.hp[dead] = 0
+    aliens.hp[aliens.alive & (rng.random(aliens.alive.shape) < 0.2)] = 2
+    aliens.recount()
+    xs = rng.uniform(aliens.x.min() - ALIEN_WIDTH, aliens.x.max() + ALIEN_WIDTH, bolts)
+    ys = rng.uniform(aliens.y.min() - ALIEN_HEIGHT, aliens.y.max() + ALIEN_HEIGHT, bolts)
+    return aliens, xs, ys
+
+
+def brute(aliens, xs, ys):
+    """
+    Resolves bolts against a copy of the formation one pair at a time, and returns
+    (hits, killed, copy).
+
+    Each bolt in turn hits the first live alien in row order that its box overlaps.
+    """
+    copy = Formation(*aliens.getShape())
+    copy.copyFrom(aliens)
+    hits = []
+    killed = []
+    for x, y in zip(xs.tolist(), ys.tolist()):
+        hit = False
+        for a in range(copy.alive.size):
+            r, c = divmod(a, copy.alive.shape[1])
+            if copy.alive[r, c] and abs(copy.x[r, c] - x) < (BOLT_WIDTH + ALIEN_WIDTH)/2 \
+                    and abs(copy.y[r, c] - y) < (BOLT_HEIGHT + ALIEN_HEIGHT)/2:
+                if copy.hit(r, c):
+                    killed.append(a)
+                hit = True
+                break
+        hits.append(hit)
+    return np.array(hits), sorted(killed), copy
+
+
+def same(aliens, other):
+    """
+    Asserts that two formations are in the same state, counts included.
+
+    The edges are only compared while an alien is alive, as they are undefined once
+    the formation is empty.
+    """
+    assert (aliens.alive == other.alive).all() and (aliens.hp == other.hp).all()
+    assert aliens.count() == other.count() and aliens.columns() == other.columns()
+    if aliens.count() > 0:
+        assert (aliens.getLeft(), aliens.getRight(), aliens.getLowest()) == \
+            (other.getLeft(), other.getRight(), other.getLowest())
+
+
+@pytest.mark.parametrize('bolts', [1, 4, FEW_BOLTS, 40, 200])
+def test_collide_matches_brute_force(bolts):
+    """
+    Resolving bolts in one batch gives the hits of testing every pair in turn, for
+    a few bolts (tested one at a time) and for many (tested as arrays).
+    """
+    for seed in range(20):
+        aliens, xs, ys = scatter(seed, bolts)
+        hits, killed, copy = brute(aliens, xs, ys)
+        found, dead, _ = aliens.collide(xs, ys, BOLT_WIDTH, BOLT_HEIGHT)
+        assert (found == hits).all()
+        assert sorted(dead.tolist()) == killed
+        same(aliens, copy)
+
+
+def test_collide_candidate_pairs():
+    """
+    Given every (bolt, alien) pair as candidates, collide finds the same hits.
+    """
+    for seed in range(10):
+        aliens, xs, ys = scatter(seed, 30)
+        hits, killed, copy = brute(aliens, xs, ys)
+        size = aliens.alive.size
+        found, dead, _ = aliens.collide(xs, ys, BOLT_WIDTH, BOLT_HEIGHT,
+                                        np.repeat(np.arange(30), size),
+                                        np.tile(np.arange(size), 30))
+        assert (found == hits).all()
+        assert sorted(dead.tolist()) == killed
+        same(aliens, copy)
+
+
+def test_edges_follow_hits():
+    """
+    The edges, counts and live columns kept up to date by hit are those recount
+    works out from scratch, as aliens die in any order.
+    """
+    rng = np.random.default_rng(5)
+    aliens = Formation(4, 7)
+    cells = [(r, c) for r in range(4) for c in range(7)]
+    rng.shuffle(cells)
+    for r, c in cells[:-1]:
+        assert aliens.hit(r, c)
+        fresh = Formation(4, 7)
+        fresh.alive[:] = aliens.alive
+        fresh.hp[:] = aliens.hp
+        fresh.recount()
+        same(aliens, fresh)
+        for col in range(7):
+            assert aliens.bottom(col) == fresh.bottom(col)
+        assert sorted(aliens.column(i) for i in range(aliens.columnCount())) == \
+            aliens.columns()
+    assert aliens.count() == 1
+
+
+def test_edges_move_in():
+    """
+    Emptying the outer columns and the bottom row moves the edges inwards.
+    """
+    aliens = Formation(3, 5)
+    for r in range(3):
+        aliens.hit(r, 0)
+        aliens.hit(r, 4)
+    for c in range(1, 4):
+        aliens.hit(2, c)
+    assert (aliens.getLeft(), aliens.getRight(), aliens.getLowest()) == (1, 3, 1)
+    assert aliens.extremeX() == (aliens.x[0, 3], aliens.x[0, 1])
+    assert aliens.lowestY() == aliens.y[1, 0]
+    assert aliens.count() == 6 and aliens.columns() == [1, 2, 3]
+    assert aliens.bottom(0) is None and aliens.bottom(2) == 1
+
+
+def test_compact_swap_remove():
+    """
+    compact replaces every spent bolt by the last bolt in the buffer, visiting the
+    spent bolts from the back.
+    """
+    bolts = BoltBuffer(capacity=4)
+    for i in range(10):
+        bolts.add(float(i), 100.0, BOLT_SPEED, BOLT_PLAYER if i % 2 else BOLT_ALIEN)
+    assert bolts.getCapacity() >= 10 and bolts.count() == 10
+    bolts.kill([2, 5, 9])
+    assert bolts.countOwned(BOLT_PLAYER) == 3 and bolts.countOwned(BOLT_ALIEN) == 4
+    bolts.compact()
+    assert bolts.x[:bolts.count()].tolist() == [0, 1, 7, 3, 4, 8, 6]
+    assert bolts.owned(BOLT_PLAYER).tolist() == [1, 2, 3]
+    assert not bolts.spent[:bolts.count()].any()
+
+
+def test_bolts_leave_the_screen():
+    """
+    move marks the bolts past the top or the bottom of the game as spent.
+    """
+    bolts = BoltBuffer()
+    bolts.add(10.0, GAME_HEIGHT + BOLT_HEIGHT/2 - 1, BOLT_SPEED, BOLT_PLAYER)
+    bolts.add(20.0, 300.0, BOLT_SPEED, BOLT_PLAYER)
+    bolts.add(30.0, -BOLT_HEIGHT/2 + 1, -BOLT_SPEED, BOLT_ALIEN)
+    bolts.move()
+    assert bolts.spent[:3].tolist() == [True, False, True]
+    assert bolts.y[1] == 300 + BOLT_SPEED
+    bolts.compact()
+    assert bolts.count() == 1 and bolts.x[0] == 20
+
+
+def state(wave):
+    """
+    Returns everything about a wave that decides how it plays on.
+    """
+    aliens = wave.getFormation()
+    bolts = wave.getBoltBuffer()
+    n = bolts.count()
+    return (wave.getScore(), wave.getLives(), wave.getStep(), wave.getTime(),
+            wave.getShipX(), wave.getBossPosition(), wave.getBossHealth(),
+            aliens.x.tobytes(), aliens.hp.tobytes(), aliens.columns(),
+            bolts.x[:n].tobytes(), bolts.y[:n].tobytes(), bolts.owner[:n].tobytes(),
+            wave._rng.getstate())
+
+
+def play(wave, keys):
+    """
+    Plays the keys in wave, one per frame, and returns the state after each frame.
+    """
+    states = []
+    for k in keys:
+        wave.step(k, GAME_FRAME_TIME)
+        wave.setHit(False)
+        states.append(state(wave))
+    return states
+
+
+@pytest.mark.parametrize('boss', [False, True])
+def test_snapshot_restore(boss):
+    """
+    A restored wave is in the state it was saved in, and plays on exactly as it did
+    after the snapshot, with or without the boss.
+    """
+    wave = WaveCore(6)
+    bot = RandomBot(6)
+    keys = [bot(wave) for _ in range(900)]
+    play(wave, keys[:300])
+    if boss:
+        wave.getFormation().alive[:] = False
+        wave.getFormation().hp[:] = 0
+        wave.getFormation().recount()
+        play(wave, keys[300:310])
+        assert wave.getBossPosition() is not None
+    snap = wave.snapshot()
+    saved = state(wave)
+    after = play(wave, keys[310:900])
+    wave.restore(snap)
+    assert state(wave) == saved
+    assert play(wave, keys[310:900]) == after
+    assert wave.snapshot(into=snap) is snap
+    wave.restore(snap)
+    assert state(wave) == after[-1]
+
+
+def test_stats_phase_totals(tmp_path):
+    """
+    A timed wave times every phase of step once per step, counts every pair it tests
+    for collisions in some phase, and plays exactly as an untimed wave.
+    """
+    timed, plain = WaveCore(8), WaveCore(8)
+    stats = WaveStats()
+    timed.setStats(stats)
+    assert timed.getStats() is stats
+    bot = RandomBot(8)
+    keys = [bot(plain) for _ in range(400)]
+    assert play(timed, keys) == play(plain, keys)
+    report = stats.report()
+    assert report['steps'] == stats.getSteps() == 400
+    assert 'sync' not in report
+    for phase in WaveStats.PHASES[:-1]:
+        entry = report[phase]
+        assert entry['calls'] == 400
+        assert 0 <= entry['meanUs'] <= entry['maxUs']
+        assert entry['meanUs'] == pytest.approx(entry['totalMs'] * 1000 / 400, abs=1e-2)
+    assert sum(report[p]['pairs'] for p in WaveStats.PHASES[:-1]) == \
+        timed.getPairsTested() > 0
+    assert report['aliens']['pairs'] > 0 and report['ship']['pairs'] > 0
+    stats.dump(str(tmp_path / 'stats.jsonl'), seed=8)
+    stats.reset()
+    assert stats.report() == {'steps': 0}
+    assert (tmp_path / 'stats.jsonl').read_text().startswith('{"seed": 8, "steps": 400')
+
+
+def impact(x, y, vy, tx, ty, width, height):
+    """
+    Returns when a bolt ending the step at (x, y), having moved vy, first touches a
+    box of the given size centered at (tx, ty), or None if it never does.
+
+    The path is sampled closely enough that no contact falls between two samples,
+    and the first contact is then narrowed down by bisection.
+    """
+    reachx = (BOLT_WIDTH + width)/2
+    reachy = (BOLT_HEIGHT + height)/2
+    if abs(tx - x) >= reachx:
+        return None
+    start = y - vy
+
+    def touches(t):
+        return abs(start + vy*t - ty) < reachy
+
+    samples = 64
+    for k in range(samples + 1):
+        if touches(k / samples):
+            break
+    else:
+        return None
+    if k == 0:
+        return 0.0
+    low, high = (k - 1) / samples, k / samples
+    for _ in range(60):
+        middle = (low + high) / 2
+        if touches(middle):
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def sweptBrute(aliens, xs, ys, vys):
+    """
+    Resolves moving bolts against a copy of the formation one at a time, and returns
+    (hits, killed, times, copy).
+
+    Each bolt in turn hits the live alien it touches first along its path, and the
+    first in row order if it touches several at once.
+    """
+    copy = Formation(*aliens.getShape())
+    copy.copyFrom(aliens)
+    cols = copy.alive.shape[1]
+    hits, killed, times = [], [], []
+    for x, y, vy in zip(xs.tolist(), ys.tolist(), vys.tolist()):
+        first = None
+        for a in range(copy.alive.size):
+            r, c = divmod(a, cols)
+            if copy.alive[r, c]:
+                t = impact(x, y, vy, copy.x[r, c], copy.y[r, c], ALIEN_WIDTH, ALIEN_HEIGHT)
+                if t is not None and (first is None or t < first[0]):
+                    first = (t, r, c)
+        hits.append(first is not None)
+        times.append(np.inf if first is None else first[0])
+        if first is not None and copy.hit(first[1], first[2]):
+            killed.append(first[1]*cols + first[2])
+    return np.array(hits), sorted(killed), np.array(times), copy
+
+
+@pytest.mark.parametrize('bolts', [1, FEW_BOLTS, 40, 200])
+def test_swept_collide_matches_brute_force(bolts):
+    """
+    Sweeping bolts of any speed, up or down, finds the hits and times of impact of
+    following every bolt along its path in turn.
+    """
+    for seed in range(20):
+        aliens, xs, ys = scatter(seed, bolts)
+        rng = np.random.default_rng(seed + 100)
+        vys = rng.uniform(-4, 4, bolts) * (ALIEN_HEIGHT + ALIEN_V_SEP)
+        hits, killed, times, copy = sweptBrute(aliens, xs, ys, vys)
+        found, dead, when = aliens.collide(xs, ys, BOLT_WIDTH, BOLT_HEIGHT, vys=vys)
+        assert (found == hits).all()
+        assert sorted(dead.tolist()) == killed
+        assert when == pytest.approx(times, abs=1e-9)
+        same(aliens, copy)
+
+
+def test_fast_bolt_passes_through():
+    """
+    A bolt fast enough to pass through an alien in one step, ending beyond it, hits
+    the alien only when it is swept, and hits the lower of two aliens first.
+    """
+    aliens = Formation(2, 3)
+    x, low, high = aliens.x[1, 1], aliens.y[1, 1], aliens.y[0, 1]
+    end = high + ALIEN_HEIGHT + BOLT_HEIGHT
+    speed = end - (low - ALIEN_HEIGHT - BOLT_HEIGHT)
+    xs, ys = np.array([x]), np.array([end])
+    assert impact(x, end, speed, x, high, ALIEN_WIDTH, ALIEN_HEIGHT) is not None
+
+    found, dead, _ = aliens.collide(xs, ys, BOLT_WIDTH, BOLT_HEIGHT)
+    assert not found.any() and aliens.count() == 6
+
+    found, dead, when = aliens.collide(xs, ys, BOLT_WIDTH, BOLT_HEIGHT,
+                                       vys=np.array([speed]))
+    assert found.tolist() == [True] and dead.tolist() == [4]
+    assert not aliens.isAlive(1, 1) and aliens.isAlive(0, 1)
+    reach = (BOLT_HEIGHT + ALIEN_HEIGHT)/2
+    assert when[0] == pytest.approx((ALIEN_HEIGHT + BOLT_HEIGHT - reach) / speed)
+
+    found, dead, _ = aliens.collide(np.repeat(xs, 12), np.repeat(ys, 12),
+                                    BOLT_WIDTH, BOLT_HEIGHT, vys=np.full(12, speed))
+    assert found.tolist() == [True] + [False] * 11 and dead.tolist() == [1]
+
+
+@pytest.mark.parametrize('count', [FEW_BOLTS, 60])
+def test_bolt_sweep(count):
+    """
+    Sweeping the bolts of a buffer against a box finds, in order of impact, the live
+    bolts of the owner that touch it along their paths, whether every bolt is tested
+    or a list of indices is.
+    """
+    rng = np.random.default_rng(count)
+    bolts = BoltBuffer()
+    for i in range(count):
+        owner = BOLT_PLAYER if i % 3 else BOLT_ALIEN
+        bolts.add(float(rng.uniform(180, 220)), float(rng.uniform(100, 300)),
+                  float(rng.uniform(-120, 120)), owner)
+    bolts.kill([1, 2])
+    box = (200.0, 200.0, SHIP_WIDTH, SHIP_HEIGHT)
+    expected = []
+    for i in range(count):
+        if bolts.owner[i] == BOLT_PLAYER and not bolts.spent[i]:
+            t = impact(bolts.x[i], bolts.y[i], bolts.vy[i], *box)
+            if t is not None:
+                expected.append((t, i))
+    expected.sort()
+    assert expected
+    for indices in [None, list(range(count)), np.arange(count)]:
+        found = bolts.sweep(indices, *box, BOLT_PLAYER)
+        assert [i for _, i in found] == [i for _, i in expected]
+        assert [t for t, _ in found] == pytest.approx([t for t, _ in expected], abs=1e-9)
+    odd = list(range(1, count, 2))
+    found = bolts.sweep(odd, *box, BOLT_PLAYER)
+    assert [i for _, i in found] == [i for _, i in expected if i % 2]
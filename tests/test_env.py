@@ -0,0 +1,133 @@
+"""
+Tests for the learning environments (env.py).
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import numpy as np
+
+from consts import *
+from env import ACTIONS, OBSERVATION_SIZE, InvadersEnv, VectorInvadersEnv
+
+
+def play(env, actions):
+    """
+    Plays the actions in env until they run out or the wave is over, and returns the
+    list of (reward, done, info) of every step.
+    """
+    result = []
+    for action in actions:
+        _, reward, done, info = env.step(action)
+        result.append((reward, done, info))
+        if done:
+            break
+    return result
+
+
+def test_reset():
+    """
+    reset starts a wave with the given seed and returns its first observation.
+    """
+    env = InvadersEnv()
+    obs = env.reset(seed=3)
+    assert obs.shape == (OBSERVATION_SIZE,) and obs.dtype == np.float32
+    assert env.getWave().getSeed() == 3 and env.getWave().getStep() == 0
+    assert (obs == InvadersEnv().reset(seed=3)).all()
+    assert obs[1] == 1 and obs[2] == 1
+
+
+def test_step_and_done():
+    """
+    A wave played to the end reports done with float rewards that add up to its
+    score, and a step after the end plays no frames.
+    """
+    env = InvadersEnv()
+    env.reset(seed=1)
+    rng = np.random.default_rng(1)
+    steps = play(env, rng.integers(0, ACTIONS, GAME_FRAME_LIMIT))
+    reward, done, info = steps[-1]
+    assert done and env.getWave().isComplete()
+    assert all(type(r) is float for r, _, _ in steps)
+    assert sum(r for r, _, _ in steps) == info['score']
+    _, reward, done, info = env.step(0)
+    assert done and reward == 0.0 and info['frames'] == 0
+
+
+def test_frameskip():
+    """
+    A step of frameskip frames plays exactly those frames, with the rewards of the
+    single frames added up.
+    """
+    skip, one = InvadersEnv(frameskip=4), InvadersEnv()
+    skip.reset(seed=2)
+    one.reset(seed=2)
+    rng = np.random.default_rng(2)
+    for action in rng.integers(0, ACTIONS, 300).tolist():
+        obs, reward, done, info = skip.step(action)
+        frames = play(one, [action] * 4)
+        assert info['frames'] == len(frames)
+        assert reward == sum(r for r, _, _ in frames)
+        assert skip.getWave().getStep() == one.getWave().getStep()
+        assert (obs == one.observe()).all()
+        if done:
+            break
+
+
+def test_life_penalty():
+    """
+    The life penalty is taken off the reward once for every life lost in a step.
+    """
+    plain, hurt = InvadersEnv(), InvadersEnv(lifePenalty=100)
+    plain.reset(seed=4)
+    hurt.reset(seed=4)
+    lost = 0
+    for _ in range(GAME_FRAME_LIMIT):
+        _, reward, done, info = plain.step(INPUT_FIRE)
+        _, penalized, _, _ = hurt.step(INPUT_FIRE)
+        assert type(penalized) is float
+        assert penalized == reward - 100 * info['livesLost']
+        lost += info['livesLost']
+        if done or lost:
+            break
+    assert lost > 0
+
+
+def test_numpy_actions():
+    """
+    Actions may be NumPy integers, and play like the same Python ints.
+    """
+    ints, nps = InvadersEnv(), InvadersEnv()
+    ints.reset(seed=5)
+    nps.reset(seed=5)
+    for action in range(ACTIONS):
+        a = ints.step(action)
+        b = nps.step(np.int64(action))
+        assert (a[0] == b[0]).all() and a[1:3] == b[1:3]
+    vector = VectorInvadersEnv(2)
+    vector.reset()
+    vector.step(np.array([INPUT_FIRE, INPUT_LEFT], dtype=np.int8))
+
+
+def test_vector_auto_reset():
+    """
+    A game of a vector environment whose wave ends starts the next one at once: its
+    done flag is set, and its observation is that of the new wave.
+    """
+    games = 8
+    env = VectorInvadersEnv(games, frameskip=2)
+    obs = env.reset(seed=10)
+    assert obs.shape == (games, OBSERVATION_SIZE)
+    rng = np.random.default_rng(10)
+    finished = 0
+    for _ in range(GAME_FRAME_LIMIT // 2):
+        obs, rewards, dones, info = env.step(rng.integers(0, ACTIONS, games))
+        assert rewards.dtype == np.float64
+        batch = env.getBatch()
+        for i in np.flatnonzero(dones).tolist():
+            assert batch.getFrames()[i] <= 1
+            assert batch.lives[i] == SHIP_LIVES and obs[i, 2] == 1
+            assert info['score'][i] == batch.getLastScores()[i]
+            finished += 1
+        if finished >= games:
+            break
+    assert finished > 0
@@ -0,0 +1,32 @@
+"""
+Tests for the scene graph of game2d (game2d/gobject.py).
+
+The objects are Kivy drawing instructions, so these tests are skipped where Kivy
+is not installed.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import pytest
+
+pytest.importorskip('kivy')
+
+from game2d import GRectangle, GScene
+
+
+def test_scene_remove():
+    """
+    Removing a child from a scene takes out only its drawing instructions, and keeps
+    the other children in order.
+    """
+    rects = [GRectangle(x=i*10, y=0, width=5, height=5) for i in range(4)]
+    scene = GScene(children=rects)
+    group = scene._cache
+    scene.remove(rects[1])
+    assert scene.children == (rects[0], rects[2], rects[3])
+    assert scene._cache is group
+    assert rects[1]._cache not in group.children
+    kept = [group.children.index(r._cache) for r in scene.children]
+    assert kept == sorted(kept)
+    with pytest.raises(AssertionError):
+        scene.remove(rects[1])
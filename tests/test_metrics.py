@@ -0,0 +1,84 @@
+"""
+Tests for the per-frame metrics log (game2d/metrics.py).
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import csv
+import json
+import threading
+
+import numpy as np
+
+from game2d.metrics import MetricsWriter
+
+
+def close_quickly(writer, timeout=10):
+    """
+    Closes writer on another thread, and returns the exception close raised, if any.
+
+    The test fails if close has not returned after timeout seconds.
+    """
+    raised = []
+
+    def run():
+        try:
+            writer.close()
+        except Exception as e:
+            raised.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "close() hung"
+    return raised[0] if raised else None
+
+
+def test_json(tmp_path):
+    """
+    Records are written as lines of JSON, NumPy scalars included.
+    """
+    path = tmp_path / 'frames.jsonl'
+    writer = MetricsWriter(str(path))
+    for i in range(100):
+        assert writer.write({'frame': np.int64(i), 'ms': np.float32(0.5)})
+    assert close_quickly(writer) is None
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines == [{'frame': i, 'ms': 0.5} for i in range(100)]
+    assert writer.written == 100 and writer.dropped == 0
+
+
+def test_csv(tmp_path):
+    """
+    Records are written as CSV with the keys of the first record as columns.
+    """
+    path = tmp_path / 'frames.csv'
+    writer = MetricsWriter(str(path))
+    writer.write({'frame': 0, 'ms': 1.5})
+    writer.write({'frame': 1, 'ms': 2.5, 'extra': 'ignored'})
+    assert close_quickly(writer) is None
+    with open(path, newline='') as f:
+        assert list(csv.reader(f)) == [['frame', 'ms'], ['0', '1.5'], ['1', '2.5']]
+
+
+def test_unopenable_path(tmp_path):
+    """
+    If the file cannot be opened, writing never blocks and close raises the error
+    instead of hanging, even with the queue full.
+    """
+    writer = MetricsWriter(str(tmp_path / 'missing' / 'frames.jsonl'), capacity=4)
+    for i in range(100):
+        writer.write({'frame': i})
+    assert isinstance(close_quickly(writer), OSError)
+    assert isinstance(writer.error, OSError)
+
+
+def test_unwritable_record(tmp_path):
+    """
+    A record that cannot be written as JSON stops the writer, and close raises it.
+    """
+    writer = MetricsWriter(str(tmp_path / 'frames.jsonl'), capacity=4)
+    for i in range(100):
+        writer.write({'frame': object()})
+    assert isinstance(close_quickly(writer), TypeError)
+    assert close_quickly(writer) is None
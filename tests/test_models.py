@@ -0,0 +1,45 @@
+"""
+Tests for the sprites of the game (models.py).
+
+The sprites are Kivy objects, so these tests are skipped where Kivy is not
+installed.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import pytest
+
+pytest.importorskip('kivy')
+
+from consts import *
+from models import Bolt, BoltPool
+
+
+def test_bolt_pool_counts():
+    """
+    A pool reuses released bolts (hits), makes new ones when it has none (misses),
+    and remembers the most bolts out at once.
+    """
+    pool = BoltPool(capacity=2)
+    bolts = [pool.acquire(10, 20, BOLT_SPEED) for _ in range(3)]
+    assert (pool.getHits(), pool.getMisses(), pool.getInUse()) == (0, 3, 3)
+    for bolt in bolts:
+        pool.release(bolt)
+    assert pool.getFree() == 2 and pool.getInUse() == 0
+    again = pool.acquire(30, 40, -BOLT_SPEED)
+    assert again in bolts
+    assert (again.getX(), again.getY(), again.getVelocity()) == (30, 40, -BOLT_SPEED)
+    pool.acquire(50, 60, BOLT_SPEED)
+    pool.acquire(70, 80, BOLT_SPEED)
+    assert (pool.getHits(), pool.getMisses()) == (2, 4)
+    assert pool.getHighWater() == 3 and pool.getInUse() == 3
+
+
+def test_bolt_pool_prefill():
+    """
+    A prefilled pool serves its first bolts without making any.
+    """
+    pool = BoltPool(capacity=4, prefill=4)
+    for _ in range(4):
+        assert isinstance(pool.acquire(0, 0, BOLT_SPEED), Bolt)
+    assert (pool.getHits(), pool.getMisses(), pool.getFree()) == (4, 0, 0)
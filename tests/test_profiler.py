@@ -0,0 +1,83 @@
+"""
+Tests for the frame profiler in game2d/profiler.py
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import numpy as np
+import pytest
+
+from game2d.profiler import FrameProfiler
+
+
+def fill(profiler, frames):
+    """
+    Records frames 0 to frames-1 in profiler, where frame i spends i+1 milliseconds in
+    each phase, runs i % 3 steps and is passed a dt of i seconds.
+    """
+    phases = len(FrameProfiler.PHASES)
+    for i in range(frames):
+        profiler.record(float(i), i % 3, [(i + 1) * 10**6] * phases,
+                        (i + 1) * phases * 10**6)
+
+
+def test_ring():
+    """
+    Once full, the profiler keeps the last capacity frames, each in the row of its
+    number modulo the capacity, and still counts every frame recorded.
+    """
+    profiler = FrameProfiler(4)
+    fill(profiler, 3)
+    assert profiler.count() == 3 and profiler.frames == 3
+    assert profiler.times('draw').tolist() == [10**6, 2 * 10**6, 3 * 10**6]
+    for i in range(3, 7):
+        profiler.record(float(i), 0, [i] * 5, 5 * i)
+    assert profiler.count() == 4 and profiler.frames == 7
+    assert profiler.times('update').tolist() == [4, 5, 6, 3]
+    assert profiler.times('frame').tolist() == [20, 25, 30, 15]
+    assert profiler.dts().tolist() == [4.0, 5.0, 6.0, 3.0]
+    profiler.reset()
+    assert profiler.count() == 0 and profiler.stats() == {}
+    assert profiler.summary() == 'no frames'
+
+
+def test_copies():
+    """
+    The times and dts returned are copies, unchanged by later frames.
+    """
+    profiler = FrameProfiler(2)
+    fill(profiler, 2)
+    times = profiler.times('clear')
+    dts = profiler.dts()
+    fill(profiler, 2)
+    profiler.record(9.0, 0, [0] * 5, 0)
+    assert times.tolist() == [10**6, 2 * 10**6] and dts.tolist() == [0.0, 1.0]
+
+
+def test_stats():
+    """
+    The stats are the percentiles of the frames kept, in milliseconds.
+    """
+    profiler = FrameProfiler(100)
+    fill(profiler, 100)
+    stats = profiler.stats()
+    assert stats['frames'] == 100 and stats['steps'] == pytest.approx(0.99)
+    millis = np.arange(1, 101)
+    for name in FrameProfiler.PHASES:
+        assert stats[name] == {'p50': pytest.approx(np.percentile(millis, 50)),
+                               'p95': pytest.approx(np.percentile(millis, 95)),
+                               'p99': pytest.approx(np.percentile(millis, 99)),
+                               'max': 100.0}
+    assert stats['frame']['max'] == 500.0
+    assert stats['dt']['max'] == 99000.0
+    assert stats['dt']['p50'] == pytest.approx(49500.0)
+
+
+def test_summary():
+    """
+    The summary gives the p50, p99 and max of update, draw, the frame and dt.
+    """
+    profiler = FrameProfiler(10)
+    profiler.record(0.016, 1, [0, 0, 2 * 10**6, 0, 3 * 10**6], 5 * 10**6)
+    assert profiler.summary() == ('update 2.0/2.0/2.0  draw 3.0/3.0/3.0  '
+                                  'frame 5.0/5.0/5.0  dt 16.0/16.0/16.0 ms (p50/p99/max)')
@@ -0,0 +1,77 @@
+"""
+Tests for recording and playing back replays (replay.py).
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import random
+import struct
+
+import pytest
+
+import consts
+import replay
+from consts import *
+from core import WaveCore
+
+
+def record(path, seed, frames):
+    """
+    Plays a wave with random inputs while recording it, and returns the wave.
+
+    Every 50th frame is a paused frame, and the time step changes halfway through.
+    """
+    wave = WaveCore(seed)
+    recorder = replay.ReplayRecorder(path, seed)
+    rng = random.Random(seed)
+    for frame in range(frames):
+        dt = GAME_FRAME_TIME if frame < frames // 2 else GAME_FRAME_TIME / 2
+        if frame % 50 == 49:
+            recorder.record(INPUT_PAUSE, dt)
+            continue
+        keys = rng.choice([0, INPUT_LEFT | INPUT_FIRE, INPUT_RIGHT | INPUT_FIRE, INPUT_FIRE])
+        recorder.record(keys, dt)
+        wave.step(keys, dt)
+        wave.setHit(False)
+    recorder.close()
+    assert recorder.getFrames() == frames
+    return wave
+
+
+def test_roundtrip(tmp_path):
+    """
+    Playing a replay back ends in exactly the state the recorded wave ended in.
+    """
+    path = str(tmp_path / 'wave.rpl')
+    wave = record(path, 7, 1500)
+    loaded = replay.Replay(path)
+    assert loaded.seed == 7 and len(loaded) == 1500
+    played = replay.replayCore(path)
+    assert played.getScore() == wave.getScore()
+    assert played.getLives() == wave.getLives()
+    assert played.getStep() == wave.getStep()
+    assert played.getShipX() == wave.getShipX()
+    assert (played.getFormation().alive == wave.getFormation().alive).all()
+    assert played.getFormation().x[0, 0] == wave.getFormation().x[0, 0]
+
+
+def test_other_settings_are_refused(tmp_path, monkeypatch):
+    """
+    A replay recorded with another formation is not played.
+    """
+    path = str(tmp_path / 'wave.rpl')
+    record(path, 3, 10)
+    monkeypatch.setattr(consts, 'ALIEN_ROWS', consts.ALIEN_ROWS + 1)
+    with pytest.raises(ValueError, match='ALIEN_ROWS'):
+        replay.replayCore(path)
+
+
+def test_other_version_is_refused(tmp_path):
+    """
+    A replay in a version of the format this module does not know is not loaded.
+    """
+    version = replay.VERSION + 1
+    path = tmp_path / 'other.rpl'
+    path.write_bytes(replay.MAGIC + struct.pack('<Bq', version, 0) + bytes(10))
+    with pytest.raises(AssertionError, match='version %d' % version):
+        replay.Replay(str(path))
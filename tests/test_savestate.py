@@ -0,0 +1,95 @@
+"""
+Tests for saving and loading the state of a wave (savestate.py).
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import pytest
+
+import core
+import savestate
+from consts import *
+from core import WaveCore
+from tournament import Hunter
+
+
+def describe(wave):
+    """
+    Returns everything about a wave that a save state has to bring back.
+    """
+    aliens = wave.getFormation()
+    bolts = wave.getBoltBuffer()
+    n = bolts.count()
+    return (wave.getScore(), wave.getLives(), wave.getStep(), wave.getTime(),
+            wave.getShipX(), wave.getBossPosition(), wave.getBossHealth(),
+            aliens.x.tobytes(), aliens.alive.tobytes(), aliens.hp.tobytes(),
+            aliens.count(), aliens.columns(), bolts.x[:n].tobytes(), bolts.y[:n].tobytes(),
+            bolts.vy[:n].tobytes())
+
+
+def play(wave, policy, frames):
+    """
+    Plays frames frames of wave (fewer if it ends), and returns the inputs used.
+    """
+    keys = []
+    for _ in range(frames):
+        if wave.isComplete():
+            break
+        keys.append(policy(wave))
+        wave.step(keys[-1], GAME_FRAME_TIME)
+        wave.setHit(False)
+    return keys
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_roundtrip(tmp_path, seed):
+    """
+    A loaded wave is in the saved state, and plays on exactly like the original.
+    """
+    path = str(tmp_path / 'wave.sav')
+    policy = Hunter()
+    wave = WaveCore(seed)
+    play(wave, policy, 300 + 400 * seed)
+    savestate.saveState(wave, path)
+    loaded = savestate.loadCore(path)
+    assert loaded.getSeed() == seed
+    assert describe(loaded) == describe(wave)
+    for keys in play(wave, policy, 2000):
+        loaded.step(keys, GAME_FRAME_TIME)
+        loaded.setHit(False)
+    assert describe(loaded) == describe(wave)
+
+
+def test_close_with_views(tmp_path):
+    """
+    Closing a save state while views of it are still held does not fail, and the
+    views stay readable.
+    """
+    path = str(tmp_path / 'wave.sav')
+    wave = WaveCore(4)
+    savestate.saveState(wave, path)
+    state = savestate.SaveState(path)
+    xs = state.aliens[0]
+    state.close()
+    state.close()
+    assert (xs == wave.getFormation().x).all()
+
+
+def test_other_shape_is_refused(tmp_path):
+    """
+    A state cannot be loaded into a wave with a formation of another shape.
+    """
+    path = str(tmp_path / 'wave.sav')
+    savestate.saveState(WaveCore(5), path)
+
+    class Small(WaveCore):
+        def createAlien(self):
+            return core.Formation(2, 3)
+
+    state = savestate.SaveState(path)
+    try:
+        with pytest.raises(ValueError, match='rows'):
+            state.check(Small(5))
+        state.check(WaveCore(5))
+    finally:
+        state.close()
@@ -0,0 +1,111 @@
+"""
+Tests for the software renderer in game2d/softview.py
+
+None of these need Kivy: decode_png and the drawing methods of SoftView only use
+NumPy.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import os
+import struct
+
+import numpy as np
+import pytest
+
+from game2d.capture import encode_png
+from game2d.softview import SoftView, decode_png
+
+# The directory holding the images of the game
+IMAGES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Images')
+
+
+@pytest.mark.parametrize('name', sorted(name for name in os.listdir(IMAGES)
+                                         if name.endswith('.png')))
+def test_decode_png_images(name):
+    """
+    Every image the game ships decodes to an RGBA array of the size in its header.
+    """
+    path = os.path.join(IMAGES, name)
+    with open(path, 'rb') as f:
+        width, height = struct.unpack('>II', f.read(24)[16:24])
+    pixels = decode_png(path)
+    assert pixels.dtype == np.uint8
+    assert pixels.shape == (height, width, 4)
+
+
+def test_decode_png_ship():
+    """
+    The ship has a transparent background and opaque pixels in its middle.
+    """
+    pixels = decode_png(os.path.join(IMAGES, 'ship.png'))
+    height, width = pixels.shape[:2]
+    assert pixels[0, 0, 3] == 0
+    assert pixels[height // 2, width // 2, 3] == 255
+
+
+def test_decode_png_roundtrip(tmp_path):
+    """
+    An image written by encode_png reads back unchanged.
+    """
+    pixels = np.random.default_rng(0).integers(0, 256, (17, 23, 4), dtype=np.uint8)
+    path = tmp_path / 'noise.png'
+    path.write_bytes(encode_png(pixels))
+    assert np.array_equal(decode_png(str(path)), pixels)
+
+
+def test_rect():
+    """
+    A rectangle fills exactly the pixels it covers, counting y up from the bottom.
+    """
+    view = SoftView(40, 30, images=IMAGES)
+    view.rect(10, 20, 8, 6, [1, 0, 0, 1])
+    red = np.all(view.frame == [255, 0, 0, 255], axis=2)
+    rows, cols = np.nonzero(red)
+    assert (rows.min(), rows.max(), cols.min(), cols.max()) == (7, 12, 6, 13)
+    assert red.sum() == 8 * 6
+    assert np.all(view.frame[~red] == [0, 0, 0, 255])
+
+
+def test_rect_blend():
+    """
+    A half transparent rectangle is blended over what is already drawn.
+    """
+    view = SoftView(4, 4, images=IMAGES)
+    view.clear((0, 0, 200, 255))
+    view.rect(2, 2, 4, 4, [1, 0, 0, 0.5])
+    assert view.frame[0, 0].tolist() == [128, 0, 100, 255]
+
+
+def test_blit(tmp_path):
+    """
+    An image drawn at its own size is copied pixel for pixel where it is opaque, and
+    leaves the view alone where it is transparent.
+    """
+    image = np.zeros((6, 5, 4), dtype=np.uint8)
+    image[:, :, 1] = 200
+    image[1:5, 1:4, 3] = 255
+    (tmp_path / 'box.png').write_bytes(encode_png(image))
+    view = SoftView(20, 10, images=str(tmp_path))
+    view.blit('box.png', 7.5, 5, 5, 6)
+    block = view.frame[2:8, 5:10]
+    opaque = image[:, :, 3] == 255
+    assert np.array_equal(block[opaque], image[opaque])
+    assert np.all(block[~opaque] == [0, 0, 0, 255])
+    assert np.all(view.frame[:, :5] == [0, 0, 0, 255])
+
+
+def test_scaled_cache_is_bounded(tmp_path, monkeypatch):
+    """
+    The cache of scaled images drops the least recently used ones beyond its limit.
+    """
+    image = np.full((4, 4, 4), 255, dtype=np.uint8)
+    (tmp_path / 'white.png').write_bytes(encode_png(image))
+    monkeypatch.setattr(SoftView, 'SCALED', type(SoftView.SCALED)())
+    monkeypatch.setattr(SoftView, 'SCALED_LIMIT', 3)
+    view = SoftView(64, 64, images=str(tmp_path))
+    for size in range(2, 20, 2):
+        view.blit('white.png', 32, 32, size, size)
+    view.blit('white.png', 32, 32, 14, 14)
+    assert len(SoftView.SCALED) == 3
+    assert [key[2] for key in SoftView.SCALED] == [16, 18, 14]
@@ -0,0 +1,81 @@
+"""
+Throughput regression tests for the headless engine (core.py and batch.py).
+
+These time the engine for a second or so and fail if it is far slower than it should
+be, to catch a change that makes every step much more expensive. The floors are well
+below what a laptop reaches (about 40,000 steps a second for WaveCore, and over
+700,000 game steps a second for WaveBatch), so that a busy machine does not fail
+them. They can be changed with the environment variables INVADERS_MIN_STEPS and
+INVADERS_MIN_BATCH_STEPS.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+import os
+import random
+import time
+
+import numpy as np
+
+from consts import *
+from core import WaveCore
+from batch import WaveBatch
+
+# The fewest WaveCore steps a second to accept
+MIN_STEPS = float(os.environ.get('INVADERS_MIN_STEPS', 15000))
+
+# The fewest game steps a second (steps times games) to accept from WaveBatch
+MIN_BATCH_STEPS = float(os.environ.get('INVADERS_MIN_BATCH_STEPS', 150000))
+
+# The inputs the games are played with
+CHOICES = [0, INPUT_LEFT | INPUT_FIRE, INPUT_RIGHT | INPUT_FIRE, INPUT_FIRE]
+
+# The number of times each measurement is taken (the best one counts)
+TRIES = 3
+
+
+def core_rate(seconds):
+    """
+    Returns the WaveCore steps a second of games played with random inputs.
+    """
+    rng = random.Random(0)
+    keys = [rng.choice(CHOICES) for _ in range(4096)]
+    wave = WaveCore(0)
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for n in range(steps, steps + 256):
+            if wave.isComplete():
+                wave = WaveCore(n)
+            wave.step(keys[n % len(keys)], GAME_FRAME_TIME)
+            wave.setHit(False)
+        steps += 256
+    return steps / (time.perf_counter() - start)
+
+
+def batch_rate(games, frames):
+    """
+    Returns the game steps a second of a batch played with random inputs.
+    """
+    batch = WaveBatch(games)
+    actions = np.random.default_rng(0).choice(CHOICES, size=(frames, games))
+    start = time.perf_counter()
+    for frame in range(frames):
+        batch.step(actions[frame], GAME_FRAME_TIME)
+    return frames * games / (time.perf_counter() - start)
+
+
+def test_core_throughput():
+    """
+    WaveCore steps a wave of the default size fast enough.
+    """
+    rate = max(core_rate(1.0) for _ in range(TRIES))
+    assert rate >= MIN_STEPS, "%.0f steps/s is below %.0f" % (rate, MIN_STEPS)
+
+
+def test_batch_throughput():
+    """
+    WaveBatch steps many games at once fast enough.
+    """
+    rate = max(batch_rate(1024, 200) for _ in range(TRIES))
+    assert rate >= MIN_BATCH_STEPS, "%.0f game steps/s is below %.0f" % (rate, MIN_BATCH_STEPS)
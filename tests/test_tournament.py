@@ -0,0 +1,41 @@
+"""
+Tests for the headless tournament runner (tournament.py).
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+from tournament import Hunter, RandomBot, playGame, runTournament, summarize
+
+
+def outcome(result):
+    """
+    Returns the parts of a game result that do not depend on timing.
+    """
+    return {key: value for key, value in result.items() if key != 'times'}
+
+
+def test_play_game_is_deterministic():
+    """
+    The same seed and policy always play the same game, and another seed plays
+    another one.
+    """
+    first = playGame(3, RandomBot(3), frames=1500)
+    assert outcome(first) == outcome(playGame(3, RandomBot(3), frames=1500))
+    assert len(first['times']) == first['frames'] <= 1500
+    others = [outcome(playGame(seed, RandomBot(3), frames=1500)) for seed in (4, 5)]
+    assert outcome(first) not in others
+
+
+def test_tournament_matches_single_games():
+    """
+    Every game played in the worker pool has the result it has when played alone.
+    """
+    games = [(seed, policy) for seed in range(3) for policy in (Hunter(), RandomBot(seed))]
+    results = list(runTournament(games, workers=2, frames=800))
+    assert len(results) == len(games)
+    alone = [playGame(seed, policy, frames=800) for seed, policy in games]
+    expected = sorted((r['seed'], r['policy'], str(outcome(r))) for r in alone)
+    found = sorted((r['seed'], r['policy'], str(outcome(r))) for r in results)
+    assert found == expected
+    summary = summarize(results[0])
+    assert 'times' not in summary and summary['stepMax'] >= summary['stepP50']
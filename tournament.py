@@ -0,0 +1,284 @@
+"""
+Tournament runner for Alien Invaders
+
+This module plays complete headless games (see WaveCore in core.py) in a pool
+of worker processes, one game per task. Every game has its own seed and its
+own policy, which decides the keys to hold down each frame. The results are
+handed back as each game finishes, not once the whole tournament is over.
+
+The workers are created once and reused for every game they are given, so
+the cost of starting Python and importing numpy, consts and core is only
+paid once per core. The worker processes never import kivy, so this runs
+on machines without a display.
+
+To run a tournament from the command line, use
+
+    python tournament.py --games 200 --policy hunter
+
+which prints one line of JSON per game as it finishes.
+
+# Ahmed Abdulla (aaa384), Harvey Zhu (hz639)
+# Dec 5 2023
+"""
+from consts import *
+from core import WaveCore
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import random
+import time
+
+# PRIMARY RULE: This module may only access consts.py and core.py. The workers must never
+# import kivy, game2d, models, wave or app.
+
+
+class Idle(object):
+    """
+    A policy that never touches the keys.
+    """
+
+    def __call__(self, wave):
+        """
+        Returns the keys to hold down this frame (always 0).
+
+        Parameter wave: the wave being played
+        Precondition: wave is a WaveCore object
+        """
+        return 0
+
+
+class Script(object):
+    """
+    A policy that plays a fixed list of inputs, over and over.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _keys: the inputs to play, one per frame
+    # Invariant: _keys is a non-empty list of ints, each a combination of
+    #            INPUT_LEFT, INPUT_RIGHT and INPUT_FIRE
+    #
+    # Attribute _next: the position in _keys of the next input
+    # Invariant: _next is an int in 0..len(_keys)-1
+
+    def __init__(self, keys):
+        """
+        Initializes a script from a list of inputs.
+
+        Parameter keys: the inputs to play, one per frame
+        Precondition: keys is a non-empty list of ints, each a combination of
+        INPUT_LEFT, INPUT_RIGHT and INPUT_FIRE
+        """
+        assert len(keys) > 0, "the script is empty"
+        self._keys = list(keys)
+        self._next = 0
+
+
+    def __call__(self, wave):
+        """
+        Returns the keys to hold down this frame.
+
+        Parameter wave: the wave being played
+        Precondition: wave is a WaveCore object
+        """
+        keys = self._keys[self._next]
+        self._next = (self._next + 1) % len(self._keys)
+        return keys
+
+
+class RandomBot(object):
+    """
+    A policy that mashes the keys at random.
+
+    The bot has its own random number generator, so a game played by a
+    RandomBot is still decided by the seeds alone.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _rng: the random number generator of the bot
+    # Invariant: _rng is a random.Random object
+
+    def __init__(self, seed=None):
+        """
+        Initializes a random bot.
+
+        Parameter seed: the seed for the bot's random number generator
+        Precondition: seed is None or an int
+        """
+        self._rng = random.Random(seed)
+
+
+    def __call__(self, wave):
+        """
+        Returns the keys to hold down this frame.
+
+        Parameter wave: the wave being played
+        Precondition: wave is a WaveCore object
+        """
+        return self._rng.randint(0, INPUT_LEFT | INPUT_RIGHT | INPUT_FIRE)
+
+
+class Hunter(object):
+    """
+    A policy that moves under the nearest column of aliens (or the boss) and
+    fires whenever it can.
+    """
+
+    def __call__(self, wave):
+        """
+        Returns the keys to hold down this frame.
+
+        Parameter wave: the wave being played
+        Precondition: wave is a WaveCore object
+        """
+        x = wave.getShipX()
+        if x is None:
+            return 0
+        boss = wave.getBossPosition()
+        if boss is not None:
+            target = boss[0]
+        else:
+            aliens = wave.getFormation()
+            cols = aliens.columns()
+            if not cols:
+                return INPUT_FIRE
+            xs = aliens.x[0, cols]
+            target = float(xs[np.argmin(np.abs(xs - x))])
+        if target > x + SHIP_MOVEMENT:
+            return INPUT_RIGHT | INPUT_FIRE
+        if target < x - SHIP_MOVEMENT:
+            return INPUT_LEFT | INPUT_FIRE
+        return INPUT_FIRE
+
+
+# The policies that can be picked by name from the command line
+POLICIES = {'idle': Idle, 'random': RandomBot, 'hunter': Hunter}
+
+
+def playGame(seed, policy, dt=GAME_FRAME_TIME, frames=GAME_FRAME_LIMIT):
+    """
+    Plays one headless game to the end and returns its result.
+
+    The game ends when the wave is won or lost, or after frames frames. As
+    in WaveCore.advance, a hit on the ship is acknowledged at once.
+
+    The result is a dictionary with the seed, the name of the policy's
+    class, the final score and lives, the number of frames played, whether
+    the wave was won (which means the boss was killed), and 'times', an
+    int64 array with the time in nanoseconds that each frame took to step.
+
+    Parameter seed: the seed of the wave
+    Precondition: seed is an int
+
+    Parameter policy: the player, called with the wave once per frame
+    Precondition: policy is a picklable callable that takes a WaveCore and
+    returns a combination of INPUT_LEFT, INPUT_RIGHT and INPUT_FIRE
+
+    Parameter dt: the time step of a frame
+    Precondition: dt is a float > 0
+
+    Parameter frames: the most frames to play
+    Precondition: frames is an int >= 0
+    """
+    wave = WaveCore(seed)
+    times = np.zeros(frames, dtype=np.int64)
+    clock = time.perf_counter_ns
+    n = 0
+    while n < frames and not wave.isComplete():
+        keys = policy(wave)
+        start = clock()
+        wave.step(keys, dt)
+        times[n] = clock() - start
+        wave.setHit(False)
+        n += 1
+    return {'seed': seed, 'policy': type(policy).__name__,
+            'score': wave.getScore(), 'lives': wave.getLives(), 'frames': n,
+            'won': wave.isWon(), 'times': times[:n]}
+
+
+def runTournament(games, workers=None, dt=GAME_FRAME_TIME, frames=GAME_FRAME_LIMIT):
+    """
+    Plays a list of games in a pool of worker processes.
+
+    This is a generator: it yields the result of each game (see playGame)
+    as soon as that game finishes, so the results come back in no set
+    order. Leaving the loop early cancels the games that have not started.
+
+    Parameter games: the games to play
+    Precondition: games is a list of pairs (seed, policy), as for playGame
+
+    Parameter workers: the number of worker processes
+    Precondition: workers is None (one per core) or an int > 0
+
+    Parameter dt: the time step of a frame
+    Precondition: dt is a float > 0
+
+    Parameter frames: the most frames to play in each game
+    Precondition: frames is an int >= 0
+    """
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_warmup)
+    try:
+        tasks = [pool.submit(playGame, seed, policy, dt, frames)
+                 for seed, policy in games]
+        for task in as_completed(tasks):
+            yield task.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def summarize(result):
+    """
+    Returns a copy of a game result with the frame times replaced by
+    statistics, ready to be written as JSON.
+
+    The times become 'stepMean', 'stepP50', 'stepP99' and 'stepMax', in
+    microseconds.
+
+    Parameter result: the result of a game
+    Precondition: result is a dictionary returned by playGame
+    """
+    summary = dict(result)
+    times = summary.pop('times') / 1000.0
+    if len(times) == 0:
+        times = np.zeros(1)
+    summary['stepMean'] = round(float(times.mean()), 3)
+    summary['stepP50'] = round(float(np.percentile(times, 50)), 3)
+    summary['stepP99'] = round(float(np.percentile(times, 99)), 3)
+    summary['stepMax'] = round(float(times.max()), 3)
+    return summary
+
+
+# HIDDEN FUNCTIONS
+def _warmup():
+    """
+    Prepares a worker process before its first game.
+
+    A short throwaway game goes through the firing, collision and scoring
+    code once, so the first game of a worker does not pay for it in its
+    frame times.
+    """
+    playGame(0, Hunter(), frames=600)
+
+
+def _main():
+    """
+    Runs a tournament from the command line, printing results as JSON lines.
+    """
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description='Play headless games of Alien Invaders')
+    parser.add_argument('--games', type=int, default=100, help='the number of games')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the first game')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='hunter')
+    parser.add_argument('--workers', type=int, default=None, help='default: one per core')
+    parser.add_argument('--frames', type=int, default=GAME_FRAME_LIMIT)
+    args = parser.parse_args()
+
+    games = []
+    for seed in range(args.seed, args.seed + args.games):
+        if args.policy == 'random':
+            games.append((seed, RandomBot(seed)))
+        else:
+            games.append((seed, POLICIES[args.policy]()))
+    for result in runTournament(games, args.workers, frames=args.frames):
+        print(json.dumps(summarize(result)), flush=True)
+
+
+if __name__ == '__main__':
+    _main()